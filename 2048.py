@@ -5,6 +5,9 @@ Tiles with the same number merge into one, doubling their value and a new tile (
 randomly in an empty spot on the grid. You win when you reach 2048. You lose when there are no
 more valid moves.
 
+The board is 4x4 by default. Set BOARD_SIZE (or Game.board_size before running the scene) for bigger
+or smaller boards. The bitboard engine and the AI only support 4x4, other sizes use the NumPy engine.
+
 """
 
 from math import log2
@@ -14,12 +17,24 @@ import numpy as np
 from scene import *
 import ui
 import sound
+import bitboard_2048 as bitboard
+import batch_2048 as batch
+from expectimax_2048 import Expectimax
+import replay_2048 as replay
 
 
+ENGINE = 'bitboard'     # 'bitboard' (lookup tables, see bitboard_2048.py) or 'numpy' (see batch_2048.py)
+BOARD_SIZE = 4          # tiles per row and column
+GAP_RATIO = 2 / 11      # gap between tiles relative to tile size
+RECORD = False          # append every finished game to RECORD_FILE (see replay_2048.py)
+RECORD_FILE = 'games_2048.bin'
 DARK = '#3b3736'
 BRIGHT = 'whitesmoke'
 FONT = 'Helvetica-bold'
 BREAKPOINT = 500
+AI_TIME_BUDGET = 0.015  # seconds the AI may think per move (hint and autoplay)
+ARROWS = {'left': '←', 'right': '→', 'up': '↑', 'down': '↓'}
+MAX_EXPONENT = 31       # biggest tile with a precomputed color is 2**31
 
 class Tile:
     def __init__(self, tile, label, row, col):
@@ -30,14 +45,18 @@ class Tile:
 
 
 class Game(Scene):
+    board_size = BOARD_SIZE
+
     def setup(self):
         self.initialized = False
+        self.engine = ENGINE if self.board_size == 4 else 'numpy'
         
         # dimensions
         self.get_sizes()
         
         # Elements
         self.background_color = DARK
+        self.tile_colors = [self.get_color(1 << exp if exp else 0) for exp in range(MAX_EXPONENT + 1)]
         self.tiles = []
         self.create_tiles()
         self.create_menu()
@@ -46,6 +65,12 @@ class Game(Scene):
         self.mute = False
         self.mute_toggle = SpriteNode('typb:Unmute', position=(32, self.size.h - 36), parent=self)
         
+        # AI hint and autoplay (4x4 only)
+        self.ai = Expectimax(time_budget=AI_TIME_BUDGET) if self.board_size == 4 else None
+        self.autoplay = False
+        if self.ai:
+            self.create_ai_buttons()
+        
         # Start with two tiles
         self.game_over = False
         self.start_game()
@@ -54,12 +79,14 @@ class Game(Scene):
         self.screen_w, self.screen_h = get_screen_size()
         self.center_x, self.center_y = self.screen_w / 2, self.screen_h / 2
         self.matrix = int(0.9 * min(self.screen_w, self.screen_h))
-        self.square = int(0.22 * self.matrix)
-        self.gap = int(0.04 * self.matrix)
+        n = self.board_size
+        self.square = int(self.matrix / (n + (n - 1) * GAP_RATIO))
+        self.gap = int(self.square * GAP_RATIO)
         self.border_radius = int(0.02 * self.matrix)
-        self.menu_w = self.square * 4
-        self.menu_h = self.square * 2
+        self.menu_w = int(0.88 * self.matrix)
+        self.menu_h = int(0.44 * self.matrix)
         self.font_size = 45 if min(self.screen_w, self.screen_h) > BREAKPOINT else 28
+        self.tile_font_size = self.font_size * min(1, 4 / n)
     
     def create_menu(self):
         self.menu = ShapeNode(
@@ -107,12 +134,41 @@ class Game(Scene):
         )
         return btn
                 
+    def create_ai_buttons(self):
+        self.hint_btn = LabelNode(
+            '?',
+            font=(FONT, self.font_size),
+            color=BRIGHT,
+            position=(self.size.w - 32, self.size.h - 36),
+            parent=self
+        )
+        self.autoplay_btn = LabelNode(
+            'AI',
+            font=(FONT, self.font_size * .6),
+            color=BRIGHT,
+            alpha=0.4,
+            position=(self.size.w - 32 - self.font_size * 1.5, self.size.h - 36),
+            parent=self
+        )
+
+    def best_move(self):
+        return self.ai.best_move(bitboard.encode(self.board))
+
+    def show_hint(self):
+        direction = self.best_move()
+        if direction:
+            self.hint_btn.text = ARROWS[direction]
+            self.hint_btn.run_action(Action.sequence(
+                Action.wait(1),
+                Action.call(lambda: setattr(self.hint_btn, 'text', '?'))
+            ))
+
     def create_tiles(self):
         start_x = (self.screen_w - self.matrix) // 2
         start_y = (self.screen_h - self.matrix) // 2
 
-        for i in range(4*4):
-            r, c = divmod(i, 4)
+        for i in range(self.board_size ** 2):
+            r, c = divmod(i, self.board_size)
             x = start_x + c * (self.square + self.gap)
             y = start_y + r * (self.square + self.gap)
 
@@ -128,35 +184,13 @@ class Game(Scene):
             # create tile label
             label = LabelNode(
                 '',
-                font=(FONT, self.font_size),
+                font=(FONT, self.tile_font_size),
                 parent=tile
                 )
 
             # store tile and label in list to reference
             self.tiles.append(Tile(tile, label, r, c))
 
-    def collapse(self, sequence):
-        # remove zeros
-        sequence = [num for num in sequence if num > 0]
-        seq = []
-
-        # check and remove
-        while sequence:
-            if len(sequence) == 1:
-                # last item
-                seq.append(sequence[0])
-                sequence = []
-            elif sequence[0] == sequence[1]:
-                # merge equal numbers
-                seq.append(sequence[0] + sequence[1])
-                sequence = sequence[2:]
-            else:
-                seq.append(sequence[0])
-                sequence = sequence[1:]
-
-        # pad with zeros
-        return seq + [0] * (4 - len(seq))
-
     def swipe_direction(self, touch_start, touch_end):
         if not touch_start or not touch_end:
              return
@@ -171,32 +205,29 @@ class Game(Scene):
         )
 
     def swipe(self, direction):
-        board_swiped = np.copy(self.board)
-
-        if direction in ['right', 'left']:
-            flip = direction == 'right'
-            for i in range(4):
-                row = np.flip(self.board[i, :]) if flip else self.board[i, :]
-                new_row = self.collapse(row)
-                board_swiped[i, :] = np.flip(new_row) if flip else new_row
-
-        elif direction in ['up', 'down']:
-            flip = direction == 'up'
-            for i in range(4):
-                col = np.flip(self.board[:, i]) if flip else self.board[:, i]
-                new_col = self.collapse(col)
-                board_swiped[:, i] = np.flip(new_col) if flip else new_col
-
-        # check if anything has changed, invalid swipes shouldn't result in new tiles
-        if not np.array_equal(board_swiped, self.board):
-            self.board = board_swiped
+        if self.engine == 'bitboard':
+            return self.swipe_bitboard(direction)
+
+        board_swiped, _, changed = batch.move(self.board[np.newaxis], direction)
+
+        # invalid swipes shouldn't result in new tiles
+        if changed[0]:
+            self.board = board_swiped[0]
+            return True
+
+    def swipe_bitboard(self, direction):
+        board = bitboard.encode(self.board)
+        board_swiped, _ = bitboard.move(board, direction)
+
+        # invalid swipes shouldn't result in new tiles
+        if board_swiped != board:
+            self.board = np.array(bitboard.decode(board_swiped))
             return True
 
     def add_new_tile(self):
-        free_cells = np.argwhere(self.board == 0)
-        if free_cells.size > 0:
-            r, c = random.choice(free_cells)
-            self.board[r, c] = random.choice([2,4])
+        cell = batch.add_new_tiles(self.board[np.newaxis], self.rng)[0]
+        if self.recorder and cell >= 0:
+            self.recorder.spawn(cell, self.board.flat[cell])
 
     def get_color(self, num, start_hue=0.3, sat=0.6, vib=0.7):
         if num == 0:
@@ -206,37 +237,45 @@ class Game(Scene):
         return hsv_to_rgb(hue, sat, vib)
 
     def update(self):
-        if not self.initialized or self.game_over:
+        if not self.initialized:
+            return
+
+        # let the AI play one move per frame
+        if self.autoplay and not self.game_over:
+            direction = self.best_move()
+            if direction:
+                self.play_move(direction)
+
+        self.render_tiles()
+
+    def render_tiles(self):
+        """Update color and label of tiles whose number changed since the last frame."""
+        changed = np.flatnonzero(self.board != self.shown_board)
+        if changed.size == 0:
             return
 
-        # Update tiles and labels
-        for tile in self.tiles:
-            num = self.board[tile.row, tile.col]
-            tile.tile.fill_color = self.get_color(num)
+        for i in changed:
+            tile = self.tiles[i]
+            num = int(self.board[tile.row, tile.col])
+            tile.tile.fill_color = self.tile_colors[num.bit_length() - 1 if num else 0]
             tile.label.text = str(num) if num > 0 else ''
+        self.shown_board = self.board.copy()
 
-        # Check game status
-        if self.win() or self.no_more_moves():
-            self.menu_label.text = 'You win!' if self.win() else 'Game Over'
+    def check_game_status(self):
+        """Show the menu if the last move won or lost the game."""
+        won = self.win()
+        if won or self.no_more_moves():
+            self.menu_label.text = 'You win!' if won else 'Game Over'
             self.menu.alpha = 0.9
             self.game_over = True
+            if self.recorder:
+                replay.write_records(RECORD_FILE, [self.recorder.finish(self.board)])
 
     def no_more_moves(self):
-        for r in range(4):
-            for c in range(4):
-                current = self.board[r, c]
-
-                # empty  cells 
-                if current == 0:
-                    return False
+        if self.engine == 'bitboard':
+            return bitboard.no_more_moves(bitboard.encode(self.board))
 
-                # similar neighbours
-                if c < 3 and self.board[r, c+1] == current:
-                    return False
-                if r < 3 and self.board[r+1, c] == current:
-                    return False
-
-        return True
+        return not batch.can_move(self.board[np.newaxis])[0]
 
     def win(self):
         return 2048 in self.board
@@ -246,13 +285,32 @@ class Game(Scene):
         self.run_action(Action.sequence(Action.wait(1), Action.call(self.view.close)))
 
     def start_game(self):
-        self.board = np.zeros((4,4), dtype=int)
+        self.board = np.zeros((self.board_size, self.board_size), dtype=int)
+        self.shown_board = np.full_like(self.board, -1)    # forces a full redraw
+        # seeded generator for spawns, so recorded games can be replayed
+        self.seed = random.getrandbits(64)
+        self.rng = np.random.default_rng(self.seed)
+        self.recorder = replay.Recorder(self.seed, self.board_size) if RECORD else None
         for _ in range(2):
             self.add_new_tile()
         self.menu.alpha = 0
         self.game_over = False
+        if self.ai:
+            self.ai.cache.clear()
         self.initialized = True
 
+    def play_move(self, direction):
+        if self.game_over:
+            return
+
+        if self.swipe(direction):
+            if self.recorder:
+                self.recorder.move(direction)
+            if not self.mute:
+                sound.play_effect('8ve:8ve-tap-toothy')
+            self.add_new_tile()
+            self.check_game_status()
+
     def touch_began(self, touch):
         self.start_xy = touch.location
 
@@ -262,6 +320,13 @@ class Game(Scene):
             self.mute = not self.mute
             self.mute_toggle.texture = Texture(['typb:Unmute', 'typb:Mute'][self.mute])
 
+        # AI hint and autoplay toggle
+        if self.ai and self.hint_btn.frame.contains_point(touch.location):
+            self.show_hint()
+        if self.ai and self.autoplay_btn.frame.contains_point(touch.location):
+            self.autoplay = not self.autoplay
+            self.autoplay_btn.alpha = [0.4, 1][self.autoplay]
+
         # game over menu
         if self.game_over:
             menu_touch = self.menu.point_from_scene(touch.location)
@@ -273,10 +338,7 @@ class Game(Scene):
         # swipe tiles
         direction = self.swipe_direction(self.start_xy, touch.location)
         if direction:
-            if self.swipe(direction):
-                if not self.mute:
-                    sound.play_effect('8ve:8ve-tap-toothy')
-                self.add_new_tile()
+            self.play_move(direction)
 
         # reset touch start
         self.start_xy = None
@@ -1,12 +1,17 @@
 """CODE CRACKER
 
-    The Secret word is a random 5-letter word provided by https://random-word-api.herokuapp.com.
+    The Secret word is a random 5-letter word from an offline word corpus (build it with code_cracker_words.py)
+    or, without one, provided by https://random-word-api.herokuapp.com (prefetched in the background).
     You have 10 attempts to crack the code. The colored feedback shows if a letter is at the right spot, wrong spot
     but in the secret word or doesn't appear at all.
 """
-import requests
+import os
+import queue
 import console
 import unicodedata
+from code_cracker_words import WordCorpus, corpus_path
+from code_cracker_advisor import Advisor, matrix_path
+from code_cracker_supplier import WordSupplier
 
 
 COLOR_CODE = {
@@ -18,28 +23,31 @@ COLOR_CODE = {
 WORD_LENGTH = 5
 LANGUAGE = 'de'     # random-word-api supported languages 2024/09 ["de","fr","it","es","zh"]
 MAX_ATTEMPTS = 10
+CORPUS_FILE = corpus_path(LANGUAGE, WORD_LENGTH)   # offline words, memory-mapped
+CORPUS = WordCorpus(CORPUS_FILE) if os.path.exists(CORPUS_FILE) else None
+MATRIX_FILE = matrix_path(LANGUAGE, WORD_LENGTH)   # feedback of all word pairs for hints, build it with code_cracker_advisor.py
+ADVISOR = Advisor(CORPUS, MATRIX_FILE) if CORPUS and os.path.exists(MATRIX_FILE) else None
+API_TIMEOUT = 15    # seconds to wait for a word of the api if none is prefetched
+SUPPLIER = None     # WordSupplier, fetches words in the background once the game starts without a corpus
+
+def start_supplier():
+    """Start prefetching words of the random-word-api (only without offline corpus)."""
+    global SUPPLIER
+    if not CORPUS and not SUPPLIER:
+        SUPPLIER = WordSupplier(length=WORD_LENGTH)
+        SUPPLIER.prefetch(LANGUAGE)
 
 def get_random_word():
-    """Get a random 5-letter word via the random-word-api
+    """Get a random word from the offline corpus or, without one, a prefetched word of the random-word-api
     """
+    if CORPUS:
+        return CORPUS.random_word()
+
+    start_supplier()
     try:
-        S = requests.Session()
-        URL = "https://random-word-api.herokuapp.com/word?length=5"
-        PARAMS = {
-            'length': 5,
-            'lang': LANGUAGE,
-            'number': 1,
-        }
-        R = S.get(url=URL, params=PARAMS)
-        DATA = R.json()
-
-        # avoid 'ß' for it'd become 'ss' and add a 6th letter
-        if 'ẞ' in DATA:
-          DATA = get_random_word()
-
-        return DATA[0].upper()
-    except requests.RequestException as e:
-        print(f"Ups, Problem mit der Random-Word-Api : {e}")
+        return SUPPLIER.get_word(LANGUAGE, timeout=API_TIMEOUT)
+    except queue.Empty:
+        print(f"Ups, Problem mit der Random-Word-Api: keine Antwort nach {API_TIMEOUT} Sekunden")
         return "ERROR"
 
 def check_guess(secret_word, guess):
@@ -68,6 +76,11 @@ def get_guess(attempt):
     while True:
         guess = input(f'{attempt}) \t').strip()
 
+        if guess == '?' and ADVISOR:
+            hint = ADVISOR.best_guess()
+            print(f'\tTipp: {hint}  [Kandidaten: {len(ADVISOR.candidates)}]' if hint else '\tKein Wort passt.')
+            continue
+
         # normalize so äöü count as 1 letter each
         guess = unicodedata.normalize('NFC', guess)
 
@@ -88,7 +101,10 @@ def play_again():
             return False
 
 if __name__ == "__main__":
+    start_supplier()
     print(f'KNACK DEN CODE  ({LANGUAGE})\n')
+    if ADVISOR:
+        print('Tipp gefällig? Gib ? ein.\n')
 
     attempt = 1
     secret_word = get_random_word()
@@ -102,6 +118,8 @@ if __name__ == "__main__":
             guess = get_guess(attempt)
             feedback = check_guess(secret_word, guess)
             print_feedback(feedback)
+            if ADVISOR:
+                ADVISOR.update(guess, feedback)
 
             if solved(feedback):
                 print('\nDu hast den Code geknackt!')
@@ -116,6 +134,8 @@ if __name__ == "__main__":
         if play_again():
             attempt = 1
             secret_word = get_random_word()
+            if ADVISOR:
+                ADVISOR.reset()
             console.clear()
             print(f'KNACK DEN CODE ({LANGUAGE})\n')
             print_feedback([0]*5)
@@ -6,26 +6,37 @@ new color.
 
 You can be efficient and only move your phone/ wrist or make big movements, use your arm and upper body o loosen you
 stiff desk-worker physique.
+
+The attitude is sampled and smoothed by color_catcher_sensors.SensorStream, see ATTITUDE_SOURCE and
+SMOOTHING to plug in another source or filter. The matching rules are in color_catcher_match.py, set
+RECORD_TRACE to record the attitude of a session and replay it with color_catcher_trace.py.
 """
 from scene import *
-import math
-import motion
 import colorsys
-import random 
 import sound
+from color_catcher_sensors import MotionSource, SensorStream, KalmanFilter
+from color_catcher_match import ColorMatch, random_hsv
+from color_catcher_trace import CELEBRATION, TraceRecorder
 
 A = Action
 
+ATTITUDE_SOURCE = MotionSource()    # anything with start(), read() -> (roll, pitch, yaw), stop()
+SMOOTHING = KalmanFilter()          # or ExponentialFilter(alpha) or None for raw sensor values
+SENSOR_BUFFER = 256                 # samples kept in the ring buffer
+RECORD_TRACE = None                 # file name like 'session.trace' to record the attitude samples and targets
+
 class ColorFinder(Scene):
   def setup(self):
     self.active = True
     self.decimal = 2
     self.wins = 0
     self.target_h, self.target_s, self.target_v = self.random_hsv()
+    self.match = ColorMatch((self.target_h, self.target_s, self.target_v), self.decimal)
     
-    self.h, self.s, self.v = None, None, None
-    self.roll, self.pitch, self.yaw = 1, 1, 1
-    motion.start_updates()
+    self.sensors = SensorStream(ATTITUDE_SOURCE, SMOOTHING, SENSOR_BUFFER)
+    self.sensors.start()
+    self.recorder = TraceRecorder(RECORD_TRACE, self.decimal) if RECORD_TRACE else None
+    self.record_target()
     
     self.color_nodes_setup()
     self.star_nodes_setup()
@@ -86,55 +97,35 @@ class ColorFinder(Scene):
   def glow_animation(self):
     self.glow.color = getattr(self.target, 'color')
     grow = A.group(
-      A.scale_to(3, 0.5),
-      A.fade_to(0.3, 0.5),
+      A.scale_to(3, CELEBRATION / 2),
+      A.fade_to(0.3, CELEBRATION / 2),
       )
     shrink = A.group(
-      A.scale_to(1.0, 0.5),
-      A.fade_to(0, 0.5),
+      A.scale_to(1.0, CELEBRATION / 2),
+      A.fade_to(0, CELEBRATION / 2),
       )
     glow_sequence = A.sequence(grow, shrink, A.call(self.reset))
     self.glow.run_action(glow_sequence)
     
   def color_correct(self):
-    return all([self.h, self.s, self.v])
+    return self.match.caught
     
   def random_hsv(self):
-    return tuple([round(
-      random.uniform(1/100, 1), self.decimal) for val in 'hsv'])
-  
-  def get_val(self, label):
-    # check if already found value
-    found = getattr(self, label)
-    if found: return found
-    
-    # formula for h/s/v values
-    val_calculation = {
-      'h': round(((math.degrees(self.yaw)%360) / 360), self.decimal),
-      's': round(abs(abs(self.roll/math.pi) -1), 
-        self.decimal),
-      'v': round(abs(abs(self.pitch/(math.pi/2)) -1), self.decimal)
-    }
-    val = val_calculation[label]
-    
-    # check if target found
-    if val == getattr(self, f'target_{label}'):
-      sound.play_effect('ui:switch6', 0.1)
-      getattr(self, f'label_{label}').alpha = 1
-      setattr(self, label, val)
-    
-    return val
+    return random_hsv(self.decimal)
     
   def get_hsv(self):
-    self.roll, self.pitch, self.yaw = motion.get_attitude()
-    return colorsys.hsv_to_rgb(
-      self.get_val('h'), 
-      self.get_val('s'), 
-      self.get_val('v'))
+    # only channels that aren't locked yet are computed
+    hsv, locked = self.match.update(self.sensors.sample(self.t))
+    for i in locked:
+      sound.play_effect('ui:switch6', 0.1)
+      (self.label_h, self.label_s, self.label_v)[i].alpha = 1
+    return colorsys.hsv_to_rgb(*hsv)
       
   def update(self):
     if self.active:
       self.search.color = self.get_hsv()
+      if self.recorder:
+        self.recorder.record(self.sensors.buffer)
       
       if self.color_correct():
         self.active = False
@@ -144,20 +135,31 @@ class ColorFinder(Scene):
         
   def new_target(self):
     self.target_h, self.target_s, self.target_v = self.random_hsv()
+    self.match = ColorMatch((self.target_h, self.target_s, self.target_v), self.decimal)
     self.target.color = colorsys.hsv_to_rgb(
       self.target_h, self.target_s, self.target_v)
+    self.record_target()
+
+  def record_target(self):
+    # replays chase the same colors
+    if self.recorder:
+      self.recorder.target(self.sensors.buffer, self.match.target)
 
   def reset(self):
     self.new_target()
     
-    # clear hsv and switch off text labels
-    self.h, self.s, self.v = None, None, None
+    # switch off text labels
     for label in [
       self.label_h, self.label_s, self.label_v]: 
       label.alpha=0
     
     self.active = True
 
+  def stop(self):
+    self.sensors.stop()
+    if self.recorder:
+      self.recorder.close(self.sensors.buffer)
+
 if __name__ == '__main__':
   run(ColorFinder(), PORTRAIT, frame_interval=2)
   
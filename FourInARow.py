@@ -1,91 +1,104 @@
 """ FOUR IN A ROW -
-Play the classic game with a friend in your console.
+Play the classic game with a friend in your console or against the computer.
+Change ROWS, COLS and CONNECT for other boards and longer lines (connect-k).
 """
 
+import os
 import numpy as np
 import console
+from four_in_a_row_engine import Position, Searcher, find_lines
+from four_in_a_row_book import OpeningBook, book_path
 
 
 SYMBOLS = ['⬛️', '🟠', '🔵']   # Emojis for empty cell, player 1, player 2
 BOARD_SIZE = 5                # change if you like a smaller/bigger board
-BOARD = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=int)
+ROWS, COLS = BOARD_SIZE, BOARD_SIZE     # or give rows and columns separately
+CONNECT = 4                   # coins in a row to win
+BOARD = np.zeros((ROWS, COLS), dtype=int)
+POSITION = Position(ROWS, COLS, CONNECT)  # bitboards and column heights, see four_in_a_row_engine.py
+COMPUTER = None               # set to 1 or -1 to let the computer play that player
+THINK_TIME = 1.0              # seconds the computer may think per move
+SEARCHER = None               # created on the computer's first move, keeps its transposition table
+BOOK_FILE = book_path(ROWS, COLS, CONNECT)   # opening book, build it with four_in_a_row_book.py
+
+def load_book():
+    """The opening book for this board, None without one or if it was built by an older version."""
+    if not os.path.exists(BOOK_FILE):
+        return None
+    try:
+        return OpeningBook(BOOK_FILE)
+    except ValueError as error:
+        print(f'{error}, rebuild it with four_in_a_row_book.py')
+        return None
+
+BOOK = load_book()
+
+def reset_board():
+    BOARD[:] = 0
+    POSITION.reset()
 
 def board_filled() -> bool:
-    return not (0 in BOARD)
-    
-def has_4_in_a_row(sequence, player) -> bool:
-    return any(all(cell == player for cell in sequence[i:i+4]) for i in range(len(sequence) - 3))
-    
-def get_diagonals() -> list:
-    """Get all 4 item long diagonals in BOARD (global)
-    """
-    diagonals = []
-    
-    # top left to bottom right
-    for row in range(BOARD_SIZE - 3): 
-        for col in range(BOARD_SIZE - 3):
-            diagonals.append(BOARD[[row, row+1, row+2, row+3], [col, col+1, col+2, col+3]])
-
-    # bottom left to top right
-    for row in range(3, BOARD_SIZE):  
-        for col in range(BOARD_SIZE - 3):  
-            diagonals.append(BOARD[[row, row-1, row-2, row-3], [col, col+1, col+2, col+3]])
-
-    return diagonals
+    return POSITION.is_full()
 
 def is_winner(player) -> bool:
-    # check rows
-    for row in BOARD:
-        if has_4_in_a_row(row, player):
-            return True
-
-    # check columns
-    for col in range(BOARD_SIZE):
-        column = BOARD[:, col]
-        if has_4_in_a_row(column, player):
-            return True
-        
-    # check diagonals
-    diagonals = get_diagonals()
-    for diagonal in diagonals:
-        if has_4_in_a_row(diagonal, player):
-            return True
-
-    return False
-
-def drop_coin(column: int, player: int) -> None:
-    """ Try to drop a coin in the given column. If column is full recursively ask for another."""
-
-    col = BOARD[:, column - 1]
-    if 0 in col:
-        row = max(i for i, cell in enumerate(col) if cell == 0)
-        BOARD[row, column -1] = player
-        return
-    else:
-        print(f'Chose another. Column {column} is full.')
-        drop_coin(chose_column(player), player)
-
-    return
+    """Check the four lines through the last coin of player."""
+    return POSITION.is_winner(player)
+
+def load_board(board) -> int:
+    """Continue a saved or imported game. Check the whole board, return the winner (1, -1) or 0."""
+    board = np.asarray(board)
+    if board.shape != BOARD.shape:
+        raise ValueError(f'Board must have {ROWS} rows and {COLS} columns, not {board.shape}')
+
+    POSITION.set_board(board)
+    BOARD[:] = board
+
+    wins = find_lines(board, CONNECT)
+    if wins[1] and wins[-1]:
+        raise ValueError('Both players have a line, that can\'t happen')
+    return 1 if wins[1] else -1 if wins[-1] else 0
+
+def drop_coin(column: int, player: int) -> int:
+    """Drop a coin in the given column (1-based, must not be full). Return the row it lands in.
+    Players take turns, POSITION knows whose turn it is: player has to be that one, else ValueError.
+    """
+    if player != POSITION.player:
+        raise ValueError(f'player {player} dropped a coin, it is the turn of {POSITION.player}')
+    row = POSITION.play(column - 1)
+    BOARD[row, column - 1] = player
+    return row
+
+def computer_column() -> int:
+    global SEARCHER
+    move = BOOK.lookup(POSITION) if BOOK else None
+    if move is not None:
+        return move + 1
+
+    if SEARCHER is None:
+        SEARCHER = Searcher(time_budget=THINK_TIME)
+    return SEARCHER.best_move(POSITION) + 1
 
 def print_board():
     """Print board with SYMBOLS """
     pretty_board = np.array(
-        [SYMBOLS[i] for i in BOARD.flatten()]).reshape(BOARD_SIZE, BOARD_SIZE)
+        [SYMBOLS[i] for i in BOARD.flatten()]).reshape(ROWS, COLS)
 
-    print('\n', ''.join([str(i).center(3) for i in range(1, BOARD_SIZE +1)]))
+    print('\n', ''.join([str(i).center(3) for i in range(1, COLS +1)]))
     print(*[' '.join(row) for row in pretty_board], sep='\n', end='\n')
 
 def chose_column(player) -> int:
     """ Keep asking for a column until valid answer is given """
     while True:
         col = input(f'\n{SYMBOLS[player]} chose a column:').strip()
-        if not col.isdigit():
-            print(f'Chose a column between 1 and {BOARD_SIZE}')
-        elif 0 < int(col) <= BOARD_SIZE:
+        if not col.isdigit() or not 0 < int(col) <= COLS:
+            print(f'Chose a column between 1 and {COLS}')
+        elif not POSITION.can_play(int(col) - 1):
+            print(f'Chose another. Column {col} is full.')
+        else:
             return int(col)
 
 if __name__ == '__main__':
-    print('4 in a row'.upper())
+    print(f'{CONNECT} in a row'.upper())
 
     game_on = True
     player = 1
@@ -94,7 +107,7 @@ if __name__ == '__main__':
 
     while game_on:
         
-        column = chose_column(player)
+        column = computer_column() if player == COMPUTER else chose_column(player)
         drop_coin(column, player)
         console.clear()
         print_board()
@@ -3,18 +3,24 @@
 from scene import *
 import sound
 import ui
-import requests
-from PIL import Image
-from io import BytesIO
 import random
 import os
-import glob
+import threading
+from collections import OrderedDict, deque
+from photo_source import PicsumSource, DirectorySource, ImageCache, ImagePrefetcher
+from slider_solver import Solver, is_solvable
 
 
 BORDER_W = 20 if min(get_screen_size()) >= 600 else 10 # breakpoint for iPad/iPhone
 MIN, MAX = 3, 8
 BOARD_SIZE = MIN
-IMG_DIR = 'img'
+PHOTO_SOURCE = PicsumSource()   # new photos, any source with fetch(size) -> bytes
+CACHE_DIR = 'photo_cache'       # downloaded photos, the least recently used are deleted beyond CACHE_BYTES
+CACHE_BYTES = 20_000_000
+OFFLINE_DIR = 'photos'          # your own photos, shown when no new photo is ready (offline)
+PLACEHOLDER = 'iob:images_256'  # built-in image for the first start offline, before any photo is cached
+AUTO_SOLVE_DELAY = 0.15         # seconds per move when the puzzle solves itself
+SLICED_SIZES = 3                # board sizes whose tile textures of the current photo are kept
 
 class Puzzle(Scene):
     def setup(self):
@@ -22,9 +28,35 @@ class Puzzle(Scene):
         self.initialized = False
         self.solved = False
         self.muted = False
+        self.solution = deque()     # planned moves: cells of the tiles to shift
+        self.planning = False
+        self.want_hint = False
+        self.auto_solve = False
+        self.next_auto_move = 0
+
+        # Board: tile numbers by cell, 0 is the empty cell. The tile nodes only show it.
+        self.tiles = list(range(BOARD_SIZE ** 2))
+        self.blank = 0
+        self.in_place = len(self.tiles)     # cells holding their own tile, all of them when solved
+        self.nodes = []             # tile nodes by tile number, pooled across new puzzles
+        self.spare_nodes = []       # pooled tile nodes outside the scene (after a smaller board)
+        self.paths = {}             # tile outline by tile width
+
+        # Photo: decoded once, tile textures per board size, the least recently used size is dropped
+        self.texture = None
+        self.photo_size = (0, 0)
+        self.slices = OrderedDict()
 
         # Dimensions
         self.set_dimensions()
+
+        # the next photo is fetched in the background while playing
+        self.photos = ImagePrefetcher(
+            PHOTO_SOURCE,
+            ImageCache(CACHE_DIR, CACHE_BYTES),
+            self.puzzle_w,
+            fallback=DirectorySource(OFFLINE_DIR) if os.path.isdir(OFFLINE_DIR) else None,
+            )
         
         # Elements
         self.root_node = Node(parent=self)
@@ -73,6 +105,21 @@ class Puzzle(Scene):
             parent=self.root_node,
             )
 
+        # hint and auto solve buttons
+        self.hint_btn = SpriteNode(
+            'iob:ios7_lightbulb_outline_32',
+            position=(self.w - 90, self.h - 40),
+            alpha=.2,
+            parent=self.root_node,
+            )
+
+        self.solve_btn = SpriteNode(
+            'iob:ios7_fastforward_outline_32',
+            position=(self.w - 40, self.h - 40),
+            alpha=.2,
+            parent=self.root_node,
+            )
+
         self.new_puzzle()
 
     def set_dimensions(self):
@@ -82,85 +129,133 @@ class Puzzle(Scene):
         self.start_x = - BOARD_SIZE/2 * self.tile_w + self.tile_w/2
         self.start_y = BOARD_SIZE/2 * self.tile_w - self.tile_w/2
         
-    def get_image(self):
-        """Download photo from https://picsum.photos, slice it to tile size.
+    def get_image(self, new_photo=True):
+        """Show the photo on the tiles. With new_photo take the next one (prefetched from
+        https://picsum.photos), else keep the current one and only slice it to the new tile size. Without
+        any new photo the current one stays, before the first photo the tiles show PLACEHOLDER.
+        The photo is decoded once into one texture, each tile shows its part of it (no tile files).
+        The tile nodes are reused, only their outline and texture change.
         """
-        r = requests.get(f'https://picsum.photos/{self.puzzle_w}/{self.puzzle_w}?greyscale')
-        if r.status_code == 200:
-            img = Image.open(BytesIO(r.content))
-            img.load()
-            
-            for row in range(BOARD_SIZE):
-                for col in range(BOARD_SIZE):
-                    nr = row * BOARD_SIZE + col
-                    
-                    x0 = col * self.tile_w
-                    x1 = x0 + self.tile_w
-                    y0 = row * self.tile_w
-                    y1 = y0 + self.tile_w
-
-                    texture = img.crop((x0, y0, x1, y1))
-
-                    # random names to avoid img drawn from memory after refresh -> always new image
-                    texture_filename = f'{random.randint(1,1_000_000):0>7}.png'
-                    if not os.path.exists('img'):
-                      os.mkdir('img')
-                    texture_filename = os.path.join('img', texture_filename)
-                    texture.save(texture_filename)
-                    
-                    rect = ui.Path.rounded_rect(0, 0, self.tile_w, self.tile_w, BORDER_W/2)
-                    tile = ShapeNode(
-                        path=rect,
-                        fill_color=None,
-                        stroke_color='white',
-                        parent=self.puzzle,
-                        alpha=nr > 0, # tile 0 is empty with alpha = 0
-                        position=(self.tile_w/2, self.tile_w/2),
-                        )
-                        
-                    img_slice = SpriteNode(
-                        texture_filename,  
-                        parent=tile,
-                        blend_mode=ui.BLEND_MULTIPLY, # crops rounded corners of image
-                        )
-                    tile.cell = nr
+        if new_photo or self.texture is None:
+            data = self.photos.next_image()
+            image = ui.Image.from_data(data) if data else None
+            if image is None and self.texture is None:
+                image = ui.Image.named(PLACEHOLDER)     # no photo at all yet, play on the placeholder
+            if image is not None:
+                self.texture, self.photo_size = Texture(image), image.size
+                self.slices.clear()
+
+        if self.tile_w not in self.paths:
+            self.paths[self.tile_w] = ui.Path.rounded_rect(0, 0, self.tile_w, self.tile_w, BORDER_W/2)
+        path = self.paths[self.tile_w]
+
+        self.pool_tiles(BOARD_SIZE ** 2)
+        for nr, (tile, texture) in enumerate(zip(self.nodes, self.tile_textures(BOARD_SIZE))):
+            tile.remove_all_actions()   # a hint may still be running
+            tile.scale = 1
+            tile.path = path
+            tile.alpha = nr > 0 # tile 0 is empty with alpha = 0
+            tile.img_slice.texture = texture
+            tile.img_slice.size = (self.tile_w, self.tile_w)
+            tile.cell = nr
+
+    def pool_tiles(self, count):
+        """Grow or shrink self.nodes to count tile nodes, creating nodes only if there are no spare ones.
+        """
+        while len(self.nodes) > count:
+            tile = self.nodes.pop()
+            tile.remove_from_parent()
+            self.spare_nodes.append(tile)
+
+        while len(self.nodes) < count:
+            if self.spare_nodes:
+                tile = self.spare_nodes.pop()
+                self.puzzle.add_child(tile)
+            else:
+                tile = ShapeNode(
+                    path=ui.Path.rounded_rect(0, 0, self.tile_w, self.tile_w, BORDER_W/2),
+                    fill_color=None,
+                    stroke_color='white',
+                    parent=self.puzzle,
+                    position=(self.tile_w/2, self.tile_w/2),
+                    )
+                tile.img_slice = SpriteNode(
+                    size=(self.tile_w, self.tile_w),
+                    parent=tile,
+                    blend_mode=ui.BLEND_MULTIPLY, # crops rounded corners of image
+                    )
+            self.nodes.append(tile)
+
+    def tile_textures(self, size):
+        """Textures of the tiles of a size x size board, by tile number. Kept for SLICED_SIZES sizes.
+        """
+        if size in self.slices:
+            self.slices.move_to_end(size)
+            return self.slices[size]
+
+        # use the centered square of the photo, sizes in texture coordinates (0 - 1)
+        w, h = self.photo_size
+        side = min(w, h)
+        tile_share = (self.puzzle_w // size) / self.puzzle_w
+        u, v = tile_share * side / w, tile_share * side / h
+        left, top = (1 - side / w) / 2, (1 + side / h) / 2
+
+        # texture coordinates start bottom left, rows top left
+        textures = [self.texture.subtexture(Rect(left + col * u, top - (row + 1) * v, u, v))
+                    for row in range(size) for col in range(size)]
+
+        self.slices[size] = textures
+        if len(self.slices) > SLICED_SIZES:
+            self.slices.popitem(last=False)
+        return textures
         
     def shuffle_puzzle(self):
-        """ Perform moves to shuffle the board.
-            Why not random? The smaller the board the higher the risk of unsolveability.
+        """Pick a random board, each solvable one is equally likely.
+        Half of all permutations can't be solved, swapping tiles 1 and 2 turns those into solvable ones.
         """
-        neighbours = [ +1, -1, + BOARD_SIZE, - BOARD_SIZE]
-        for _ in range(BOARD_SIZE ** 2 * 2):
-            neighbour = random.choice(
-                [tile for tile in self.puzzle.children if any(
-                    tile.cell + n == self.zero.cell for n in neighbours)])
-            self.zero.cell, neighbour.cell = neighbour.cell, self.zero.cell
+        solved = list(range(BOARD_SIZE ** 2))
+        tiles = solved[:]
+        while tiles == solved:
+            random.shuffle(tiles)
+            if not is_solvable(tiles, BOARD_SIZE):
+                a, b = tiles.index(1), tiles.index(2)
+                tiles[a], tiles[b] = tiles[b], tiles[a]
+
+        self.tiles = tiles
+        self.blank = tiles.index(0)
+        self.in_place = sum(cell == nr for cell, nr in enumerate(tiles))
+        for cell, nr in enumerate(tiles):
+            self.nodes[nr].cell = cell
             
+    def place_tile(self, cell):
+        """Place the tile of cell on board. Starting point is top left."""
+        r, c = divmod(cell, BOARD_SIZE)
+        x = self.start_x + c * self.tile_w
+        y = self.start_y - r * self.tile_w
+        self.nodes[self.tiles[cell]].position = (x, y)
+
     def place_tiles(self):
-        """Place tiles on board.
-        Starting point is top left.
-        """
-        for tile in self.puzzle.children:
-            r, c = divmod(tile.cell, BOARD_SIZE)
-            x = self.start_x + c * self.tile_w
-            y = self.start_y - r * self.tile_w
-            tile.position = (x, y)
+        for cell in range(BOARD_SIZE ** 2):
+            self.place_tile(cell)
         
-    def touched_tile(self, touch):
-        """Match touch location to tiles and return tile (node).
+    def touched_cell(self, touch):
+        """Return the cell under the touch location, None outside the board.
         """
-        for nr, tile in enumerate(self.puzzle.children):
-            xy = self.puzzle.point_from_scene(touch.location)
-            if tile.frame.contains_point(xy):
-                return tile
+        x, y = self.puzzle.point_from_scene(touch.location)
+        c = int((x - self.start_x + self.tile_w / 2) // self.tile_w)
+        r = int((self.start_y + self.tile_w / 2 - y) // self.tile_w)
+        if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
+            return r * BOARD_SIZE + c
             
     def touch_ended(self, touch):
         """Perform actions connected to touched nodes.
         mute_btn :          Sound on/off
         new_puzzle_btn :    (re)start game
-        touched_tile:       Shift tile to empty cell
+        touched_cell:       Shift tile to empty cell
         less_tiles_btn :    decrease amount of tiles
         more_tiles_btn:     increase amount of tiles
+        hint_btn :          show the next tile to shift
+        solve_btn :         let the puzzle solve itself (on/off)
         """
         global BOARD_SIZE
 
@@ -169,14 +264,14 @@ class Puzzle(Scene):
           BOARD_SIZE += 1
           if not self.muted:
             sound.play_effect('8ve:8ve-tap-hollow')
-          self.new_puzzle()
+          self.new_puzzle(new_photo=False)
 
         # less tiles
         if BOARD_SIZE > MIN and self.less_tiles_btn.frame.contains_point(touch.location):
           BOARD_SIZE -= 1
           if not self.muted:
             sound.play_effect('8ve:8ve-tap-hollow')
-          self.new_puzzle()
+          self.new_puzzle(new_photo=False)
 
         # mute toggle
         if self.mute_btn.frame.contains_point(touch.location):
@@ -188,53 +283,120 @@ class Puzzle(Scene):
         if self.new_puzzle_btn.frame.contains_point(touch.location):
             self.new_puzzle()
             return
-            
+
+        # hint
+        if self.hint_btn.frame.contains_point(touch.location) and not self.solved:
+            self.want_hint = True
+            self.plan_solution()
+            return
+
+        # auto solve
+        if self.solve_btn.frame.contains_point(touch.location) and not self.solved:
+            self.auto_solve = not self.auto_solve
+            self.solve_btn.alpha = [.2, .6][self.auto_solve]
+            self.plan_solution()
+            return
+
         # shift tile to empty cell
-        tile = self.touched_tile(touch)
-        if tile and self.is_neighbour(tile) and not self.solved:
-            self.zero.cell, tile.cell = tile.cell, self.zero.cell
+        cell = self.touched_cell(touch)
+        if cell is not None and self.is_neighbour(cell) and not self.solved:
+            self.shift(cell)
             
             if not self.muted: sound.play_effect('8ve:8ve-tap-hollow')
             return
+
+    def shift(self, cell):
+        """Shift the tile in cell to the empty cell. Keep the planned solution if the move follows it."""
+        if self.solution and self.solution[0] == cell:
+            self.solution.popleft()
+        else:
+            self.solution.clear()
+
+        nr, blank = self.tiles[cell], self.blank
+        self.in_place -= (nr == cell) + (blank == 0)
+        self.tiles[blank], self.tiles[cell] = nr, 0
+        self.in_place += (nr == blank) + (cell == 0)
+        self.blank = cell
+        self.nodes[nr].cell, self.zero.cell = blank, cell
+
+        # only the two swapped nodes move
+        self.place_tile(blank)
+        self.place_tile(cell)
+        self.zero.alpha = self.solved = self.puzzle_solved()
+
+    def board(self):
+        """Tile numbers by cell, 0 is the empty cell."""
+        return self.tiles[:]
+
+    def tile_at(self, cell):
+        return self.nodes[self.tiles[cell]]
+
+    def plan_solution(self):
+        """Solve the board in the background (big boards take a moment), moves go to self.solution."""
+        if self.solution or self.planning:
+            return
+        self.planning = True
+        board, solver = self.board(), self.solver
+
+        def plan():
+            try:
+                moves = solver.solve(board)
+            except ValueError:
+                # an unsolvable board (only a bug can make one) must not keep auto solve retrying
+                self.auto_solve = False
+                self.solve_btn.alpha = .2
+            else:
+                if solver is self.solver and board == self.board():     # nobody moved meanwhile
+                    self.solution = deque(moves)
+            finally:
+                self.planning = False
+
+        threading.Thread(target=plan, daemon=True).start()
             
-    def is_neighbour(self, tile):
-        """return True if tile is direct neighbour of empty cell
+    def is_neighbour(self, cell):
+        """return True if cell is direct neighbour of empty cell (not across the edge to the next row)
         """
-        return any([
-            tile.cell == self.zero.cell + 1, 
-            tile.cell == self.zero.cell - 1, 
-            tile.cell == self.zero.cell + BOARD_SIZE,
-            tile.cell == self.zero.cell - BOARD_SIZE
-            ])
+        r, c = divmod(cell, BOARD_SIZE)
+        blank_r, blank_c = divmod(self.blank, BOARD_SIZE)
+        return abs(r - blank_r) + abs(c - blank_c) == 1
         
     def update(self):
-        """update Scene if game is initialized.
-        Stop game when puzzle is solved.
+        """update Scene if game is initialized: hints and auto solve moves.
+        Tiles are placed by the moves themselves, nothing to do while nothing moves.
         """
         if not self.initialized:
             return
-        
-        self.place_tiles()
-        self.zero.alpha = self.solved = self.puzzle_solved()
+
+        if self.want_hint and self.solution:
+            self.want_hint = False
+            tile = self.tile_at(self.solution[0])
+            tile.run_action(Action.sequence(Action.scale_to(1.15, .15), Action.scale_to(1, .15)))
+
+        if self.auto_solve:
+            if self.solved:
+                self.auto_solve = False
+                self.solve_btn.alpha = .2
+            elif not self.solution:
+                self.plan_solution()
+            elif self.t >= self.next_auto_move:
+                self.next_auto_move = self.t + AUTO_SOLVE_DELAY
+                self.shift(self.solution[0])
     
     def puzzle_solved(self):
         """Return True if all tiles are in their original cell"""
-        return all(i == tile.cell for i, tile in enumerate(self.puzzle.children))
+        return self.in_place == len(self.tiles)
             
-    def new_puzzle(self):
-        """Set up for new game. Delete old stuff. Reset all status, create, shuffle and place new tiles
+    def new_puzzle(self, new_photo=True):
+        """Set up for new game. Reset all status, show the photo on the (pooled) tiles, shuffle and
+        place them. Resizing the board (new_photo=False) keeps the photo.
         """
-        for tile in self.puzzle.children:
-            tile.remove_from_parent()
-
-        # delete old texture files
-        textures = glob.glob(os.path.join('img', '*[0-9].png'))
-        for texture in textures:
-            os.remove(texture)
-            
         self.set_dimensions()
-        self.get_image()
-        self.zero = self.puzzle.children[0]
+        self.solver = Solver(BOARD_SIZE)
+        self.solution.clear()
+        self.want_hint = self.auto_solve = False
+        self.solve_btn.alpha = .2
+        self.get_image(new_photo)
+        self.zero = self.nodes[0]
         self.shuffle_puzzle()
         self.place_tiles()
 
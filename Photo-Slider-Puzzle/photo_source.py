@@ -0,0 +1,219 @@
+""" Photos for the slider puzzle
+
+ImagePrefetcher keeps the next photo ready while the current puzzle is played: a background thread
+fetches it from a source into an on-disk cache, so a refresh takes a photo that is already there.
+
+    source      where new photos come from, anything with fetch(size) -> bytes:
+                PicsumSource (https://picsum.photos or any server with the same URLs, e.g. a local
+                stub) or DirectorySource (image files in a folder)
+    cache       ImageCache, photo files named by content hash, least recently used ones are
+                deleted when the cache grows beyond max_bytes
+    fallback    photos for offline use: when no fresh photo is ready the prefetcher takes one from
+                the fallback source (e.g. a local photo folder) or from the cache
+
+Try it against a local stub server:  python photo_source.py --stub
+"""
+
+import argparse
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+import requests
+
+
+PICSUM_URL = 'https://picsum.photos/{size}/{size}?greyscale'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+
+
+class PicsumSource:
+    def __init__(self, url=PICSUM_URL, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self, size) -> bytes:
+        r = requests.get(self.url.format(size=size), timeout=self.timeout)
+        r.raise_for_status()
+        return r.content
+
+
+class DirectorySource:
+    """Random image files of a folder."""
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, size) -> bytes:
+        try:
+            names = [name for name in os.listdir(self.path) if name.lower().endswith(IMAGE_EXTENSIONS)]
+        except FileNotFoundError:
+            names = []
+        if not names:
+            raise OSError(f'no images in {self.path}')
+        with open(os.path.join(self.path, random.choice(names)), 'rb') as f:
+            return f.read()
+
+
+class ImageCache:
+    """Photo files in a folder, at most max_bytes. The modification time marks the last use."""
+    def __init__(self, path, max_bytes=20_000_000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.sizes = {name: os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)}
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def total_bytes(self):
+        return sum(self.sizes.values())
+
+    def put(self, data) -> str:
+        """Store data, return its key."""
+        key = hashlib.sha1(data).hexdigest()
+        with self.lock:
+            if key not in self.sizes:
+                with open(os.path.join(self.path, key), 'wb') as f:
+                    f.write(data)
+                self.sizes[key] = len(data)
+            else:
+                os.utime(os.path.join(self.path, key))
+            self._evict(keep=key)
+        return key
+
+    def get(self, key) -> bytes:
+        """Return the photo stored under key and mark it as used. Raise KeyError if it was evicted."""
+        with self.lock:
+            if key not in self.sizes:
+                raise KeyError(key)
+            file_name = os.path.join(self.path, key)
+            os.utime(file_name)
+            with open(file_name, 'rb') as f:
+                return f.read()
+
+    def random_key(self, exclude=None):
+        with self.lock:     # the prefetch thread adds and evicts meanwhile
+            keys = [key for key in self.sizes if key != exclude]
+        return random.choice(keys) if keys else None
+
+    def _evict(self, keep):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self.sizes, key=lambda key: os.path.getmtime(os.path.join(self.path, key)))
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                os.remove(os.path.join(self.path, key))
+                total -= self.sizes.pop(key)
+
+
+class ImagePrefetcher:
+    """Fetch photos of one size in a background thread, ready photos wait in a small queue."""
+    def __init__(self, source, cache, size, fallback=None, ready=1, retry_after=5.0):
+        self.source, self.cache, self.size, self.fallback = source, cache, size, fallback
+        self.retry_after = retry_after
+        self.ready = queue.Queue(ready)         # keys of fetched, unseen photos
+        self.wanted = threading.Event()
+        self.current = None
+        self.fetch_times = []
+        self.wanted.set()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.wanted.wait()
+            self.wanted.clear()
+            while not self.ready.full():
+                start = time.perf_counter()
+                try:
+                    key = self.cache.put(self.source.fetch(self.size))
+                except (OSError, requests.RequestException):
+                    time.sleep(self.retry_after)    # offline, try again later
+                    continue
+                self.fetch_times.append(time.perf_counter() - start)
+                self.ready.put(key)
+
+    def next_image(self, timeout=10.0) -> bytes:
+        """Return a new photo: a prefetched one if ready, else one of the fallback source or the cache.
+        Only if there is none at all, wait up to timeout seconds for the fetch. Return None on timeout.
+        """
+        self.wanted.set()
+        try:
+            return self._take(self.ready.get_nowait())
+        except (queue.Empty, KeyError):
+            pass
+
+        if self.fallback:
+            try:
+                data = self.fallback.fetch(self.size)
+                self.current = None     # not a cached photo, any cached one may come next
+                return data
+            except OSError:
+                pass
+
+        key = self.cache.random_key(exclude=self.current)
+        if key:
+            return self._take(key)
+
+        try:
+            return self._take(self.ready.get(timeout=timeout))
+        except (queue.Empty, KeyError):
+            return None
+
+    def _take(self, key):
+        self.wanted.set()       # the queue has room for the next one
+        data = self.cache.get(key)
+        self.current = key
+        return data
+
+
+def serve_stub(delay=0.5, image_bytes=50_000):
+    """Start a local picsum stand-in on a free port that answers with random bytes after delay
+    seconds. Return the server, use PicsumSource(f'http://127.0.0.1:{server.server_port}/{{size}}').
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = os.urandom(image_bytes)
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure how fast refreshed photos are ready.')
+    parser.add_argument('--stub', action='store_true', help='use a local stub server instead of picsum')
+    parser.add_argument('--cache', default='photo_cache')
+    parser.add_argument('--refreshes', type=int, default=5)
+    parser.add_argument('--play', type=float, default=1.0, help='seconds between refreshes')
+    args = parser.parse_args()
+
+    source = PicsumSource()
+    if args.stub:
+        server = serve_stub()
+        source = PicsumSource(f'http://127.0.0.1:{server.server_port}/{{size}}')
+
+    prefetcher = ImagePrefetcher(source, ImageCache(args.cache, max_bytes=200_000), 600)
+    for _ in range(args.refreshes):
+        start = time.perf_counter()
+        data = prefetcher.next_image(timeout=30)
+        print(f'refresh: {len(data or b"")} bytes after {(time.perf_counter() - start) * 1e3:.1f} ms')
+        time.sleep(args.play)
+    times = prefetcher.fetch_times
+    print(f'{len(times)} fetches, {sum(times) / len(times) * 1e3:.0f} ms each, '
+          f'cache {len(prefetcher.cache)} photos / {prefetcher.cache.total_bytes()} bytes')
@@ -0,0 +1,390 @@
+""" Solver for the slider puzzle
+
+Boards are flat lists: board[cell] = tile, tile 0 is the empty cell and every tile belongs to the cell
+with its number (the empty cell top left). A solution is the list of cells the empty cell moves to,
+i.e. the tiles to tap in order.
+
+    3x3             IDA* with Manhattan distance plus linear conflicts, optimal and instant
+    4x4 (5x5)       IDA* with additive disjoint pattern databases, optimal. The databases are
+                    built by a breadth-first search over the positions of a few tiles and the empty
+                    cell and stored as byte arrays (one distance per placement of the tiles), which
+                    are memory-mapped. Build them once:  python slider_solver.py --build 4
+                    Most 4x4 boards take a few seconds, the hardest ones up to a minute.
+    bigger boards   (or when IDA* runs out of nodes) solved row by row and column by column from the
+                    bottom right until 3x3 are left: every tile is moved home with an A* search over
+                    the positions of that tile and the empty cell, the last two tiles of a line
+                    together. Not optimal, but fast up to 8x8.
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import time
+import numpy as np
+
+
+MAGIC = b'SPDB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBB')        # magic, version, board size, number of groups
+GROUP_SIZES = {4: 5, 5: 4}              # tiles per pattern database group
+MAX_NODES = 300_000                     # IDA* gives up after this many nodes (Manhattan + conflicts)
+DATABASE_MAX_NODES = 100_000_000        # with pattern databases: hard 4x4 boards need tens of millions
+
+
+def database_path(n):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f'slider_pdb_{n}.bin')
+
+
+def is_solvable(board, n) -> bool:
+    """Every move swaps two cells and moves the empty cell by one, so the parity of the permutation
+    always equals the parity of the empty cell's distance from home (top left).
+    """
+    seen = [False] * len(board)
+    swaps = 0
+    for cell in range(len(board)):
+        length = 0
+        while not seen[cell]:
+            seen[cell] = True
+            cell = board[cell]
+            length += 1
+        swaps += max(length - 1, 0)
+    row, col = divmod(board.index(0), n)
+    return swaps % 2 == (row + col) % 2
+
+
+def neighbours(n):
+    """Cells next to every cell."""
+    result = []
+    for cell in range(n * n):
+        row, col = divmod(cell, n)
+        result.append([c for c, ok in ((cell - n, row > 0), (cell + n, row < n - 1),
+                                       (cell - 1, col > 0), (cell + 1, col < n - 1)) if ok])
+    return result
+
+
+def apply_moves(board, moves):
+    """Move the empty cell along moves (in place) and return board."""
+    blank = board.index(0)
+    for cell in moves:
+        board[blank], board[cell] = board[cell], 0
+        blank = cell
+    return board
+
+
+# heuristics: value(board) for the start, update(board, tile, source, target) for every move
+
+class ManhattanConflicts:
+    """Manhattan distance plus 2 for every pair of tiles in their home row or column in the wrong order."""
+    def __init__(self, n):
+        self.n = n
+
+    def distance(self, tile, cell):
+        n = self.n
+        return abs(tile // n - cell // n) + abs(tile % n - cell % n)
+
+    def line_conflicts(self, board, cells, home_of_line):
+        """2 * the tiles that have to leave the line so the rest is in order (longest increasing run)."""
+        tiles = [board[cell] for cell in cells if board[cell] and home_of_line(board[cell])]
+        if len(tiles) < 2:
+            return 0
+        longest = [1] * len(tiles)
+        for i in range(len(tiles)):
+            for j in range(i):
+                if tiles[j] < tiles[i] and longest[j] + 1 > longest[i]:
+                    longest[i] = longest[j] + 1
+        return 2 * (len(tiles) - max(longest))
+
+    def row_conflicts(self, board, row):
+        n = self.n
+        return self.line_conflicts(board, range(row * n, row * n + n), lambda tile: tile // n == row)
+
+    def col_conflicts(self, board, col):
+        n = self.n
+        return self.line_conflicts(board, range(col, n * n, n), lambda tile: tile % n == col)
+
+    def value(self, board):
+        self.rows = [self.row_conflicts(board, i) for i in range(self.n)]
+        self.cols = [self.col_conflicts(board, i) for i in range(self.n)]
+        self.manhattan = sum(self.distance(tile, cell) for cell, tile in enumerate(board) if tile)
+        return self.manhattan + sum(self.rows) + sum(self.cols)
+
+    def update(self, board, tile, source, target):
+        """board already has tile on target."""
+        n = self.n
+        self.manhattan += self.distance(tile, target) - self.distance(tile, source)
+        # a tile moving sideways changes columns, the order in its row stays the same
+        if source // n == target // n:
+            for col in (source % n, target % n):
+                self.cols[col] = self.col_conflicts(board, col)
+        else:
+            for row in (source // n, target // n):
+                self.rows[row] = self.row_conflicts(board, row)
+        return self.manhattan + sum(self.rows) + sum(self.cols)
+
+
+class PatternDatabases:
+    """Additive disjoint pattern databases: the moves of each group of tiles are counted separately
+    and the sum of the groups' minimum moves never overestimates.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a pattern database (version {VERSION})')
+
+        cells = self.n * self.n
+        offset = HEADER.size
+        self.groups, self.tables = [], []
+        for _ in range(count):
+            size = self.map[offset]
+            group = tuple(self.map[offset + 1:offset + 1 + size])
+            offset += 1 + size
+            self.groups.append(group)
+            self.tables.append(np.frombuffer(self.map, dtype=np.uint8, count=cells ** size, offset=offset))
+            offset += cells ** size
+
+        # every tile adds weight * cell to the index of its group
+        self.group_of = {}
+        self.weight = {}
+        for g, group in enumerate(self.groups):
+            for i, tile in enumerate(group):
+                self.group_of[tile] = g
+                self.weight[tile] = cells ** (len(group) - 1 - i)
+
+    def value(self, board):
+        self.indexes = [0] * len(self.groups)
+        for cell, tile in enumerate(board):
+            if tile:
+                self.indexes[self.group_of[tile]] += self.weight[tile] * cell
+        self.values = [int(table[i]) for table, i in zip(self.tables, self.indexes)]
+        return sum(self.values)
+
+    def update(self, board, tile, source, target):
+        g = self.group_of[tile]
+        self.indexes[g] += self.weight[tile] * (target - source)
+        self.values[g] = int(self.tables[g][self.indexes[g]])
+        return sum(self.values)
+
+
+def build_pattern_database(n, group):
+    """Breadth-first search from the solved board over the cells of the group's tiles and the empty
+    cell. Only moves of group tiles count. Return the fewest moves for every placement of the tiles
+    (index: cells of the tiles in mixed radix n*n, invalid placements stay 255).
+    """
+    cells = n * n
+    k = len(group)
+    powers = cells ** np.arange(k, -1, -1, dtype=np.int64)     # tiles ..., empty cell last
+    distance = np.full(cells ** (k + 1), 255, dtype=np.uint8)
+    next_cell = np.full((4, cells), -1, dtype=np.int64)
+    for cell, cells_next in enumerate(neighbours(n)):
+        next_cell[:len(cells_next), cell] = cells_next
+
+    start = int(np.dot(list(group) + [0], powers))
+    distance[start] = 0
+    frontier = np.array([start], dtype=np.int64)
+    depth = 0
+    while frontier.size:
+        # free moves: the empty cell swaps with tiles of other groups
+        level, new = [frontier], frontier
+        while new.size:
+            positions = new[:, np.newaxis] // powers % cells
+            reached = []
+            for d in range(4):
+                target = next_cell[d, positions[:, k]]
+                free = (target >= 0) & ~(positions[:, :k] == target[:, np.newaxis]).any(axis=1)
+                reached.append(new[free] + (target[free] - positions[free, k]) * powers[k])
+            new = np.unique(np.concatenate(reached))
+            new = new[distance[new] == 255]
+            distance[new] = depth
+            level.append(new)
+        level = np.concatenate(level)
+
+        # moves of group tiles into the empty cell cost one
+        positions = level[:, np.newaxis] // powers % cells
+        reached = []
+        for d in range(4):
+            target = next_cell[d, positions[:, k]]
+            hits = (positions[:, :k] == target[:, np.newaxis]) & (target[:, np.newaxis] >= 0)
+            rows, tiles = np.nonzero(hits)
+            blank, moved_to = positions[rows, k], target[rows]
+            reached.append(level[rows] + (moved_to - blank) * powers[k] + (blank - moved_to) * powers[tiles])
+        frontier = np.unique(np.concatenate(reached))
+        frontier = frontier[distance[frontier] == 255]
+        depth += 1
+        distance[frontier] = depth
+
+    return distance.reshape(-1, cells).min(axis=1)
+
+
+def write_pattern_databases(n, path=None, group_size=None):
+    group_size = group_size or GROUP_SIZES.get(n, 3)
+    tiles = list(range(1, n * n))
+    groups = [tiles[i:i + group_size] for i in range(0, len(tiles), group_size)]
+    path = path or database_path(n)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, len(groups)))
+        for group in groups:
+            start = time.perf_counter()
+            table = build_pattern_database(n, group)
+            f.write(bytes([len(group)] + group))
+            f.write(table.tobytes())
+            print(f'group {group}: {table.nbytes} bytes, max {table[table < 255].max()} moves, '
+                  f'{time.perf_counter() - start:.1f}s')
+    return path
+
+
+class OutOfNodes(Exception):
+    pass
+
+
+def ida_star(board, n, heuristic, max_nodes=MAX_NODES):
+    """Optimal solution with iterative deepening A*. Raise OutOfNodes when max_nodes are used up."""
+    board = list(board)
+    near = neighbours(n)
+    path = []
+    nodes = 0
+
+    def search(blank, g, h, bound, previous):
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            raise OutOfNodes
+        f = g + h
+        if f > bound:
+            return f
+        if h == 0:
+            return True
+        minimum = None
+        for cell in near[blank]:
+            if cell == previous:
+                continue
+            tile = board[cell]
+            board[blank], board[cell] = tile, 0
+            child_h = heuristic.update(board, tile, cell, blank)
+            path.append(cell)
+            result = search(cell, g + 1, child_h, bound, blank)
+            if result is True:
+                return True
+            path.pop()
+            board[blank], board[cell] = 0, tile
+            heuristic.update(board, tile, blank, cell)
+            if minimum is None or result < minimum:
+                minimum = result
+        return minimum
+
+    bound = heuristic.value(board)
+    while True:
+        result = search(board.index(0), 0, bound, bound, None)
+        if result is True:
+            return path
+        bound = result
+
+
+def place_tiles(board, n, locked, targets):
+    """Move the tiles of targets {tile: cell} home without touching locked cells (A* over the cells of
+    these tiles and the empty cell). Apply the moves to board and return them.
+    """
+    near = neighbours(n)
+    tiles = list(targets)
+    goal = tuple(targets[tile] for tile in tiles)
+
+    def estimate(state):
+        return sum(abs(a // n - b // n) + abs(a % n - b % n) for a, b in zip(state, goal))
+
+    start = tuple(board.index(tile) for tile in tiles) + (board.index(0),)
+    parents = {start: None}
+    queue = [(estimate(start[:-1]), 0, start)]
+    while queue:
+        _, g, state = heapq.heappop(queue)
+        if state[:-1] == goal:
+            break
+        blank = state[-1]
+        for cell in near[blank]:
+            if cell in locked:
+                continue
+            child = tuple(blank if position == cell else position for position in state[:-1]) + (cell,)
+            if child not in parents:
+                parents[child] = state
+                heapq.heappush(queue, (g + 1 + estimate(child[:-1]), g + 1, child))
+
+    moves = []
+    while parents[state] is not None:
+        moves.append(state[-1])
+        state = parents[state]
+    moves.reverse()
+    apply_moves(board, moves)
+    return moves
+
+
+def reduce_solve(board, n):
+    """Suboptimal solution: fill the bottom row and the right column until 3x3 are left, then IDA*."""
+    board = list(board)
+    moves = []
+    locked = set()
+    for size in range(n, 3, -1):
+        row, col = size - 1, size - 1
+        for line in ([row * n + c for c in range(size - 1, -1, -1)],         # bottom row, right to left
+                     [r * n + col for r in range(size - 2, -1, -1)]):        # right column, bottom up
+            for cell in line[:-2]:
+                moves += place_tiles(board, n, locked, {cell: cell})
+                locked.add(cell)
+            # the last two of a line only fit in together
+            moves += place_tiles(board, n, locked, {line[-2]: line[-2], line[-1]: line[-1]})
+            locked.update(line[-2:])
+
+    # the top left 3x3 as a board of its own
+    cells = [r * n + c for r in range(3) for c in range(3)]
+    local = [cells.index(board[cell]) if board[cell] else 0 for cell in cells]
+    moves += [cells[cell] for cell in ida_star(local, 3, ManhattanConflicts(3), max_nodes=float('inf'))]
+    return moves
+
+
+class Solver:
+    """Solve boards of size n, optimal where it is affordable."""
+    def __init__(self, n, max_nodes=None, path=None):
+        self.n = n
+        path = path or database_path(n)
+        self.databases = PatternDatabases(path) if n > 3 and os.path.exists(path) else None
+        self.max_nodes = max_nodes or (DATABASE_MAX_NODES if self.databases else MAX_NODES)
+
+    def solve(self, board):
+        """Return the cells the empty cell moves to. Raise ValueError for unsolvable boards."""
+        if not is_solvable(board, self.n):
+            raise ValueError('board is not solvable')
+        # without pattern databases 4x4 still gets Manhattan distance + linear conflicts
+        heuristic = self.databases or (ManhattanConflicts(self.n) if self.n <= 4 else None)
+        if heuristic:
+            try:
+                return ida_star(board, self.n, heuristic, max_nodes=self.max_nodes)
+            except OutOfNodes:
+                pass
+        return reduce_solve(board, self.n)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build pattern databases or solve random boards.')
+    parser.add_argument('--build', type=int, metavar='N', help='build the pattern databases for NxN')
+    parser.add_argument('--solve', type=int, metavar='N', help='solve random NxN boards')
+    parser.add_argument('--boards', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.build:
+        print(f'Wrote {write_pattern_databases(args.build)}')
+    if args.solve:
+        import random
+        n = args.solve
+        solver = Solver(n)
+        for _ in range(args.boards):
+            board = list(range(n * n))
+            random.shuffle(board)
+            if not is_solvable(board, n):
+                # swapping two tiles flips the parity
+                a, b = [cell for cell, tile in enumerate(board) if tile][:2]
+                board[a], board[b] = board[b], board[a]
+            start = time.perf_counter()
+            moves = solver.solve(board)
+            assert apply_moves(list(board), moves) == list(range(n * n))
+            print(f'{n}x{n}: {len(moves)} moves in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,62 @@
+import os
+import time
+from photo_source import DirectorySource, ImageCache, ImagePrefetcher, PicsumSource, serve_stub
+
+
+class OfflineSource:
+    def fetch(self, size):
+        raise OSError('offline')
+
+
+def offline_prefetcher(tmp_path, fallback=None):
+    return ImagePrefetcher(OfflineSource(), ImageCache(tmp_path / 'cache'), 600, fallback, retry_after=0.01)
+
+
+def test_first_start_offline_has_no_photo(tmp_path):
+    photos = offline_prefetcher(tmp_path, DirectorySource(tmp_path / 'missing'))
+    assert photos.next_image(timeout=0.05) is None
+
+
+def test_fallback_photo_is_not_the_current_cached_one(tmp_path):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    (folder / 'own.jpg').write_bytes(b'own photo')
+    photos = offline_prefetcher(tmp_path, DirectorySource(folder))
+    key = photos.cache.put(b'cached photo')
+
+    assert photos.next_image() == b'own photo'
+    assert photos.current is None
+
+    os.remove(folder / 'own.jpg')
+    assert photos.next_image() == b'cached photo'
+    assert photos.current == key
+
+
+
+def test_prefetch_from_a_stub_server(tmp_path):
+    server = serve_stub(delay=0.2, image_bytes=1000)
+    source = PicsumSource(f'http://127.0.0.1:{server.server_port}/{{size}}')
+    photos = ImagePrefetcher(source, ImageCache(tmp_path), 600)
+    deadline = time.perf_counter() + 5
+    while not photos.ready.full() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    server.shutdown()
+    server.server_close()
+
+    start = time.perf_counter()
+    data = photos.next_image(timeout=0)
+    assert time.perf_counter() - start < 0.1
+    assert len(data) == 1000 and photos.cache.get(photos.current) == data
+    assert len(photos.fetch_times) == 1 and photos.fetch_times[0] >= 0.2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ImageCache(tmp_path, max_bytes=25)
+    first = cache.put(b'a' * 10)
+    time.sleep(0.01)
+    second = cache.put(b'b' * 10)
+    time.sleep(0.01)
+    cache.get(first)
+    cache.put(b'c' * 10)
+    assert first in cache.sizes and second not in cache.sizes
+    assert cache.total_bytes() == 20
@@ -0,0 +1,106 @@
+import random
+from collections import deque
+import pytest
+from slider_solver import (ManhattanConflicts, PatternDatabases, Solver, apply_moves, ida_star, is_solvable,
+                           neighbours, reduce_solve, write_pattern_databases)
+
+
+@pytest.fixture(scope='module')
+def distances():
+    """Fewest moves of every 3x3 board, breadth-first from the solved one."""
+    near = neighbours(3)
+    solved = tuple(range(9))
+    distance = {solved: 0}
+    queue = deque([(solved, 0)])
+    while queue:
+        board, blank = queue.popleft()
+        for cell in near[blank]:
+            child = list(board)
+            child[blank], child[cell] = child[cell], 0
+            child = tuple(child)
+            if child not in distance:
+                distance[child] = distance[board] + 1
+                queue.append((child, cell))
+    return distance
+
+
+def random_boards(n, count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = list(range(n * n))
+        rng.shuffle(board)
+        yield board
+
+
+def solvable_boards(n, count, seed=0):
+    for board in random_boards(n, count, seed):
+        if not is_solvable(board, n):
+            # swapping two tiles flips the parity
+            a, b = [cell for cell, tile in enumerate(board) if tile][:2]
+            board[a], board[b] = board[b], board[a]
+        yield board
+
+
+def test_is_solvable_matches_reachability(distances):
+    assert len(distances) == 181440
+    for board in random_boards(3, 500):
+        assert is_solvable(board, 3) == (tuple(board) in distances)
+
+
+def test_3x3_solutions_are_optimal(distances):
+    solver = Solver(3)
+    for board in solvable_boards(3, 100, seed=1):
+        moves = solver.solve(board)
+        assert apply_moves(list(board), moves) == list(range(9))
+        assert len(moves) == distances[tuple(board)]
+
+
+def test_pattern_databases_are_admissible_and_optimal(tmp_path, distances):
+    path = write_pattern_databases(3, tmp_path / 'pdb', group_size=4)
+    databases = PatternDatabases(path)
+    assert databases.groups == [(1, 2, 3, 4), (5, 6, 7, 8)]
+    for board in solvable_boards(3, 100, seed=2):
+        assert databases.value(board) <= distances[tuple(board)]
+    for board in solvable_boards(3, 20, seed=3):
+        moves = ida_star(board, 3, databases)
+        assert apply_moves(list(board), moves) == list(range(9))
+        assert len(moves) == distances[tuple(board)]
+
+
+def test_4x4_solutions_are_optimal(tmp_path):
+    # fewest moves checked by a bidirectional breadth-first search, the second board takes IDA* with
+    # these small databases more than MAX_NODES nodes
+    path = write_pattern_databases(4, tmp_path / 'pdb', group_size=3)
+    solver = Solver(4, path=path)
+    for board, fewest in (([2, 4, 6, 10, 1, 8, 3, 14, 5, 12, 9, 11, 13, 0, 7, 15], 38),
+                          ([5, 14, 13, 2, 9, 8, 3, 10, 1, 15, 0, 6, 12, 4, 11, 7], 42)):
+        moves = solver.solve(board)
+        assert apply_moves(list(board), moves) == list(range(16))
+        assert len(moves) == fewest
+
+
+def test_heuristic_updates_match_a_fresh_value():
+    heuristic, fresh = ManhattanConflicts(4), ManhattanConflicts(4)
+    rng = random.Random(4)
+    board = next(solvable_boards(4, 1, seed=4))
+    heuristic.value(board)
+    blank = board.index(0)
+    for _ in range(300):
+        cell = rng.choice(neighbours(4)[blank])
+        tile = board[cell]
+        board[blank], board[cell] = tile, 0
+        assert heuristic.update(board, tile, cell, blank) == fresh.value(board)
+        blank = cell
+
+
+def test_big_boards_are_solved():
+    for n in (4, 5, 6, 8):
+        for board in solvable_boards(n, 1, seed=n):
+            assert apply_moves(list(board), reduce_solve(board, n)) == list(range(n * n))
+
+
+def test_unsolvable_boards_are_rejected():
+    board = list(range(9))
+    board[1], board[2] = board[2], board[1]
+    with pytest.raises(ValueError):
+        Solver(3).solve(board)
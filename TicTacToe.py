@@ -1,4 +1,15 @@
 import console
+from string import ascii_lowercase
+from mnk_engine import Board, Searcher
+from tic_tac_toe_engine import PerfectPlayer
+
+
+ROWS, COLS = 3, 3   # up to 26 columns, e.g. 15 x 15 for Gomoku
+CONNECT = 3         # marks in a row to win (5 for Gomoku)
+COMPUTER = None     # set to 1 or -1 to let the computer play that player
+THINK_TIME = 1.0    # seconds the computer may think per move (perfect play on 3x3 is instant)
+CELLS = [f'{ascii_lowercase[col]}{row + 1}' for row in range(ROWS) for col in range(COLS)]   # names by cell number
+CELL_NUMBERS = {name: nr for nr, name in enumerate(CELLS)}
 
 
 class TicTacToe():
@@ -6,35 +17,36 @@ class TicTacToe():
         self.player = 1 # Player can be 1 or -1
         self.score = {-1: 0, 1: 0}
         self.symbols = ["⬜️", "❌", "⭕️"]
-        self.board = self.clear_board()
+        self.board = Board(ROWS, COLS, CONNECT)
         self.winner = None
         self.game_on = True
+        self.computer = None
+        if COMPUTER:
+            self.computer = PerfectPlayer() if (ROWS, COLS, CONNECT) == (3, 3, 3) else Searcher(THINK_TIME)
         print(f'TIC TAC TOE\n{self.player} begins.')
         self.start()
 
     def game_over(self):
-        # all winning cell combos
-        wins = [
-            ['a1', 'b1', 'c1'], ['a2', 'b2', 'c2'], ['a3', 'b3', 'c3'], # rows
-            ['a1', 'a2', 'a3'], ['b1', 'b2', 'b3'], ['c1', 'c2', 'c3'], # columns
-            ['a1', 'b2', 'c3'], ['a3', 'b2', 'c1']                      # diagonals
-        ]
-
-        if all(self.board.values()): # No moves/ zeros left
+        # the board keeps track of winning lines with every move
+        if self.board.winner:
+            self.winner = self.board.winner
+            self.score[self.winner] += 1
+            print(f'{self.symbols[self.winner]} wins!')
+            self.print_score()
+            return True
+        if self.board.is_full(): # No moves/ empty cells left
             print(f"Game over. That's a draft.")
             return True
-        else:
-            for (a, b, c) in wins:
-                if self.board[a] == self.board[b] == self.board[c] and self.board[a] != 0:
-                    self.winner = self.board[a]
-                    self.score[self.winner] += 1
-                    print(f'{self.symbols[self.winner]} wins!')
-                    self.print_score()
-                    return True
         return False
 
     def clear_board(self):
-        return dict((cell, 0) for cell in ['a1','b1','c1','a2','b2','c2','a3','b3','c3'])
+        # the line tables of the board are built once, a new game only resets it
+        self.board.reset(self.player)
+        return self.board
+
+    def cell(self, nr):
+        # player at cell number nr (0 = empty)
+        return self.board.cells[nr]
 
     def start(self):
         # Winner start new match or player switch
@@ -55,35 +67,48 @@ class TicTacToe():
         print("Good buy!")
 
     def players_move(self):
+        if self.player == COMPUTER:
+            chosen_cell = self.computer_move()
+            print(f'\n{self.symbols[self.player]} takes {CELLS[chosen_cell]}.')
+            self.play(chosen_cell)
+            return
+
         # keep asking if answer is invalid
         chosen_cell = None
-        while not chosen_cell:
+        while chosen_cell is None:
             cell_code = input(f'\n{self.symbols[self.player]}, chose a cell:_').lower().strip()
-            
-            # reverse if number is first, letter second
-            if len(cell_code) == 2 and cell_code[0].isdigit() and cell_code[1].isalpha():
-                cell_code = cell_code[::-1]
 
-            # check if cell is empty
-            cell = self.board.get(cell_code)
-            if cell:
+            # reverse if number is first, letter second
+            if cell_code[:1].isdigit() and cell_code[-1:].isalpha():
+                cell_code = cell_code[-1] + cell_code[:-1]
+
+            # check if cell exists and is empty
+            nr = CELL_NUMBERS.get(cell_code)
+            if nr is None:
+                print("Sorry, that cell doesn't exist.")
+            elif self.cell(nr):
                 print("Sorry, chose an empty cell.")
             else:
-                chosen_cell = cell_code
+                chosen_cell = nr
+
+        self.play(chosen_cell)
+
+    def computer_move(self):
+        if isinstance(self.computer, PerfectPlayer):
+            return self.computer.best_move(self.board.masks[self.player], self.board.masks[-self.player])
+        return self.computer.best_move(self.board)
 
+    def play(self, nr):
         # set move and switch players
-        self.board[chosen_cell] = self.player
-        self.player *= -1
-        return
+        self.board.play(nr)
+        self.player = self.board.player
 
     def print_board(self):
-        print(
-            f"  a  b  c ",
-            f"1 {self.symbols[self.board['a1']]} {self.symbols[self.board['b1']]} {self.symbols[self.board['c1']]}",
-            f"2 {self.symbols[self.board['a2']]} {self.symbols[self.board['b2']]} {self.symbols[self.board['c2']]}",
-            f"3 {self.symbols[self.board['a3']]} {self.symbols[self.board['b3']]} {self.symbols[self.board['c3']]}",
-            sep='\n'
-        )
+        width = len(str(ROWS))
+        print(' ' * (width + 1) + ''.join(f'{letter}  ' for letter in ascii_lowercase[:COLS]))
+        for row in range(ROWS):
+            symbols = ' '.join(self.symbols[self.cell(row * COLS + col)] for col in range(COLS))
+            print(f'{row + 1:>{width}} {symbols}')
 
     def quit_or_rematch(self):
         options = {'n': self.quit, 'y': self.start}
@@ -0,0 +1,151 @@
+""" Batch simulator for 2048
+
+Holds N boards in one (N, size, size) NumPy array of tile values and advances all of them at once:
+swipes, merges, random tile spawns and game over detection are whole-array operations. There is no
+Python loop over boards or cells, only over the board size while merging. The module doesn't need the
+Pythonista scene module, so it runs headless for Monte Carlo strategy evaluation.
+
+Directions are coded like in bitboard_2048.DIRECTIONS: 0 = left, 1 = right, 2 = up, 3 = down.
+Row 0 is the bottom row of the Game scene, so 'up' moves tiles towards the last row.
+"""
+
+import numpy as np
+
+
+DIRECTIONS = ('left', 'right', 'up', 'down')
+LEFT, RIGHT, UP, DOWN = range(4)
+
+
+def _oriented(boards, direction):
+    """Return a view of boards in which direction becomes a move to the left."""
+    if direction in (UP, DOWN):
+        boards = boards.swapaxes(-1, -2)
+    if direction in (RIGHT, UP):
+        boards = boards[..., ::-1]
+    return boards
+
+
+def collapse(rows):
+    """Slide and merge the last axis of rows towards index 0. Return new rows and merge scores."""
+    rows = _compact(rows)
+    score = np.zeros(rows.shape[:-2], dtype=np.int64)
+
+    for i in range(rows.shape[-1] - 1):
+        merge = (rows[..., i] == rows[..., i + 1]) & (rows[..., i] > 0)
+        rows[..., i][merge] *= 2
+        rows[..., i + 1][merge] = 0
+        score += np.where(merge, rows[..., i], 0).sum(axis=-1)
+
+    return _compact(rows), score
+
+
+def _compact(rows):
+    """Move all non-zero cells to the front, keeping their order."""
+    order = np.argsort(rows == 0, axis=-1, kind='stable')
+    return np.take_along_axis(rows, order, axis=-1)
+
+
+def move(boards, direction):
+    """Swipe all boards in one direction (name or code).
+    Return the new boards, the merge scores and a mask of boards that changed.
+    """
+    if isinstance(direction, str):
+        direction = DIRECTIONS.index(direction)
+
+    new_boards = np.empty_like(boards)
+    collapsed, score = collapse(_oriented(boards, direction))
+    _oriented(new_boards, direction)[...] = collapsed
+    changed = (new_boards != boards).any(axis=(-1, -2))
+    return new_boards, score, changed
+
+
+def move_each(boards, directions):
+    """Swipe every board in its own direction (array of codes)."""
+    new_boards = boards.copy()
+    scores = np.zeros(len(boards), dtype=np.int64)
+    changed = np.zeros(len(boards), dtype=bool)
+
+    for direction in range(4):
+        selected = np.flatnonzero(directions == direction)
+        if selected.size:
+            new_boards[selected], scores[selected], changed[selected] = move(boards[selected], direction)
+
+    return new_boards, scores, changed
+
+
+def add_new_tiles(boards, rng, mask=None):
+    """Put a 2 or a 4 into a random empty cell of every board (in place). Return the flat cell indexes.
+    Boards excluded by mask or without empty cells get -1.
+    """
+    n = len(boards)
+    flat = boards.reshape(n, -1)
+    empty = flat == 0
+    if mask is not None:
+        empty &= mask[:, np.newaxis]
+
+    # the biggest random key among the empty cells is a uniformly chosen empty cell
+    keys = np.where(empty, rng.random(flat.shape), -1.0)
+    cells = keys.argmax(axis=1)
+    spawn = empty.any(axis=1)
+    flat[np.flatnonzero(spawn), cells[spawn]] = rng.choice((2, 4), size=spawn.sum())
+    return np.where(spawn, cells, -1)
+
+
+def can_move(boards):
+    """Return a mask of boards that have at least one valid swipe left."""
+    return ((boards == 0).any(axis=(-1, -2))
+            | (boards[..., 1:] == boards[..., :-1]).any(axis=(-1, -2))
+            | (boards[..., 1:, :] == boards[..., :-1, :]).any(axis=(-1, -2)))
+
+
+def random_strategy(simulator):
+    """Pick a random direction for each board."""
+    return simulator.rng.integers(0, 4, size=simulator.n)
+
+
+class BatchSimulator:
+    """Play n games of 2048 side by side.
+
+    boards :    (n, size, size) tile values
+    scores :    merge points of each game
+    moves :     valid swipes of each game
+    alive :     mask of games that still have a valid swipe
+    """
+    def __init__(self, n, size=4, seed=None):
+        self.n = n
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        self.boards = np.zeros((self.n, self.size, self.size), dtype=np.int64)
+        self.scores = np.zeros(self.n, dtype=np.int64)
+        self.moves = np.zeros(self.n, dtype=np.int64)
+        self.alive = np.ones(self.n, dtype=bool)
+        for _ in range(2):
+            add_new_tiles(self.boards, self.rng)
+
+    def step(self, directions):
+        """Swipe every live board in its direction (code or array of codes).
+        Boards that changed get a new tile. Return the mask of changed boards.
+        """
+        directions = np.broadcast_to(np.asarray(directions), (self.n,))
+        directions = np.where(self.alive, directions, -1)
+
+        self.boards, scores, changed = move_each(self.boards, directions)
+        self.scores += scores
+        self.moves += changed
+        add_new_tiles(self.boards, self.rng, mask=changed)
+        self.alive &= can_move(self.boards)
+        return changed
+
+    def run(self, strategy=random_strategy, max_steps=100_000):
+        """Play until all games are over. strategy(simulator) returns a direction code per board."""
+        for _ in range(max_steps):
+            if not self.alive.any():
+                break
+            self.step(strategy(self))
+        return self.scores
+
+    def max_tiles(self):
+        return self.boards.max(axis=(1, 2))
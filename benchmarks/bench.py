@@ -0,0 +1,592 @@
+"""Benchmarks for the hot paths of all games.
+
+Runs on plain Linux: the Pythonista modules (scene, ui, sound, console, motion) are replaced by the
+stand-ins in benchmarks/stubs. Micro benchmarks time single engine calls, macro benchmarks play whole
+games. Times are compared to benchmarks/baselines.json and the run fails if a benchmark got slower than
+its baseline by more than the threshold.
+
+Baselines are stored in units of a fixed calibration loop (pure Python), timed at the start and at
+the end of the run, so they carry over to faster or slower machines. A benchmark over the threshold
+is measured once more, next to a fresh calibration, before it counts as a regression.
+
+Usage:
+    python benchmarks/bench.py                  run all and compare with baselines
+    python benchmarks/bench.py -k 2048          only benchmarks containing '2048' (-k may repeat)
+    python benchmarks/bench.py -k 2048 --save   store the results of these benchmarks as new baselines
+    python benchmarks/bench.py --threshold 0.2  allow only 20% slowdown before failing
+
+Only re-save the baselines of the benchmarks a change is meant to speed up or slow down, so
+unintended slowdowns elsewhere still show up.
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+PUZZLE_DIR = os.path.join(ROOT, 'Photo-Slider-Puzzle')
+BASELINES = os.path.join(HERE, 'baselines.json')
+sys.path[:0] = [os.path.join(HERE, 'stubs'), ROOT, PUZZLE_DIR]
+
+BENCHMARKS = {}
+
+
+def benchmark(name, kind='micro'):
+    """Register a benchmark. The decorated function does the setup and returns the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = (kind, setup)
+        return setup
+    return register
+
+
+def load(name, path):
+    """Import a game script by path (2048.py isn't a valid module name)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(fn, min_time=0.2, repeat=7):
+    """Return the best time per call in seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / repeat / elapsed) + 1)
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# 2048
+
+def game_2048(engine, size=4):
+    module = load('game_2048', os.path.join(ROOT, '2048.py'))
+    module.ENGINE = engine
+    game = module.Game()
+    game.board_size = size
+    game.setup()
+    return module, game
+
+
+def random_2048_board(seed=0):
+    rng = random.Random(seed)
+    return [[rng.choice([0, 0, 2, 2, 4, 8, 16, 32]) for _ in range(4)] for _ in range(4)]
+
+
+for engine in ('bitboard', 'numpy'):
+    @benchmark(f'2048.swipe.{engine}')
+    def bench_2048_swipe(engine=engine):
+        module, game = game_2048(engine)
+        board = module.np.array(random_2048_board())
+
+        def run():
+            for direction in ('left', 'right', 'up', 'down'):
+                game.board = board
+                game.swipe(direction)
+        return run
+
+    @benchmark(f'2048.no_more_moves.{engine}')
+    def bench_2048_no_more_moves(engine=engine):
+        module, game = game_2048(engine)
+        game.board = module.np.array(random_2048_board())
+        return game.no_more_moves
+
+    @benchmark(f'2048.game.{engine}', kind='macro')
+    def bench_2048_game(engine=engine):
+        module, game = game_2048(engine)
+
+        def run():
+            rng = random.Random(1)
+            random.seed(1)  # seeds the tile spawns
+            game.start_game()
+            while not game.game_over:
+                game.play_move(rng.choice(('left', 'right', 'up', 'down')))
+                game.update()
+        return run
+
+
+@benchmark('2048.collapse')
+def bench_2048_collapse():
+    import numpy as np
+    import batch_2048
+    rows = np.array(random_2048_board())[np.newaxis]
+    return lambda: batch_2048.collapse(rows)
+
+
+@benchmark('2048.bitboard.move')
+def bench_2048_bitboard_move():
+    import bitboard_2048
+    board = bitboard_2048.encode(random_2048_board())
+
+    def run():
+        for direction in bitboard_2048.DIRECTIONS:
+            bitboard_2048.move(board, direction)
+    return run
+
+
+@benchmark('2048.batch.1000_games', kind='macro')
+def bench_2048_batch():
+    import batch_2048
+    return lambda: batch_2048.BatchSimulator(1000, seed=1).run()
+
+
+# Four in a Row
+
+def four_in_a_row():
+    return load('FourInARow', os.path.join(ROOT, 'FourInARow.py'))
+
+
+def random_four_in_a_row_board(module, seed=0, fill=0.6):
+    """Fill BOARD with random coins until fill is reached, without a winner."""
+    rng = random.Random(seed)
+    module.reset_board()
+    player = 1
+    while (module.BOARD != 0).mean() < fill:
+        column = rng.choice([c for c in range(module.COLS) if module.BOARD[0, c] == 0])
+        module.drop_coin(column + 1, player)
+        if module.is_winner(player):
+            return random_four_in_a_row_board(module, seed + 1, fill)
+        player *= -1
+
+
+@benchmark('four_in_a_row.is_winner')
+def bench_four_in_a_row_is_winner():
+    module = four_in_a_row()
+    random_four_in_a_row_board(module)
+    return lambda: module.is_winner(1)
+
+
+@benchmark('four_in_a_row.is_winner.diagonals')
+def bench_four_in_a_row_is_winner_diagonals():
+    """The two diagonals through the last coin, on bitboards (what replaced get_diagonals)."""
+    module = four_in_a_row()
+    random_four_in_a_row_board(module)
+    position = module.POSITION.copy()
+    position.directions = position.directions[2:]     # / and \
+    return lambda: position.is_winner(1)
+
+
+@benchmark('four_in_a_row.game', kind='macro')
+def bench_four_in_a_row_game():
+    module = four_in_a_row()
+
+    def run():
+        rng = random.Random(2)
+        module.reset_board()
+        player = 1
+        while not module.board_filled():
+            column = rng.choice([c for c in range(module.COLS) if module.BOARD[0, c] == 0])
+            module.drop_coin(column + 1, player)
+            if module.is_winner(player):
+                break
+            player *= -1
+    return run
+
+
+@benchmark('four_in_a_row.find_lines.1000x1000', kind='macro')
+def bench_four_in_a_row_find_lines_large():
+    import numpy as np
+    from four_in_a_row_engine import find_lines
+    board = np.random.default_rng(7).choice(np.array([0, 1, -1], dtype=np.int8), size=(1000, 1000))
+    return lambda: find_lines(board, 6)
+
+
+@benchmark('four_in_a_row.find_lines.batch')
+def bench_four_in_a_row_find_lines_batch():
+    import numpy as np
+    from four_in_a_row_engine import find_lines
+    boards = np.random.default_rng(8).choice(np.array([0, 1, -1], dtype=np.int8), size=(1000, 6, 7))
+    return lambda: find_lines(boards)
+
+
+@benchmark('four_in_a_row.search', kind='macro')
+def bench_four_in_a_row_search():
+    from four_in_a_row_engine import Position, Searcher
+    position = Position(6, 7)
+    for col in (3, 3, 2, 4):
+        position.play(col)
+    return lambda: Searcher(time_budget=None, max_depth=6, tt_bits=16).best_move(position)
+
+
+# Tic Tac Toe
+
+def tic_tac_toe():
+    module = load('TicTacToe', os.path.join(ROOT, 'TicTacToe.py'))
+    with redirect_stdout(io.StringIO()):
+        game = module.TicTacToe()
+    return game
+
+
+@benchmark('tic_tac_toe.game_over')
+def bench_tic_tac_toe_game_over():
+    game = tic_tac_toe()
+    for cell in (0, 4, 2, 1):       # a1, b2, c1, b1
+        game.play(cell)
+    return game.game_over
+
+
+@benchmark('tic_tac_toe.game', kind='macro')
+def bench_tic_tac_toe_game():
+    game = tic_tac_toe()
+    free_cells = load('tic_tac_toe_engine', os.path.join(ROOT, 'tic_tac_toe_engine.py')).FREE_CELLS
+
+    def run():
+        rng = random.Random(3)
+        with redirect_stdout(io.StringIO()):
+            for _ in range(20):
+                game.start()
+                while True:
+                    game.play(rng.choice(free_cells[game.board.masks[1] | game.board.masks[-1]]))
+                    if game.game_over():
+                        break
+    return run
+
+
+@benchmark('tic_tac_toe.perfect_play', kind='macro')
+def bench_tic_tac_toe_perfect_play():
+    engine = load('tic_tac_toe_engine', os.path.join(ROOT, 'tic_tac_toe_engine.py'))
+    perfect = engine.PerfectPlayer().best_move
+    random.seed(7)
+    return lambda: engine.self_play(1000, perfect, engine.random_move)
+
+
+def gomoku_board(stones=20, seed=8):
+    """15x15 five in a row position with stones played around the center."""
+    engine = load('mnk_engine', os.path.join(ROOT, 'mnk_engine.py'))
+    board = engine.Board(15, 15, 5)
+    rng = random.Random(seed)
+    while len(board.history) < stones:
+        board.play(rng.choice(sorted(board.candidates)) if board.history else 112)
+        if board.fours[1] or board.fours[-1]:
+            board.undo()
+    return engine, board
+
+
+@benchmark('tic_tac_toe.gomoku.play_undo')
+def bench_gomoku_play_undo():
+    engine, board = gomoku_board()
+    cells = sorted(board.candidates)
+
+    def run():
+        for cell in cells:
+            board.play(cell)
+            board.undo()
+    return run
+
+
+@benchmark('tic_tac_toe.gomoku.search', kind='macro')
+def bench_gomoku_search():
+    engine, board = gomoku_board()
+    searcher = engine.Searcher(time_budget=None, max_depth=3)
+    return lambda: searcher.best_move(board)
+
+
+# Code Cracker
+
+@benchmark('code_cracker.check_guess')
+def bench_code_cracker_check_guess():
+    module = load('CodeCracker', os.path.join(ROOT, 'CodeCracker.py'))
+    return lambda: module.check_guess('TASSE', 'SATTE')
+
+
+@benchmark('code_cracker.game', kind='macro')
+def bench_code_cracker_game():
+    module = load('CodeCracker', os.path.join(ROOT, 'CodeCracker.py'))
+    rng = random.Random(4)
+    letters = 'AEINRST'
+    words = [''.join(rng.choice(letters) for _ in range(module.WORD_LENGTH)) for _ in range(200)]
+
+    def run():
+        for secret_word in words[:20]:
+            for guess in words[:module.MAX_ATTEMPTS]:
+                if module.solved(module.check_guess(secret_word, guess)):
+                    break
+    return run
+
+
+def word_corpus(count=20_000, seed=9):
+    """Corpus file of random five letter words in a temporary directory."""
+    words_module = load('code_cracker_words', os.path.join(ROOT, 'code_cracker_words.py'))
+    rng = random.Random(seed)
+    words = {''.join(rng.choice('AEINRSTLUÄÖÜ') for _ in range(5)) for _ in range(count)}
+    path = os.path.join(tempfile.mkdtemp(), 'corpus.words')
+    words_module.write_corpus(path, words, 5)
+    return words_module.WordCorpus(path)
+
+
+@benchmark('code_cracker.random_word')
+def bench_code_cracker_random_word():
+    corpus = word_corpus()
+    return corpus.random_word
+
+
+@benchmark('code_cracker.advisor.best_guess', kind='macro')
+def bench_code_cracker_best_guess():
+    """Second turn hint on a 2000 word corpus."""
+    advisor_module = load('code_cracker_advisor', os.path.join(ROOT, 'code_cracker_advisor.py'))
+    code_cracker = load('CodeCracker', os.path.join(ROOT, 'CodeCracker.py'))
+    corpus = word_corpus(count=2000)
+    path = os.path.join(tempfile.mkdtemp(), 'corpus.feedback')
+    advisor_module.build_matrix(corpus, path)
+    advisor = advisor_module.Advisor(corpus, path)
+    guess = advisor.best_guess()
+    feedback = code_cracker.check_guess(corpus[0], guess)
+
+    def run():
+        advisor.reset()
+        advisor.update(guess, feedback)
+        return advisor.best_guess()
+    return run
+
+
+# Photo slider puzzle
+
+class PhotoSource:
+    """Photo source without network, the ui stub decodes any bytes to a 600x600 image."""
+    def fetch(self, size):
+        return b'photo'
+
+
+def slider_puzzle(size):
+    """Puzzle scene with a stand-in photo instead of a downloaded one."""
+    module = load('photo_slider_puzzle', os.path.join(PUZZLE_DIR, 'photo_slider_puzzle.py'))
+    module.BOARD_SIZE = size
+    module.CACHE_DIR = tempfile.mkdtemp()
+    module.PHOTO_SOURCE = PhotoSource()
+    puzzle = module.Puzzle()
+    puzzle.setup()
+    return module, puzzle
+
+
+@benchmark('slider_puzzle.shuffle_puzzle')
+def bench_slider_puzzle_shuffle():
+    module, puzzle = slider_puzzle(8)
+    random.seed(5)
+    return puzzle.shuffle_puzzle
+
+
+@benchmark('slider_puzzle.puzzle_solved')
+def bench_slider_puzzle_solved():
+    module, puzzle = slider_puzzle(8)
+    return puzzle.puzzle_solved
+
+
+@benchmark('slider_puzzle.game', kind='macro')
+def bench_slider_puzzle_game():
+    module, puzzle = slider_puzzle(8)
+
+    def run():
+        random.seed(6)
+        puzzle.shuffle_puzzle()
+        puzzle.place_tiles()
+        for _ in range(100):
+            tile = random.choice([tile for tile in puzzle.puzzle.children if puzzle.is_neighbour(tile.cell)])
+            location = puzzle.puzzle.position + tile.position
+            puzzle.touch_ended(module.Touch(*location))
+            puzzle.update()
+    return run
+
+
+@benchmark('slider_puzzle.resize')
+def bench_slider_puzzle_resize():
+    module, puzzle = slider_puzzle(7)
+
+    def run():
+        for size in (8, 7):
+            module.BOARD_SIZE = size
+            puzzle.new_puzzle(new_photo=False)
+    return run
+
+
+@benchmark('slider_puzzle.new_puzzle')
+def bench_slider_puzzle_new_puzzle():
+    module, puzzle = slider_puzzle(8)
+    return puzzle.new_puzzle
+
+@benchmark('slider_puzzle.solve.3x3')
+def bench_slider_puzzle_solve_3():
+    solver_module = load('slider_solver', os.path.join(PUZZLE_DIR, 'slider_solver.py'))
+    solver = solver_module.Solver(3)
+    board = [8, 6, 7, 2, 5, 4, 3, 0, 1]
+    return lambda: solver.solve(board)
+
+
+@benchmark('slider_puzzle.solve.8x8', kind='macro')
+def bench_slider_puzzle_solve_8():
+    solver_module = load('slider_solver', os.path.join(PUZZLE_DIR, 'slider_solver.py'))
+    solver = solver_module.Solver(8)
+    rng, moves, blank = random.Random(7), [], 0
+    for _ in range(2000):
+        blank = rng.choice(solver_module.neighbours(8)[blank])
+        moves.append(blank)
+    board = solver_module.apply_moves(list(range(64)), moves)
+    return lambda: solver.solve(board)
+
+
+# Color Catcher
+
+class JitterSource:
+    """Attitude near a fixed pose with sensor-like noise, deterministic."""
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+
+    def start(self):
+        pass
+
+    def read(self):
+        gauss = self.rng.gauss
+        return 0.5 + gauss(0, 0.02), 0.3 + gauss(0, 0.02), 1.0 + gauss(0, 0.02)
+
+    def stop(self):
+        pass
+
+
+def color_catcher():
+    module = load('ColorCatcher', os.path.join(ROOT, 'ColorCatcher.py'))
+    module.ATTITUDE_SOURCE = JitterSource()
+    game = module.ColorFinder()
+    game.setup()
+    return module, game
+
+
+@benchmark('color_catcher.update')
+def bench_color_catcher_update():
+    module, game = color_catcher()
+    game.target_h = game.target_s = game.target_v = 2.0    # never matched, all channels stay open
+
+    def run():
+        for frame in range(60):
+            game.t = frame / 60
+            game.update()
+    return run
+
+
+@benchmark('color_catcher.replay.10_minutes', kind='macro')
+def bench_color_catcher_replay():
+    trace_module = load('color_catcher_trace', os.path.join(ROOT, 'color_catcher_trace.py'))
+    path = os.path.join(tempfile.mkdtemp(), 'session.trace')
+    trace_module.write_trace(path, *trace_module.synthetic_trace(600, seed=1))
+    trace = trace_module.read_trace(path)
+    return lambda: trace_module.replay(trace, seed=1, smoothing=trace_module.KalmanFilter())
+
+
+def calibration_loop():
+    x = 0
+    for i in range(20000):
+        x = (x * 31 + i) & 0xffff
+    return x
+
+
+def calibrate():
+    """Seconds of one calibration loop on this machine."""
+    return measure(calibration_loop, min_time=0.2)
+
+
+def run_benchmarks(names):
+    results = {}
+    for name in names:
+        kind, setup = BENCHMARKS[name]
+        try:
+            with redirect_stdout(io.StringIO()):
+                fn = setup()
+                results[name] = measure(fn, min_time=1.0 if kind == 'macro' else 0.2)
+        except ImportError as e:
+            print(f'{name:<40} skipped ({e})')
+            continue
+        yield name, kind, results[name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='keywords', action='append', default=[],
+                        help='only run benchmarks containing this text')
+    parser.add_argument('--save', action='store_true', help='store results of the selected benchmarks as new baselines')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed slowdown (0.5 = 50%%)')
+    parser.add_argument('--baselines', default=BASELINES, help='baseline JSON file')
+    args = parser.parse_args()
+    if args.save and not args.keywords:
+        parser.error('--save needs -k: re-save only the baselines your change is meant to move')
+
+    try:
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    names = [name for name in BENCHMARKS if not args.keywords or any(k in name for k in args.keywords)]
+    regressions = []
+    results = {}
+
+    unit = calibrate()
+    measured = list(run_benchmarks(names))
+    unit = min(unit, calibrate())
+    units = {name: seconds / unit for name, kind, seconds in measured}
+
+    # a noisy machine can slow down for a while, confirm suspected regressions once against a
+    # calibration taken right before
+    suspects = [name for name in units if baselines.get(name) and units[name] > baselines[name] * (1 + args.threshold)]
+    for name in suspects:
+        local_unit = calibrate()
+        for _, _, seconds in run_benchmarks([name]):
+            units[name] = min(units[name], seconds / local_unit)
+
+    # times and baselines are shown in seconds of this machine: calibration units * unit
+    print(f'calibration loop: {format_time(unit)}\n')
+    print(f'{"benchmark":<40}{"kind":<7}{"time":>12}{"baseline":>12}{"ratio":>8}')
+    for name, kind, _ in measured:
+        results[name] = units[name]
+        seconds = units[name] * unit
+        baseline = baselines.get(name)
+        ratio = results[name] / baseline if baseline else None
+        status = ''
+        if ratio and ratio > 1 + args.threshold:
+            status = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:<40}{kind:<7}{format_time(seconds):>12}{format_time(baseline and baseline * unit):>12}'
+              f'{f"{ratio:.2f}" if ratio else "-":>8}{status}')
+
+    if args.save:
+        baselines.update(results)
+        with open(args.baselines, 'w') as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write('\n')
+        print(f'\nSaved {len(results)} baselines to {args.baselines}')
+    elif regressions:
+        print(f'\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}')
+        sys.exit(1)
+
+
+def format_time(seconds):
+    if seconds is None:
+        return '-'
+    for unit, factor in (('s', 1), ('ms', 1e3), ('µs', 1e6)):
+        if seconds * factor >= 1:
+            return f'{seconds * factor:.2f} {unit}'
+    return f'{seconds * 1e9:.0f} ns'
+
+
+if __name__ == '__main__':
+    main()
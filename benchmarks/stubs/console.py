@@ -0,0 +1,5 @@
+"""Minimal stand-in for Pythonista's console module."""
+
+
+def clear():
+    pass
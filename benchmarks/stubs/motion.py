@@ -0,0 +1,15 @@
+"""Minimal stand-in for Pythonista's motion module. Attitude comes from ATTITUDE."""
+
+ATTITUDE = (0.0, 0.0, 0.0)
+
+
+def start_updates():
+    pass
+
+
+def stop_updates():
+    pass
+
+
+def get_attitude():
+    return ATTITUDE
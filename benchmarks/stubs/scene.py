@@ -0,0 +1,152 @@
+"""Minimal stand-in for Pythonista's scene module, enough to run the games headless."""
+
+import ui     # like Pythonista, `from scene import *` brings ui along
+
+
+class Vector2(tuple):
+    def __new__(cls, x=0.0, y=0.0):
+        return super().__new__(cls, (x, y))
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    w = property(lambda self: self[0])
+    h = property(lambda self: self[1])
+
+    def __add__(self, other):
+        return Vector2(self[0] + other[0], self[1] + other[1])
+
+    def __sub__(self, other):
+        return Vector2(self[0] - other[0], self[1] - other[1])
+
+    def __truediv__(self, k):
+        return Vector2(self[0] / k, self[1] / k)
+
+    def __mul__(self, k):
+        return Vector2(self[0] * k, self[1] * k)
+
+
+Point = Size = Vector2
+
+
+class Rect:
+    def __init__(self, x=0.0, y=0.0, w=0.0, h=0.0):
+        self.x, self.y, self.w, self.h = x, y, w, h
+
+    def contains_point(self, point):
+        return self.x <= point[0] <= self.x + self.w and self.y <= point[1] <= self.y + self.h
+
+
+class Touch:
+    def __init__(self, x, y):
+        self.location = Point(x, y)
+
+
+class Texture:
+    def __init__(self, image=None):
+        self.image = image
+        self.size = Size(*getattr(image, 'size', (0, 0)))
+
+    def subtexture(self, rect):
+        return Texture(self.image)
+
+
+class Node:
+    def __init__(self, *args, position=(0, 0), parent=None, size=(10, 10), **kwargs):
+        self.children = []
+        self.parent = None
+        self.position = Point(*position)
+        self.size = Size(*size)
+        self.alpha = 1.0
+        self.scale = 1.0
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        if parent is not None:
+            parent.add_child(self)
+
+    def add_child(self, node):
+        if node.parent is not None:
+            node.remove_from_parent()
+        node.parent = self
+        self.children.append(node)
+
+    def remove_from_parent(self):
+        if self.parent is not None:
+            self.parent.children.remove(self)
+            self.parent = None
+
+    @property
+    def frame(self):
+        w, h = self.size
+        return Rect(self.position[0] - w / 2, self.position[1] - h / 2, w, h)
+
+    def point_from_scene(self, point):
+        x, y = point
+        node = self
+        while node is not None:
+            x, y = x - node.position[0], y - node.position[1]
+            node = node.parent
+        return Point(x, y)
+
+    def run_action(self, action, key=None):
+        pass
+
+    def remove_all_actions(self):
+        pass
+
+
+class ShapeNode(Node):
+    def __init__(self, path=None, fill_color='white', stroke_color='clear', shadow=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self.fill_color = fill_color
+        self.stroke_color = stroke_color
+        if path is not None and 'size' not in kwargs:
+            self.size = Size(*path.bounds[2:])
+
+
+class SpriteNode(Node):
+    def __init__(self, texture=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.texture = texture
+
+
+class LabelNode(Node):
+    def __init__(self, text='', font=('Helvetica', 20), *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.text = text
+        self.font = font
+
+
+class Scene(Node):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size = get_screen_size()
+        self.view = None
+        self.t = 0.0
+
+    def setup(self):
+        pass
+
+    def update(self):
+        pass
+
+
+class Action:
+    @staticmethod
+    def _noop(*args, **kwargs):
+        return None
+
+    call = sequence = group = wait = fade_to = scale_to = move_to = move_by = _noop
+
+
+SCREEN_SIZE = Size(768, 1024)
+PORTRAIT = 'portrait'
+LANDSCAPE = 'landscape'
+
+
+def get_screen_size():
+    return SCREEN_SIZE
+
+
+def run(scene, *args, **kwargs):
+    scene.setup()
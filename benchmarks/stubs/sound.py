@@ -0,0 +1,5 @@
+"""Minimal stand-in for Pythonista's sound module."""
+
+
+def play_effect(name, volume=0.5, pitch=1.0):
+    pass
@@ -0,0 +1,35 @@
+"""Minimal stand-in for Pythonista's ui module."""
+
+BLEND_NORMAL = 0
+BLEND_MULTIPLY = 1
+
+
+class Path:
+    def __init__(self, x=0, y=0, w=0, h=0):
+        self.bounds = (x, y, w, h)
+
+    @classmethod
+    def rounded_rect(cls, x, y, w, h, radius):
+        return cls(x, y, w, h)
+
+    @classmethod
+    def rect(cls, x, y, w, h):
+        return cls(x, y, w, h)
+
+    @classmethod
+    def oval(cls, x, y, w, h):
+        return cls(x, y, w, h)
+
+
+class Image:
+    def __init__(self, size=(0, 0), data=None):
+        self.size = size
+        self.data = data
+
+    @classmethod
+    def from_data(cls, data, scale=1):
+        return cls(size=(600, 600), data=data)
+
+    @classmethod
+    def named(cls, name):
+        return cls(size=(256, 256))
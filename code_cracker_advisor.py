@@ -0,0 +1,179 @@
+""" CODE CRACKER - guess advisor
+
+The feedback of check_guess() for every (guess, answer) pair of a word corpus is precomputed once as
+a pattern code (one base-3 digit per letter: 0 = 'X', 1 = 'Y', 2 = 'G') and stored as a matrix on disk:
+
+    header      '<4sBBIII' magic b'CCFB', version, word length, number of words, CRC32 of the corpus
+                           words, index of the best first guess
+    matrix      words * words pattern codes, row = guess, column = answer (uint8 up to 5 letters,
+                uint16 for longer words)
+
+Advisor memory-maps the matrix. Each turn it keeps the indexes of the answers that are still
+possible and filters them with one comparison of a matrix row, then proposes the guess whose
+feedback splits the remaining answers best (the highest entropy of the pattern distribution).
+The first guess is the same for every round and stored in the header.
+
+Build the matrix after the corpus:  python code_cracker_advisor.py de [--length 5]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+import numpy as np
+from code_cracker_words import WordCorpus, corpus_path
+
+
+MAGIC = b'CCFB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBIII')
+CHUNK = 1 << 24     # matrix cells handled at once while building and scoring
+FEEDBACK_DIGITS = {'X': 0, 'Y': 1, 'G': 2}
+
+
+def matrix_path(language, length=5):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f'code_cracker_{language}_{length}.feedback')
+
+
+def pattern_dtype(length):
+    return np.uint8 if 3 ** length <= 256 else np.uint16
+
+
+def pattern_code(feedback) -> int:
+    """Pattern code of a check_guess() feedback like ['G', 'X', 'Y', 'X', 'X']."""
+    code = 0
+    for letter in reversed(feedback):
+        code = 3 * code + FEEDBACK_DIGITS[letter]
+    return code
+
+
+def letter_codes(words, length):
+    """Code points of words as a (words, length) array."""
+    return np.asarray(words, dtype=f'<U{length}').view('<u4').reshape(-1, length)
+
+
+def feedback_patterns(guesses, answers):
+    """Pattern codes of all guesses (g, length) against all answers (a, length) as a (g, a) array.
+    Same rules as check_guess(): greens first, then yellows from left to right while the letter is
+    left over in the answer.
+    """
+    length = guesses.shape[1]
+    guesses = guesses[:, np.newaxis, :]
+    answers = answers[np.newaxis, :, :]
+    green = guesses == answers
+    yellow = np.zeros_like(green)
+
+    for i in range(length):
+        letter = guesses[..., i:i + 1]
+        left_over = ((answers == letter) & ~green).sum(axis=-1)
+        earlier = ((guesses[..., :i] == letter) & yellow[..., :i]).sum(axis=-1)
+        yellow[..., i] = ~green[..., i] & (left_over > earlier)
+
+    digits = 2 * green + yellow
+    return (digits * 3 ** np.arange(length)).sum(axis=-1).astype(pattern_dtype(length))
+
+
+def entropies(patterns, length):
+    """Entropy in bits of the pattern distribution of every row of patterns (guesses, answers)."""
+    rows, answers = patterns.shape
+    size = 3 ** length
+    result = np.empty(rows)
+    step = max(1, CHUNK // max(answers, 1))
+    for start in range(0, rows, step):
+        chunk = patterns[start:start + step].astype(np.int64)
+        chunk += size * np.arange(len(chunk))[:, np.newaxis]
+        counts = np.bincount(chunk.ravel(), minlength=len(chunk) * size).reshape(len(chunk), size)
+        p = counts / answers
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[start:start + step] = -np.where(counts, p * np.log2(p), 0).sum(axis=1)
+    return result
+
+
+def corpus_crc(corpus: WordCorpus) -> int:
+    return zlib.crc32(corpus.words.tobytes())
+
+
+def build_matrix(corpus: WordCorpus, path):
+    length, n = corpus.length, len(corpus)
+    codes = letter_codes(corpus.words, length)
+    step = max(1, CHUNK // (n * length))
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, length, n, corpus_crc(corpus), 0))
+        best, best_entropy = 0, -1.0
+        for start in range(0, n, step):
+            rows = feedback_patterns(codes[start:start + step], codes)
+            f.write(rows.tobytes())
+            scores = entropies(rows, length)
+            if scores.max() > best_entropy:
+                best, best_entropy = start + int(scores.argmax()), scores.max()
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, length, n, corpus_crc(corpus), best))
+    return best
+
+
+class Advisor:
+    """Proposes guesses for words of corpus and narrows the possible answers down with the feedback."""
+    def __init__(self, corpus: WordCorpus, path):
+        self.corpus = corpus
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, length, n, crc, self.opening = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a feedback matrix (version {VERSION})')
+        if (length, n, crc) != (corpus.length, len(corpus), corpus_crc(corpus)):
+            raise ValueError(f'{path} was built for another word corpus')
+
+        self.length = length
+        self.matrix = np.frombuffer(self.map, dtype=pattern_dtype(length), count=n * n,
+                                    offset=HEADER.size).reshape(n, n)
+        self.reset()
+
+    def reset(self):
+        self.candidates = np.arange(len(self.corpus))
+
+    def index(self, word):
+        """Index of word in the corpus or None."""
+        i = int(np.searchsorted(self.corpus.words, word))
+        return i if i < len(self.corpus) and self.corpus.words[i] == word else None
+
+    def update(self, guess, feedback):
+        """Keep only the answers that give this feedback to guess."""
+        code = pattern_code(feedback)
+        i = self.index(guess)
+        if i is not None:
+            patterns = self.matrix[i, self.candidates]
+        else:
+            codes = letter_codes([guess], self.length)
+            patterns = feedback_patterns(codes, letter_codes(self.corpus.words[self.candidates], self.length))[0]
+        self.candidates = self.candidates[patterns == code]
+
+    def best_guess(self):
+        """The guess with the most expected information, None if no word fits the feedback."""
+        if len(self.candidates) == len(self.corpus):
+            return self.corpus[self.opening]
+        if len(self.candidates) <= 2:
+            return self.corpus[self.candidates[0]] if len(self.candidates) else None
+
+        scores = entropies(self.matrix[:, self.candidates], self.length)
+        # among equal splits a possible answer may win right away
+        scores[self.candidates] += 1 / len(self.candidates)
+        return self.corpus[int(scores.argmax())]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the feedback matrix of a Code Cracker word corpus.')
+    parser.add_argument('language', help='language code like LANGUAGE in CodeCracker.py')
+    parser.add_argument('--length', type=int, default=5, help='letters per word (like WORD_LENGTH)')
+    args = parser.parse_args()
+
+    corpus = WordCorpus(corpus_path(args.language, args.length))
+    path = matrix_path(args.language, args.length)
+    start = time.perf_counter()
+    opening = build_matrix(corpus, path)
+    print(f'Wrote {len(corpus)}x{len(corpus)} feedback matrix to {path} in {time.perf_counter() - start:.1f}s, '
+          f'best first guess {corpus[opening]}')
@@ -0,0 +1,301 @@
+""" CODE CRACKER - prefetching word supplier
+
+Without an offline corpus the secret words come from random-word-api. WordSupplier runs an asyncio
+event loop in a background thread and keeps a bounded queue of prefetched words per language, so a
+new round takes a word that is already there instead of waiting on the network:
+
+    - one small pool of keep-alive HTTP/1.1 connections (asyncio streams, TLS for https), reused for
+      every request instead of a new connection per word
+    - words are fetched in batches and refilled in the background whenever a queue has room
+    - every request has a timeout; failed requests are retried with exponential backoff
+    - latencies are recorded: how long the game waited for a word (queue hit or miss) and how long
+      the fetches took, see report()
+
+Try it against a local stub server (slow on purpose) without network:
+
+    python code_cracker_supplier.py --stub
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+from code_cracker_words import normalize
+
+
+API_URL = 'https://random-word-api.herokuapp.com/word'
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, opened on first use and reopened when the server closed it."""
+    def __init__(self, host, port, use_ssl):
+        self.host, self.port, self.use_ssl = host, port, use_ssl
+        self.reader = self.writer = None
+        self.opened = 0
+
+    async def get(self, target, timeout):
+        """Return status and body of a GET request."""
+        reused = self.writer is not None and not self.writer.is_closing()
+        if not reused:
+            await self.open(timeout)
+        try:
+            try:
+                return await asyncio.wait_for(self._exchange(target), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # the server dropped the idle connection, try once more on a new one
+                self.close()
+                await self.open(timeout)
+                return await asyncio.wait_for(self._exchange(target), timeout)
+        except BaseException:
+            self.close()    # the response may be half read
+            raise
+
+    async def open(self, timeout):
+        connecting = asyncio.open_connection(self.host, self.port, ssl=self.use_ssl or None)
+        self.reader, self.writer = await asyncio.wait_for(connecting, timeout)
+        self.opened += 1
+
+    async def _exchange(self, target):
+        self.writer.write((
+            f'GET {target} HTTP/1.1\r\n'
+            f'Host: {self.host}\r\n'
+            'Connection: keep-alive\r\n'
+            'Accept: application/json\r\n\r\n'
+        ).encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            body = b''
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                body += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+            while await self.reader.readuntil(b'\r\n') != b'\r\n':
+                pass    # trailer
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection') == 'close':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class ConnectionPool:
+    def __init__(self, url, size=2):
+        parts = urlsplit(url)
+        use_ssl = parts.scheme == 'https'
+        self.path = parts.path or '/'
+        self.connections = [Connection(parts.hostname, parts.port or (443 if use_ssl else 80), use_ssl)
+                            for _ in range(size)]
+        self.idle = asyncio.Queue()
+        for connection in self.connections:
+            self.idle.put_nowait(connection)
+
+    async def get_json(self, params, timeout):
+        connection = await self.idle.get()
+        try:
+            status, body = await connection.get(f'{self.path}?{urlencode(params)}', timeout)
+        finally:
+            self.idle.put_nowait(connection)
+        if status != 200:
+            raise ConnectionError(f'HTTP status {status}')
+        return json.loads(body)
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+class WordSupplier:
+    """Prefetch random words of one length in the background.
+
+    queue_size :    words kept ready per language
+    batch :         words per request
+    timeout :       seconds per connect and per request
+    retries :       attempts per batch, waiting backoff * 2**attempt seconds in between
+    """
+    def __init__(self, url=API_URL, length=5, queue_size=20, batch=10, timeout=5.0, retries=3, backoff=0.5,
+                 connections=2):
+        self.length = length
+        self.queue_size, self.batch = queue_size, batch
+        self.timeout, self.retries, self.backoff = timeout, retries, backoff
+        self.queues = {}            # language: queue.Queue of words, taken by the game thread
+        self.room = {}              # language: asyncio.Event, set when the queue has room (loop thread only)
+        self.waits = {'hit': [], 'miss': []}
+        self.fetch_times = []
+        self.failures = 0
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.pool = self._run(self._create_pool(url, connections))
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _create_pool(self, url, connections):
+        return ConnectionPool(url, connections)
+
+    def prefetch(self, language):
+        """Start filling the queue of language (get_word does it on first use)."""
+        if language not in self.queues:
+            self.queues[language] = queue.Queue(self.queue_size)
+            self.loop.call_soon_threadsafe(self._start_refill, language)
+
+    def _start_refill(self, language):
+        # created on the loop thread, asyncio objects bind to the running loop (Python < 3.10)
+        self.room[language] = asyncio.Event()
+        self.room[language].set()
+        self.loop.create_task(self._refill(language))
+
+    def _wake(self, language):
+        self.room[language].set()
+
+    def get_word(self, language, timeout=None):
+        """Return a prefetched word, waiting for one if the queue is empty. Raise queue.Empty on timeout."""
+        self.prefetch(language)
+        words = self.queues[language]
+        kind = 'miss' if words.empty() else 'hit'
+        start = time.perf_counter()
+        word = words.get(timeout=timeout)
+        self.waits[kind].append(time.perf_counter() - start)
+        self.loop.call_soon_threadsafe(self._wake, language)
+        return word
+
+    async def _refill(self, language):
+        words, room = self.queues[language], self.room[language]
+        while True:
+            await room.wait()
+            room.clear()
+            while not words.full():
+                fetched = await self._fetch(language)
+                if not fetched:
+                    # every attempt failed, wait a bit longer before the next round
+                    await asyncio.sleep(self.backoff * 2 ** self.retries)
+                for word in fetched:
+                    if words.full():
+                        break
+                    words.put_nowait(word)
+
+    async def _fetch(self, language):
+        params = {'length': self.length, 'lang': language, 'number': self.batch}
+        for attempt in range(self.retries):
+            start = time.perf_counter()
+            try:
+                data = await self.pool.get_json(params, self.timeout)
+            except (OSError, asyncio.TimeoutError, ValueError):
+                self.failures += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+                continue
+            self.fetch_times.append(time.perf_counter() - start)
+            # avoid 'ß' for it'd become 'ss' and add a letter
+            return [word for word in (normalize(word, self.length) for word in data) if word]
+        return []
+
+    def report(self):
+        """Waiting times of the game for prefetched words compared to the fetch times."""
+        def summary(times):
+            if not times:
+                return '-'
+            return f'{len(times)} x median {statistics.median(times) * 1e3:.2f} ms, max {max(times) * 1e3:.2f} ms'
+
+        return '\n'.join([
+            f'queue hits:  {summary(self.waits["hit"])}',
+            f'queue miss:  {summary(self.waits["miss"])}',
+            f'fetches:     {summary(self.fetch_times)} ({self.failures} failed attempts, '
+            f'{sum(c.opened for c in self.pool.connections)} connections opened)',
+        ])
+
+    def close(self):
+        try:
+            self._run(self._shutdown())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1)
+
+    async def _shutdown(self):
+        # cancel the refills and requests in flight, then close the connections
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.pool.close()
+
+
+def serve_stub(words, delay=0.2, fail_every=0):
+    """Start a local random-word-api stand-in on a free port in a background thread.
+    Each request takes delay seconds, every fail_every-th request answers with HTTP 503.
+    Return the server, its URL is http://127.0.0.1:{server.server_port}/word.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'    # keep-alive
+
+        def do_GET(self):
+            server.requests += 1
+            time.sleep(delay)
+            if fail_every and server.requests % fail_every == 0:
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            number = int(parse_qs(urlsplit(self.path).query).get('number', ['1'])[0])
+            body = json.dumps(random.sample(words, min(number, len(words)))).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the word supplier.')
+    parser.add_argument('--stub', action='store_true', help='use a local stub server instead of the api')
+    parser.add_argument('--lang', default='de')
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--pause', type=float, default=0.1, help='seconds between rounds')
+    args = parser.parse_args()
+
+    url = API_URL
+    if args.stub:
+        server = serve_stub(['TASSE', 'KATZE', 'MÄUSE', 'ZEBRA', 'STRAẞE', 'HAUS', 'BLUME', 'TISCH'],
+                            fail_every=7)
+        url = f'http://127.0.0.1:{server.server_port}/word'
+
+    supplier = WordSupplier(url)
+    for _ in range(args.rounds):
+        supplier.get_word(args.lang, timeout=30)
+        time.sleep(args.pause)
+    print(supplier.report())
+    supplier.close()
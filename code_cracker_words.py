@@ -0,0 +1,109 @@
+""" CODE CRACKER - offline word corpus
+
+All valid secret words of one language and length are packed into a binary file with fixed-width
+entries, sorted, so the game memory-maps it and picks a word in O(1) without a network round trip
+and without loading the list into Python objects:
+
+    header      '<4sBBI'   magic b'CCWL', version, word length, number of words
+    words       number of words * word length UTF-32-LE code points, upper case, ascending
+
+Words are filtered when the corpus is built: letters only, exactly the word length after NFC
+normalization and upper-casing, and no 'ß' (it would become 'SS').
+
+Build a corpus from word lists (one word per line) or from random-word-api:
+
+    python code_cracker_words.py de wordlist.txt [more.txt ...] [--length 5]
+    python code_cracker_words.py de --download 5000 [--length 5]
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import unicodedata
+import numpy as np
+
+
+MAGIC = b'CCWL'
+VERSION = 1
+HEADER = struct.Struct('<4sBBI')
+API_URL = 'https://random-word-api.herokuapp.com/word'
+
+
+def corpus_path(language, length=5):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f'code_cracker_{language}_{length}.words')
+
+
+def normalize(word, length):
+    """Return the word as it is played (NFC, upper case) or None if it isn't a valid secret word."""
+    word = unicodedata.normalize('NFC', word.strip())
+    if 'ß' in word or 'ẞ' in word:
+        return None
+    word = word.upper()
+    if len(word) != length or not word.isalpha():
+        return None
+    return word
+
+
+class WordCorpus:
+    """Read-only view on a corpus file."""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.length, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a word corpus (version {VERSION})')
+        self.words = np.frombuffer(self.map, dtype=f'<U{self.length}', count=count, offset=HEADER.size)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, i):
+        return str(self.words[i])
+
+    def __contains__(self, word):
+        i = np.searchsorted(self.words, word)
+        return i < len(self.words) and self.words[i] == word
+
+    def random_word(self, rng=random):
+        return self[rng.randrange(len(self.words))]
+
+
+def write_corpus(path, words, length):
+    """Filter, deduplicate and sort words and write them as a corpus. Return the number of words."""
+    words = sorted({word for word in (normalize(word, length) for word in words) if word})
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, length, len(words)))
+        f.write(np.array(words, dtype=f'<U{length}').tobytes())
+    return len(words)
+
+
+def download_words(language, length, number):
+    import requests     # only needed to build a corpus online
+
+    response = requests.get(API_URL, params={'length': length, 'lang': language, 'number': number}, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a word corpus for Code Cracker.')
+    parser.add_argument('language', help='language code like LANGUAGE in CodeCracker.py')
+    parser.add_argument('files', nargs='*', help='word lists, one word per line')
+    parser.add_argument('--length', type=int, default=5, help='letters per word (like WORD_LENGTH)')
+    parser.add_argument('--download', type=int, default=0, metavar='N', help='add N words from random-word-api')
+    parser.add_argument('-o', '--output', default=None)
+    args = parser.parse_args()
+
+    words = []
+    for name in args.files:
+        with open(name, encoding='utf-8') as f:
+            words.extend(f)
+    if args.download:
+        words.extend(download_words(args.language, args.length, args.download))
+
+    path = args.output or corpus_path(args.language, args.length)
+    count = write_corpus(path, words, args.length)
+    print(f'Wrote {count} words to {path}')
@@ -0,0 +1,46 @@
+""" COLOR CATCHER - matching rules
+
+The rules of ColorCatcher without scene or motion, shared by the game and the headless replay
+(color_catcher_trace.py): the attitude (roll, pitch, yaw) gives one value per HSV channel, rounded to
+decimal places. A channel locks once its value equals the target value, the color is caught when all
+three are locked. Locked channels aren't computed any more.
+"""
+
+import math
+import random
+
+
+# formula for h/s/v values of an attitude
+CHANNELS = (
+    lambda roll, pitch, yaw: (math.degrees(yaw) % 360) / 360,
+    lambda roll, pitch, yaw: abs(abs(roll / math.pi) - 1),
+    lambda roll, pitch, yaw: abs(abs(pitch / (math.pi / 2)) - 1),
+)
+
+
+def random_hsv(decimal=2, rng=random):
+    return tuple(round(rng.uniform(1/100, 1), decimal) for _ in CHANNELS)
+
+
+class ColorMatch:
+    """Progress on one target color (h, s, v)."""
+    def __init__(self, target, decimal=2):
+        self.target = target
+        self.decimal = decimal
+        self.found = [None] * len(CHANNELS)
+
+    @property
+    def caught(self):
+        return None not in self.found
+
+    def update(self, attitude):
+        """Return h, s, v of attitude (locked channels keep their value) and the channels locked by it."""
+        hsv, locked = [], []
+        for i, value in enumerate(self.found):
+            if value is None:
+                value = round(CHANNELS[i](*attitude), self.decimal)
+                if value == self.target[i]:
+                    self.found[i] = value
+                    locked.append(i)
+            hsv.append(value)
+        return hsv, locked
@@ -0,0 +1,135 @@
+""" COLOR CATCHER - attitude sensor stream
+
+ColorCatcher turns the attitude of the phone (roll, pitch, yaw in radians) into a color. Raw sensor
+samples jitter, with values rounded to 2 decimals a match can flicker away before it is seen. The
+SensorStream samples an attitude source once per frame:
+
+    source      anything with start(), read() -> (roll, pitch, yaw) and stop(): MotionSource reads
+                Pythonista's motion module, other sources (e.g. recorded traces) can be plugged in
+    buffer      RingBuffer, the last samples (time and raw attitude) in one preallocated array
+    filter      smooths the attitude: ExponentialFilter, KalmanFilter or None for raw values
+
+Roll and yaw jump between -pi and pi, so the filters smooth the angle difference to the last
+estimate (wrapped to -pi..pi) instead of the raw values.
+"""
+
+import math
+import numpy as np
+
+
+TAU = 2 * math.pi
+
+
+def wrap(angle):
+    """angle in -pi..pi"""
+    return (angle + math.pi) % TAU - math.pi
+
+
+class MotionSource:
+    """Attitude of the device, Pythonista only."""
+    def start(self):
+        import motion
+        self.motion = motion
+        motion.start_updates()
+
+    def read(self):
+        return self.motion.get_attitude()
+
+    def stop(self):
+        self.motion.stop_updates()
+
+
+class RingBuffer:
+    """The last capacity samples, each a time and width values, without allocating per sample."""
+    def __init__(self, capacity=256, width=3):
+        self.data = np.zeros((capacity, 1 + width))
+        self.capacity = capacity
+        self.count = 0          # samples appended so far, the next one goes to count % capacity
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, t, values):
+        row = self.data[self.count % self.capacity]
+        row[0] = t
+        row[1:] = values
+        self.count += 1
+
+    def latest(self):
+        return self.data[(self.count - 1) % self.capacity]
+
+    def samples(self):
+        """The buffered samples in order, oldest first (a copy)."""
+        start = self.count % self.capacity
+        if self.count <= self.capacity:
+            return self.data[:self.count].copy()
+        return np.concatenate((self.data[start:], self.data[:start]))
+
+
+class ExponentialFilter:
+    """estimate += alpha * (sample - estimate), alpha 1 follows the raw values, smaller is smoother."""
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.estimate = None
+
+    def __call__(self, sample):
+        if self.estimate is None:
+            self.estimate = list(sample)
+        else:
+            estimate, alpha = self.estimate, self.alpha
+            for i, value in enumerate(sample):
+                estimate[i] = wrap(estimate[i] + alpha * wrap(value - estimate[i]))
+        return tuple(self.estimate)
+
+
+class KalmanFilter:
+    """Kalman filter per angle for a device that is held (nearly) still between samples.
+    process_noise: how much the angle may change per sample, measurement_noise: sensor jitter (rad^2).
+    """
+    def __init__(self, process_noise=1e-4, measurement_noise=4e-4):
+        self.q, self.r = process_noise, measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.estimate = None
+        self.variance = None
+
+    def __call__(self, sample):
+        if self.estimate is None:
+            self.estimate = list(sample)
+            self.variance = [self.r] * len(sample)
+        else:
+            estimate, variance = self.estimate, self.variance
+            for i, value in enumerate(sample):
+                p = variance[i] + self.q
+                gain = p / (p + self.r)
+                estimate[i] = wrap(estimate[i] + gain * wrap(value - estimate[i]))
+                variance[i] = (1 - gain) * p
+        return tuple(self.estimate)
+
+
+class SensorStream:
+    """Sample an attitude source into a ring buffer and smooth it."""
+    def __init__(self, source, filter=None, capacity=256):
+        self.source = source
+        self.filter = filter
+        self.buffer = RingBuffer(capacity)
+        self.attitude = (0.0, 0.0, 0.0)
+
+    def start(self):
+        if self.filter:
+            self.filter.reset()
+        self.source.start()
+
+    def sample(self, t):
+        """Read the source at time t (seconds), return the smoothed attitude (roll, pitch, yaw)."""
+        raw = self.source.read()
+        self.buffer.append(t, raw)
+        self.attitude = self.filter(raw) if self.filter else tuple(raw)
+        return self.attitude
+
+    def stop(self):
+        self.source.stop()
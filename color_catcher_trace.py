@@ -0,0 +1,224 @@
+""" COLOR CATCHER - attitude traces
+
+Record the attitude samples of real sessions on the device and replay them headless (no scene, no
+motion) through the same sensor stream and matching rules as the game, as fast as the CPU allows.
+Recorded sessions hold the target colors too, the replay chases the same colors in the same order.
+Traces without targets (synthetic ones) get them from a seeded random generator and a pause of
+CELEBRATION seconds after each catch. Either way replays are deterministic.
+
+    header      '<4sBB'  magic b'CCAT', version, decimal places of the targets
+    records     20 bytes each until the end of the file, a time (float64) and three float32 values:
+                sample  time in seconds, roll, pitch, yaw (radians)
+                target  time NaN, h, s, v of the color to catch after the previous one
+
+Record: set RECORD_TRACE in ColorCatcher.py to a file name and play.
+Replay: python color_catcher_trace.py session.trace [--seed 0] [--filter kalman|exponential|none]
+        python color_catcher_trace.py --synthetic 600 session.trace    (write a random trace first)
+"""
+
+import argparse
+import math
+import mmap
+import random
+import struct
+import time
+import numpy as np
+from color_catcher_match import ColorMatch, random_hsv
+from color_catcher_sensors import SensorStream, ExponentialFilter, KalmanFilter
+
+
+MAGIC = b'CCAT'
+VERSION = 2
+HEADER = struct.Struct('<4sBB')
+SAMPLE = np.dtype([('t', '<f8'), ('attitude', '<f4', 3)])
+CELEBRATION = 1.0   # seconds of ColorCatcher's glow animation after a catch, no samples are taken meanwhile
+FILTERS = {'kalman': KalmanFilter, 'exponential': ExponentialFilter, 'none': lambda: None}
+
+
+def write_trace(path, times, attitudes, decimal=2):
+    """Write samples without targets (replay() draws them from its seed)."""
+    samples = np.empty(len(times), SAMPLE)
+    samples['t'] = times
+    samples['attitude'] = attitudes
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, decimal))
+        f.write(samples.tobytes())
+
+
+class Trace:
+    """A trace file, memory-mapped: records holds samples and targets (fields t and attitude)."""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.decimal = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not an attitude trace (version {VERSION})')
+        # a record cut off at the end (the app was killed while writing) is ignored
+        count = (len(data) - HEADER.size) // SAMPLE.itemsize
+        self.records = np.frombuffer(data, dtype=SAMPLE, count=count, offset=HEADER.size)
+
+    @property
+    def samples(self):
+        return self.records[~np.isnan(self.records['t'])]
+
+    @property
+    def targets(self):
+        """The recorded target colors in order, rounded like random_hsv() rounds them."""
+        rows = self.records['attitude'][np.isnan(self.records['t'])].tolist()
+        return [tuple(round(value, self.decimal) for value in hsv) for hsv in rows]
+
+
+def read_trace(path):
+    """Open a trace file (raise ValueError for other files and older versions)."""
+    return Trace(path)
+
+
+class TraceRecorder:
+    """Write the samples of a SensorStream's ring buffer to a trace file, in blocks of half the buffer,
+    and every target color when it is shown.
+    """
+    def __init__(self, path, decimal=2):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, decimal))
+        self.written = 0        # buffer.count at the last write
+        self.dropped = 0        # samples overwritten in the buffer before they were written
+
+    def record(self, buffer, flush=False):
+        pending = buffer.count - self.written
+        if not pending or (pending < buffer.capacity // 2 and not flush):
+            return
+        if pending > buffer.capacity:
+            self.dropped += pending - buffer.capacity
+            pending = buffer.capacity
+
+        rows = buffer.samples()[-pending:]
+        samples = np.empty(pending, SAMPLE)
+        samples['t'] = rows[:, 0]
+        samples['attitude'] = rows[:, 1:]
+        self.file.write(samples.tobytes())
+        self.written = buffer.count
+
+    def target(self, buffer, hsv):
+        """Write the next target color, after the samples taken so far."""
+        self.record(buffer, flush=True)
+        record = np.empty(1, SAMPLE)
+        record['t'] = math.nan
+        record['attitude'] = hsv
+        self.file.write(record.tobytes())
+
+    def close(self, buffer):
+        self.record(buffer, flush=True)
+        self.file.close()
+
+
+class TraceSource:
+    """Attitude source that reads the samples of a trace one after another."""
+    def __init__(self, trace):
+        self.times = trace['t'].tolist()
+        self.attitudes = [tuple(sample) for sample in trace['attitude'].tolist()]
+        self.index = 0
+
+    def start(self):
+        self.index = 0
+
+    def read(self):
+        attitude = self.attitudes[self.index]
+        self.index += 1
+        return attitude
+
+    def skip(self):
+        self.index += 1
+
+    def stop(self):
+        pass
+
+
+class ReplayResult:
+    def __init__(self):
+        self.wins = 0
+        self.locks = []         # (time, channel) of every locked channel, channel 0 - 2 is h, s, v
+        self.samples = 0        # samples that went through the rules
+
+
+def replay(trace, seed=0, smoothing=None, celebration=CELEBRATION):
+    """Feed trace through a SensorStream with the filter smoothing and the rules of ColorCatcher like
+    its update() does. Recorded traces switch to the next target at each target record, the samples
+    after a catch up to there are skipped. Traces without targets draw them from seed and skip the
+    samples of celebration seconds after a catch. Same trace, seed and filter settings give the same
+    result.
+    """
+    rng = random.Random(seed)
+    decimal = trace.decimal
+    is_sample = ~np.isnan(trace.records['t'])
+    source = TraceSource(trace.records[is_sample])
+    sensors = SensorStream(source, smoothing)
+    sensors.start()
+    result = ReplayResult()
+
+    def chase(match, t):
+        """Let match take the sample at t, return True on a catch."""
+        hsv, locked = match.update(sensors.sample(t))
+        result.samples += 1
+        result.locks.extend((t, i) for i in locked)
+        if match.caught:
+            result.wins += 1
+        return match.caught
+
+    if is_sample.all():
+        match = ColorMatch(random_hsv(decimal, rng), decimal)
+        paused_until = -math.inf
+        for t in source.times:
+            if t < paused_until:
+                source.skip()
+            elif chase(match, t):
+                paused_until = t + celebration
+                match = ColorMatch(random_hsv(decimal, rng), decimal)
+        return result
+
+    targets = iter(trace.targets)
+    match = None
+    for sample in is_sample.tolist():
+        if not sample:
+            match = ColorMatch(next(targets), decimal)
+        elif match is None or match.caught:
+            source.skip()
+        else:
+            chase(match, source.times[source.index])
+    return result
+
+
+def synthetic_trace(seconds, rate=30, seed=0):
+    """Times and attitudes of a player slowly turning the phone around all axes, with sensor jitter."""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * rate)
+    times = np.arange(count) / rate
+    speed = np.cumsum(rng.normal(0, 0.05, (count, 3)), axis=0)
+    speed -= np.linspace(0, 1, count)[:, np.newaxis] * speed[-1]     # no drift off to one side
+    angles = np.cumsum(speed, axis=0) / rate + rng.normal(0, 0.01, (count, 3))
+    roll = (angles[:, 0] + math.pi) % (2 * math.pi) - math.pi
+    pitch = math.pi / 2 * np.sin(angles[:, 1])
+    yaw = (angles[:, 2] + math.pi) % (2 * math.pi) - math.pi
+    return times, np.stack([roll, pitch, yaw], axis=1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay an attitude trace of ColorCatcher headless.')
+    parser.add_argument('trace')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the target colors if none are recorded')
+    parser.add_argument('--filter', choices=FILTERS, default='kalman')
+    parser.add_argument('--decimal', type=int, default=2, help='decimal places of synthetic targets')
+    parser.add_argument('--synthetic', type=float, metavar='SECONDS', help='write a random trace first')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        write_trace(args.trace, *synthetic_trace(args.synthetic, seed=args.seed), args.decimal)
+
+    trace = read_trace(args.trace)
+    start = time.perf_counter()
+    result = replay(trace, args.seed, FILTERS[args.filter]())
+    elapsed = time.perf_counter() - start
+    times = trace.samples['t']
+    duration = float(times[-1] - times[0]) if len(times) else 0.0
+    print(f'{result.wins} colors caught, {len(result.locks)} channels locked, {result.samples} samples')
+    print(f'{duration:.0f}s of trace replayed in {elapsed * 1e3:.0f} ms ({duration / elapsed:.0f}x real time)')
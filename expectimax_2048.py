@@ -0,0 +1,156 @@
+""" Expectimax AI for 2048
+
+Searches the bitboard engine (bitboard_2048.py) with depth-limited expectimax. Max nodes try all four
+swipes, chance nodes average over every tile Game.add_new_tile could spawn (a 2 or a 4 in each empty
+cell). Positions are scored with precomputed per-row heuristic tables, so evaluating a leaf is eight
+table lookups.
+
+The search deepens iteratively until the time budget for the move is used up and returns the best
+swipe of the deepest finished search. Evaluated chance nodes are kept in a bounded transposition table
+(least recently used entries are evicted first) that survives from one move to the next.
+"""
+
+import time
+from collections import OrderedDict
+import bitboard_2048 as bitboard
+
+
+# heuristic weights per row/column
+LOST_PENALTY = 200000
+MONOTONICITY_POWER = 4
+MONOTONICITY_WEIGHT = 47
+SUM_POWER = 3.5
+SUM_WEIGHT = 11
+MERGES_WEIGHT = 700
+EMPTY_WEIGHT = 270
+
+
+def _row_heuristic(row: int) -> float:
+    cells = [(row >> (4 * i)) & 0xF for i in range(4)]
+
+    empty = cells.count(0)
+    total = sum(cell ** SUM_POWER for cell in cells)
+
+    # count possible merges (equal tiles next to each other, ignoring gaps)
+    merges = 0
+    previous = 0
+    counter = 0
+    for cell in cells:
+        if cell == 0:
+            continue
+        if cell == previous:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = cell
+    if counter > 0:
+        merges += 1 + counter
+
+    # penalize rows that aren't sorted in one direction
+    mono_left = 0
+    mono_right = 0
+    for a, b in zip(cells, cells[1:]):
+        if a > b:
+            mono_left += a ** MONOTONICITY_POWER - b ** MONOTONICITY_POWER
+        else:
+            mono_right += b ** MONOTONICITY_POWER - a ** MONOTONICITY_POWER
+
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(mono_left, mono_right) - SUM_WEIGHT * total)
+
+
+HEURISTIC = [_row_heuristic(row) for row in range(65536)]
+
+
+def evaluate(board: int) -> float:
+    """Score a position by its rows and columns."""
+    table = HEURISTIC
+    columns = bitboard.transpose(board)
+    return (table[board & 0xFFFF] + table[(board >> 16) & 0xFFFF]
+            + table[(board >> 32) & 0xFFFF] + table[board >> 48]
+            + table[columns & 0xFFFF] + table[(columns >> 16) & 0xFFFF]
+            + table[(columns >> 32) & 0xFFFF] + table[columns >> 48])
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Expectimax:
+    """Find the best swipe for a bitboard.
+
+    depth :             maximum number of swipes to look ahead
+    time_budget :       seconds per move, the search stops deepening when it runs out
+    cache_size :        maximum number of positions in the transposition table
+    min_probability :   chance nodes less likely than this are scored by the heuristic
+    """
+    def __init__(self, depth=4, time_budget=0.015, cache_size=100_000, min_probability=0.0001):
+        self.depth = depth
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        self.min_probability = min_probability
+        self.cache = OrderedDict()  # board -> (depth, value)
+        self.deadline = None
+        self.nodes = 0
+        self.reached_depth = 0
+
+    def best_move(self, board: int):
+        """Return the best direction for board or None if there is no valid swipe."""
+        moves = [(direction, bitboard.move(board, direction)[0]) for direction in bitboard.DIRECTIONS]
+        moves = [(direction, swiped) for direction, swiped in moves if swiped != board]
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0][0]
+
+        self.deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        self.nodes = 0
+        self.reached_depth = 0
+        best = moves[0][0]
+
+        for depth in range(1, self.depth + 1):
+            try:
+                scores = [(self.chance_node(swiped, depth, 1.0), direction) for direction, swiped in moves]
+            except OutOfTime:
+                break
+            best = max(scores)[1]
+            self.reached_depth = depth
+
+        return best
+
+    def max_node(self, board: int, depth: int, probability: float) -> float:
+        best = 0.0
+        for move in bitboard.MOVES.values():
+            swiped = move(board)[0]
+            if swiped != board:
+                best = max(best, self.chance_node(swiped, depth, probability))
+        return best
+
+    def chance_node(self, board: int, depth: int, probability: float) -> float:
+        """Average value of all tiles add_new_tile could spawn on board."""
+        if depth <= 1 or probability < self.min_probability:
+            return evaluate(board)
+
+        cached = self.cache.get(board)
+        if cached and cached[0] >= depth:
+            self.cache.move_to_end(board)
+            return cached[1]
+
+        self.nodes += 1
+        if self.deadline and not self.nodes % 16 and time.perf_counter() > self.deadline:
+            raise OutOfTime
+
+        free = bitboard.empty_cells(board)
+        probability /= 2 * len(free)    # 2 and 4 are equally likely
+        total = 0.0
+        for cell in free:
+            shift = 4 * cell
+            total += self.max_node(board | (1 << shift), depth - 1, probability)
+            total += self.max_node(board | (2 << shift), depth - 1, probability)
+        value = total / (2 * len(free))
+
+        self.cache[board] = (depth, value)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return value
@@ -0,0 +1,141 @@
+""" FOUR IN A ROW - opening book
+
+Build it offline on a computer with several cores, then copy the file next to FourInARow.py:
+
+    python four_in_a_row_book.py --size 5 --plies 6 --depth 12
+
+All positions of the first plies are searched with the engine in parallel and the best move for each one
+is written to a binary file, sorted by the position's Zobrist hash:
+
+    header      '<4sBBBBI'   magic b'C4BK', version, rows, cols, connect, number of positions
+    hashes      uint64 * number of positions, ascending
+    moves       uint8 * number of positions, best column (0-based)
+
+FourInARow.py memory-maps the file and finds moves by binary search over the hashes, so neither startup
+time nor memory grow with the size of the book. Version 2 hashes with the splitmix64 keys of
+four_in_a_row_engine.zobrist_key, books of version 1 (keys of random.Random) have to be rebuilt.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+import numpy as np
+from four_in_a_row_engine import Position, Searcher
+
+
+MAGIC = b'C4BK'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBBI')
+
+
+def book_path(rows, cols, connect=4):
+    return f'four_in_a_row_{rows}x{cols}_{connect}.book'
+
+
+class OpeningBook:
+    """Read-only view on a book file. lookup() returns None for positions that aren't in the book."""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.rows, self.cols, self.connect, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not an opening book (version {VERSION})')
+
+        self.hashes = np.frombuffer(self.map, dtype='<u8', count=count, offset=HEADER.size)
+        self.moves = np.frombuffer(self.map, dtype=np.uint8, count=count, offset=HEADER.size + 8 * count)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, position: Position):
+        if (position.rows, position.cols, position.connect) != (self.rows, self.cols, self.connect):
+            return None
+        i = np.searchsorted(self.hashes, position.hash)
+        if i < len(self.hashes) and self.hashes[i] == position.hash:
+            return int(self.moves[i])
+        return None
+
+
+def write_book(path, rows, cols, connect, entries):
+    """Write (hash, column) pairs as a sorted book file."""
+    hashes = np.array([key for key, _ in entries], dtype='<u8')
+    moves = np.array([move for _, move in entries], dtype=np.uint8)
+    order = np.argsort(hashes)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, connect, len(hashes)))
+        f.write(hashes[order].tobytes())
+        f.write(moves[order].tobytes())
+
+
+def opening_positions(rows, cols, connect, plies):
+    """Return the move sequences of all distinct, undecided positions within plies moves."""
+    position = Position(rows, cols, connect)
+    seen = set()
+    found = []
+
+    def visit(moves):
+        if position.hash in seen:
+            return
+        seen.add(position.hash)
+        found.append(tuple(moves))
+        if len(moves) == plies:
+            return
+        for col in range(cols):
+            if position.can_play(col):
+                player = position.player
+                position.play(col)
+                if not position.is_winner(player) and not position.is_full():
+                    visit(moves + [col])
+                position.undo()
+
+    visit([])
+    return found
+
+
+# state of each worker process
+_worker = {}
+
+
+def _init_worker(rows, cols, connect, depth, time_budget):
+    _worker['position'] = Position(rows, cols, connect)
+    _worker['searcher'] = Searcher(time_budget=time_budget, max_depth=depth, tt_bits=18)
+
+
+def _solve(moves):
+    position = _worker['position']
+    position.reset()
+    for col in moves:
+        position.play(col)
+    return position.hash, _worker['searcher'].best_move(position)
+
+
+def build_book(rows, cols, connect=4, plies=6, depth=12, time_budget=2.0, workers=None, path=None):
+    from multiprocessing import Pool     # only needed to build books, not to read them
+
+    path = path or book_path(rows, cols, connect)
+    openings = opening_positions(rows, cols, connect, plies)
+    print(f'Searching {len(openings)} positions ({rows}x{cols}, {plies} plies) with {workers or os.cpu_count()} workers')
+
+    start = time.perf_counter()
+    with Pool(workers, initializer=_init_worker, initargs=(rows, cols, connect, depth, time_budget)) as pool:
+        entries = pool.map(_solve, openings, chunksize=max(1, len(openings) // (8 * (workers or os.cpu_count()))))
+
+    write_book(path, rows, cols, connect, entries)
+    print(f'Wrote {len(entries)} moves to {path} in {time.perf_counter() - start:.1f}s')
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an opening book for Four in a Row.')
+    parser.add_argument('--size', type=int, default=5, help='rows and columns (like BOARD_SIZE)')
+    parser.add_argument('--connect', type=int, default=4)
+    parser.add_argument('--plies', type=int, default=6, help='book covers positions up to this many coins')
+    parser.add_argument('--depth', type=int, default=12, help='search depth per position')
+    parser.add_argument('--time', type=float, default=2.0, help='seconds per position')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None)
+    args = parser.parse_args()
+    build_book(args.size, args.size, args.connect, args.plies, args.depth, args.time, args.workers, args.output)
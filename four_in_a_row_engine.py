@@ -0,0 +1,378 @@
+""" FOUR IN A ROW - engine and computer player
+
+Position keeps one bitboard per player (1 and -1) plus the next free bit of every column, so dropping
+and taking back a coin are O(1). Bits are numbered column after column, starting at the bottom, and
+every column has one extra empty bit on top so shifts never connect coins of neighbouring columns.
+
+Every position has its own number of rows, columns and coins to connect (connect-k). For full boards
+that weren't built move by move (loaded or imported positions, batches of positions), find_lines()
+checks all lines at once with sliding-window sums over NumPy arrays.
+
+Searcher plays with negamax and alpha-beta pruning. Moves are tried center first (after the best move
+stored for the position), the search deepens iteratively until the time budget is spent, and positions
+are cached in a fixed-size transposition table indexed by their Zobrist hash.
+"""
+
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+WIN_SCORE = 1 << 40
+WIN_BOUND = WIN_SCORE >> 1  # scores beyond this are wins or losses, less by the plies they are away
+MASK_64 = (1 << 64) - 1
+MAX_KEY_TABLE = 1 << 16     # boards with more cells compute their Zobrist keys on the fly
+
+
+def zobrist_key(player, index) -> int:
+    """Random-looking 64-bit key of a coin (splitmix64), computed instead of stored so huge boards
+    need no key tables. Keys never change between runs, opening books rely on that.
+    """
+    x = (2 * index + (player > 0) + 1) * 0x9E3779B97F4A7C15 & MASK_64
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & MASK_64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & MASK_64
+    return x ^ (x >> 31)
+
+
+class ComputedKeys:
+    """Stands in for a key table of one player on huge boards."""
+    def __init__(self, player):
+        self.player = player
+
+    def __getitem__(self, index):
+        return zobrist_key(self.player, index)
+
+
+class Position:
+    def __init__(self, rows: int, cols: int, connect: int = 4):
+        self.rows = rows
+        self.cols = cols
+        self.connect = connect
+        self.height = rows + 1
+        self.directions = [1, self.height, self.height + 1, self.height - 1]   # | - / \
+        self.bottom = sum(1 << (col * self.height) for col in range(cols))
+        self.board_mask = self.bottom * ((1 << rows) - 1)
+        self.order = sorted(range(cols), key=lambda col: abs(2 * col - cols + 1))    # center first
+
+        cells = cols * self.height
+        self.keys = {player: [zobrist_key(player, index) for index in range(cells)] if cells <= MAX_KEY_TABLE
+                     else ComputedKeys(player) for player in (1, -1)}
+        self.reset()
+
+    def reset(self):
+        self.coins = {1: 0, -1: 0}
+        self.heights = [col * self.height for col in range(self.cols)]  # next free bit of each column
+        self.history = []   # bit index of every coin played
+        self.count = 0      # coins on the board
+        self.player = 1     # player to move
+        self.hash = 0
+
+    def set_board(self, board):
+        """Take over an array of 1, -1 and 0 (row 0 is the top). The history starts empty."""
+        self.reset()
+        for col in range(self.cols):
+            column = np.asarray(board)[::-1, col]     # bottom up
+            filled = np.flatnonzero(column)
+            if filled.size and filled[-1] != filled.size - 1:
+                raise ValueError(f'Column {col + 1} has a gap below a coin')
+            for height in filled:
+                index = col * self.height + int(height)
+                player = int(column[height])
+                self.coins[player] |= 1 << index
+                self.hash ^= self.keys[player][index]
+            self.heights[col] += filled.size
+            self.count += filled.size
+
+        ones, others = (np.asarray(board) == 1).sum(), (np.asarray(board) == -1).sum()
+        if not 0 <= ones - others <= 1:
+            raise ValueError(f'{ones} and {others} coins can\'t come from alternating moves')
+        self.player = 1 if ones == others else -1
+
+    def copy(self):
+        position = Position.__new__(Position)
+        position.__dict__.update(self.__dict__)
+        position.coins = dict(self.coins)
+        position.heights = list(self.heights)
+        position.history = list(self.history)
+        return position
+
+    def can_play(self, col: int) -> bool:
+        return self.heights[col] < col * self.height + self.rows
+
+    def play(self, col: int) -> int:
+        """Drop a coin of the player to move into col. Return its row (0 is the top row)."""
+        index = self.heights[col]
+        self.coins[self.player] |= 1 << index
+        self.hash ^= self.keys[self.player][index]
+        self.heights[col] += 1
+        self.history.append(index)
+        self.count += 1
+        self.player = -self.player
+        return self.rows - 1 - (index - col * self.height)
+
+    def undo(self) -> int:
+        """Take back the last coin. Return its column."""
+        index = self.history.pop()
+        col = index // self.height
+        self.player = -self.player
+        self.heights[col] -= 1
+        self.count -= 1
+        self.coins[self.player] ^= 1 << index
+        self.hash ^= self.keys[self.player][index]
+        return col
+
+    def last_coin(self, player) -> int:
+        """Bit of the last coin player dropped (0 if none)."""
+        back = 1 if self.player != player else 2
+        return 1 << self.history[-back] if len(self.history) >= back else 0
+
+    def is_winner(self, player) -> bool:
+        """Check the four lines through the last coin of player for connect coins in a row.
+        Grow the coin along each direction by shifting and masking with the player's bitboard.
+        """
+        coins = self.coins[player]
+        for shift in self.directions:
+            line = self.last_coin(player)
+            for _ in range(self.connect - 1):
+                line |= ((line << shift) | (line >> shift)) & coins
+            if bin(line).count('1') >= self.connect:
+                return True
+        return False
+
+    def is_full(self) -> bool:
+        return self.count == self.rows * self.cols
+
+    def playable(self) -> int:
+        """Bits of all cells a coin can be dropped into."""
+        return (self.board_mask & ~(self.coins[1] | self.coins[-1])) & (
+            (self.coins[1] | self.coins[-1]) + self.bottom)
+
+    def threats(self, player) -> int:
+        """Empty cells that complete a line of player."""
+        coins = self.coins[player]
+        k = self.connect
+        cells = 0
+        for shift in self.directions:
+            up = [-1]
+            down = [-1]
+            for i in range(1, k):
+                up.append(up[-1] & (coins << (i * shift)))
+                down.append(down[-1] & (coins >> (i * shift)))
+            for i in range(k):
+                cells |= up[i] & down[k - 1 - i]
+        return cells & self.board_mask & ~(self.coins[1] | self.coins[-1])
+
+
+def find_lines(boards, connect=4) -> dict:
+    """Check whole boards for lines of connect coins.
+    boards holds 1, -1 and 0 with rows and columns on the last two axes, any axes before are a batch.
+    Return {1: wins, -1: wins} with a boolean per board.
+
+    The sum of every window of connect cells (row, column and both diagonals) is built from strided
+    views, a window belongs to a player when the sum is connect times the player's value.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    k = connect
+    sums = []
+    if boards.shape[-1] >= k:
+        sums.append(sliding_window_view(boards, k, axis=-1).sum(axis=-1, dtype=np.int32))
+    if boards.shape[-2] >= k:
+        sums.append(sliding_window_view(boards, k, axis=-2).sum(axis=-1, dtype=np.int32))
+    if boards.shape[-1] >= k and boards.shape[-2] >= k:
+        squares = sliding_window_view(boards, (k, k), axis=(-2, -1))
+        sums.append(np.trace(squares, axis1=-2, axis2=-1, dtype=np.int32))
+        sums.append(np.trace(squares[..., ::-1], axis1=-2, axis2=-1, dtype=np.int32))
+
+    batch = boards.shape[:-2]
+    wins = {}
+    for player in (1, -1):
+        found = np.zeros(batch, dtype=bool)
+        for window_sums in sums:
+            found |= (window_sums == player * k).any(axis=(-2, -1))
+        wins[player] = found
+    return wins
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class TranspositionTable:
+    """Fixed number of slots indexed by the low bits of the Zobrist hash.
+    A slot is replaced when it is empty, holds the same position, is left over from an older search or
+    was searched less deep.
+    """
+    EXACT, LOWER, UPPER = range(3)
+
+    def __init__(self, bits=20):
+        self.mask = (1 << bits) - 1
+        self.slots = [None] * (1 << bits)
+        self.age = 0
+
+    def get(self, key):
+        entry = self.slots[key & self.mask]
+        if entry and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key, depth, flag, value, move):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or entry[5] != self.age or depth >= entry[1]:
+            self.slots[index] = (key, depth, flag, value, move, self.age)
+
+
+def to_table(value, ply):
+    """Win and loss scores count the plies from the root, the transposition table keeps them from the
+    node so they hold wherever the position turns up again.
+    """
+    if value > WIN_BOUND:
+        return value + ply
+    if value < -WIN_BOUND:
+        return value - ply
+    return value
+
+
+def from_table(value, ply):
+    if value > WIN_BOUND:
+        return value - ply
+    if value < -WIN_BOUND:
+        return value + ply
+    return value
+
+
+class Searcher:
+    """Find a column for the player to move.
+
+    time_budget :   seconds per move, iterative deepening stops when it runs out
+    max_depth :     stop deepening here (default: until the board is full)
+    tt_bits :       the transposition table has 2**tt_bits slots
+    """
+    def __init__(self, time_budget=1.0, max_depth=None, tt_bits=20):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table = TranspositionTable(tt_bits)
+        self.deadline = None
+        self.nodes = 0
+        self.reached_depth = 0
+
+    def best_move(self, position: Position) -> int:
+        position = position.copy()
+        moves = [col for col in position.order if position.can_play(col)]
+
+        # win right away
+        wins = position.threats(position.player) & position.playable()
+        if wins:
+            return self._column(position, wins)
+
+        self.table.age += 1
+        self.deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        self.nodes = 0
+        self.reached_depth = 0
+        best = moves[0]
+        remaining = position.rows * position.cols - position.count
+        max_depth = min(self.max_depth or remaining, remaining)
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self.search_root(position, moves, depth)
+            except OutOfTime:
+                break
+            best = move
+            self.reached_depth = depth
+            if abs(score) >= WIN_SCORE - position.rows * position.cols:
+                break   # forced win or loss found
+
+        return best
+
+    def search_root(self, position, moves, depth):
+        entry = self.table.get(position.hash)
+        if entry and entry[4] in moves:
+            moves = [entry[4]] + [col for col in moves if col != entry[4]]
+
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best = moves[0]
+        for col in moves:
+            position.play(col)
+            score = -self.negamax(position, depth - 1, -beta, -alpha, 1)
+            position.undo()
+            if score > alpha:
+                alpha, best = score, col
+
+        self.table.put(position.hash, depth, TranspositionTable.EXACT, alpha, best)
+        return alpha, best
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.deadline and not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise OutOfTime
+
+        player = position.player
+        opponent = -player
+
+        # wins are found one move ahead (threats), so the last move never won
+        if position.is_full():
+            return 0
+
+        playable = position.playable()
+        if position.threats(player) & playable:
+            return WIN_SCORE - ply - 1
+        if depth <= 0:
+            return self.evaluate(position)
+
+        original_alpha = alpha
+        entry = self.table.get(position.hash)
+        tt_move = None
+        if entry:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                flag, value = entry[2], from_table(entry[3], ply)
+                if flag == TranspositionTable.EXACT:
+                    return value
+                if flag == TranspositionTable.LOWER:
+                    alpha = max(alpha, value)
+                elif flag == TranspositionTable.UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        # moves right below an opponent threat lose at once, try them last
+        losing = position.threats(opponent) >> 1
+        moves = [col for col in position.order if position.can_play(col)]
+        moves.sort(key=lambda col: (col != tt_move, bool(losing & (1 << position.heights[col]))))
+
+        best_value = -WIN_SCORE - 1
+        best_move = moves[0]
+        for col in moves:
+            position.play(col)
+            value = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.undo()
+            if value > best_value:
+                best_value, best_move = value, col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = TranspositionTable.UPPER
+        elif best_value >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self.table.put(position.hash, depth, flag, to_table(best_value, ply), best_move)
+        return best_value
+
+    def evaluate(self, position) -> int:
+        """Score for the player to move: own threats minus the opponent's, plus center coins."""
+        player = position.player
+        score = 0
+        for who, sign in ((player, 1), (-player, -1)):
+            score += sign * 10 * bin(position.threats(who)).count('1')
+            for distance, col in enumerate(position.order[:3]):
+                column = position.coins[who] >> (col * position.height)
+                score += sign * (3 - distance) * bin(column & ((1 << position.rows) - 1)).count('1')
+        return score
+
+    def _column(self, position, bits):
+        lowest = (bits & -bits).bit_length() - 1
+        return lowest // position.height
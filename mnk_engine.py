@@ -0,0 +1,262 @@
+""" m,n,k games (Tic Tac Toe, Gomoku, ...) - engine and computer player
+
+Board has rows x cols cells (cell = row * cols + col) and a player wins with connect marks in a row.
+Every line segment of connect cells is a window. Each move updates only the windows through its cell
+(at most 4 * connect of them), and everything the game and the search need is kept up to date there:
+
+    counts      marks of each player per window, a window reaching connect wins
+    score       pattern value of the board for player 1: every window that holds marks of one player
+                only is worth WEIGHTS[marks] for that player, so open fours outweigh threes and so on
+    fours       windows per player that are one mark short of a win with the rest empty (threats)
+    candidates  empty cells within RADIUS of a mark, the only moves the computer looks at
+
+undo() takes a move back in the same time, so the search never copies or rescans the board.
+
+Searcher plays with negamax and alpha-beta pruning. Below the root it looks at the WIDTH most
+promising candidates only (ranked by how much they attack and defend), answers a threat by blocking
+it and deepens iteratively until the time budget runs out.
+"""
+
+import time
+
+
+RADIUS = 2          # candidates are this close to a mark (king moves)
+WIDTH = 10          # candidates searched per node
+WIN_SCORE = 1 << 40
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Board:
+    def __init__(self, rows=15, cols=15, connect=5):
+        self.rows, self.cols, self.connect = rows, cols, connect
+        self.weights = [8 ** marks for marks in range(connect + 1)]
+        self.weights[0] = 0
+
+        self.windows = []
+        for dr, dc in DIRECTIONS:
+            for row in range(rows):
+                for col in range(cols):
+                    end_row, end_col = row + dr * (connect - 1), col + dc * (connect - 1)
+                    if 0 <= end_row < rows and 0 <= end_col < cols:
+                        self.windows.append([(row + dr * i) * cols + col + dc * i for i in range(connect)])
+
+        self.cell_windows = [[] for _ in range(rows * cols)]
+        for nr, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(nr)
+
+        self.neighbours = []
+        for row in range(rows):
+            for col in range(cols):
+                self.neighbours.append([
+                    r * cols + c
+                    for r in range(max(0, row - RADIUS), min(rows, row + RADIUS + 1))
+                    for c in range(max(0, col - RADIUS), min(cols, col + RADIUS + 1))
+                    if (r, c) != (row, col)
+                ])
+        self.reset()
+
+    def reset(self, player=1):
+        self.player = player
+        self.cells = [0] * (self.rows * self.cols)
+        self.masks = {1: 0, -1: 0}
+        self.counts = {1: [0] * len(self.windows), -1: [0] * len(self.windows)}
+        self.fours = {1: 0, -1: 0}
+        self.near = [0] * (self.rows * self.cols)
+        self.candidates = set()
+        self.score = 0
+        self.winner = None
+        self.history = []       # (cell, score change, winner before)
+
+    def is_full(self) -> bool:
+        return len(self.history) == len(self.cells)
+
+    def play(self, cell):
+        player = self.player
+        mine, theirs = self.counts[player], self.counts[-player]
+        weights, last = self.weights, self.connect - 1
+        winner = self.winner
+        delta = 0
+
+        for nr in self.cell_windows[cell]:
+            count = mine[nr]
+            if not theirs[nr]:
+                delta += weights[count + 1] - weights[count]
+                if count == last - 1:
+                    self.fours[player] += 1
+                elif count == last:
+                    self.fours[player] -= 1
+                    self.winner = player
+            elif not count:
+                delta += weights[theirs[nr]]
+                if theirs[nr] == last:
+                    self.fours[-player] -= 1
+            mine[nr] = count + 1
+
+        self.cells[cell] = player
+        self.masks[player] |= 1 << cell
+        self.score += player * delta
+        self.candidates.discard(cell)
+        for neighbour in self.neighbours[cell]:
+            self.near[neighbour] += 1
+            if not self.cells[neighbour]:
+                self.candidates.add(neighbour)
+
+        self.history.append((cell, player * delta, winner))
+        self.player = -player
+
+    def undo(self):
+        cell, delta, self.winner = self.history.pop()
+        player = self.cells[cell]
+        mine, theirs = self.counts[player], self.counts[-player]
+        last = self.connect - 1
+
+        for nr in self.cell_windows[cell]:
+            count = mine[nr] = mine[nr] - 1
+            if not theirs[nr]:
+                if count == last:
+                    self.fours[player] += 1
+                elif count == last - 1:
+                    self.fours[player] -= 1
+            elif not count and theirs[nr] == last:
+                self.fours[-player] += 1
+
+        self.cells[cell] = 0
+        self.masks[player] &= ~(1 << cell)
+        self.score -= delta
+        for neighbour in self.neighbours[cell]:
+            self.near[neighbour] -= 1
+            if not self.near[neighbour]:
+                self.candidates.discard(neighbour)
+        if self.near[cell]:
+            self.candidates.add(cell)
+        self.player = player
+
+    def threat_cells(self, player):
+        """Empty cells that win at once for player: the open cell of every window one mark short."""
+        mine, theirs = self.counts[player], self.counts[-player]
+        last, cells = self.connect - 1, self.cells
+        threats = set()
+        if self.fours[player]:
+            for nr, window in enumerate(self.windows):
+                if mine[nr] == last and not theirs[nr]:
+                    threats.update(cell for cell in window if not cells[cell])
+        return sorted(threats)
+
+    def move_value(self, cell) -> int:
+        """How much a mark on cell builds the mover's windows (counted twice) and blocks the opponent's."""
+        mine, theirs = self.counts[self.player], self.counts[-self.player]
+        weights = self.weights
+        value = 0
+        for nr in self.cell_windows[cell]:
+            if not theirs[nr]:
+                value += 2 * (weights[mine[nr] + 1] - weights[mine[nr]])
+            elif not mine[nr]:
+                value += weights[theirs[nr] + 1] - weights[theirs[nr]]
+        return value
+
+    def ordered_moves(self):
+        """Candidates, most promising first. On an empty board only the center."""
+        if not self.history:
+            return [self.rows // 2 * self.cols + self.cols // 2]
+        if not self.candidates:
+            return [cell for cell, player in enumerate(self.cells) if not player]
+        return sorted(self.candidates, key=self.move_value, reverse=True)
+
+
+class Searcher:
+    """Find a cell for the player to move.
+
+    time_budget :   seconds per move, iterative deepening stops when it runs out
+    max_depth :     stop deepening here
+    width :         candidates searched per node below the root (the root searches all of them)
+    """
+    def __init__(self, time_budget=1.0, max_depth=8, width=WIDTH):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.width = width
+        self.deadline = None
+        self.nodes = 0
+        self.reached_depth = 0
+
+    def best_move(self, board: Board) -> int:
+        # a threat of the mover wins at once, one of the opponent has to be blocked
+        wins = board.threat_cells(board.player)
+        if wins:
+            return wins[0]
+        blocks = board.threat_cells(-board.player)
+        if blocks:
+            return max(blocks, key=board.move_value)
+
+        moves = board.ordered_moves()
+
+        self.deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        self.nodes = 0
+        self.reached_depth = 0
+        best = moves[0]
+        remaining = len(board.cells) - len(board.history)
+
+        for depth in range(1, min(self.max_depth, remaining) + 1):
+            try:
+                score, moves = self.search_root(board, moves, depth)
+            except OutOfTime:
+                # take back the moves of the interrupted search
+                while len(board.history) > len(board.cells) - remaining:
+                    board.undo()
+                break
+            best = moves[0]
+            self.reached_depth = depth
+            if abs(score) >= WIN_SCORE - len(board.cells):
+                break   # forced win or loss found
+
+        return best
+
+    def search_root(self, board, moves, depth):
+        """Search all root moves, return the best score and the moves sorted by score."""
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        scores = {}
+        for cell in moves:
+            board.play(cell)
+            scores[cell] = -self.negamax(board, depth - 1, -beta, -alpha, 1)
+            board.undo()
+            alpha = max(alpha, scores[cell])
+        return alpha, sorted(moves, key=scores.get, reverse=True)
+
+    def negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.deadline and not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise OutOfTime
+
+        player = board.player
+        if board.winner:
+            return -WIN_SCORE + ply
+        if board.is_full():
+            return 0
+        if board.fours[player]:
+            return WIN_SCORE - ply - 1
+        forced = board.fours[-player] > 0
+        if depth <= 0 and not forced:
+            return player * board.score
+
+        # every move but a block of an opponent threat loses,
+        # so forced blocks are searched on without costing depth
+        if forced:
+            moves = board.threat_cells(-player)
+            depth = max(depth, 1)
+        else:
+            moves = board.ordered_moves()[:self.width]
+
+        best_value = -WIN_SCORE - 1
+        for cell in moves:
+            board.play(cell)
+            value = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.undo()
+            best_value = max(best_value, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return best_value
@@ -0,0 +1,260 @@
+""" Record and replay games of 2048
+
+A game is stored as the seed of its random generator, the swipes packed into 2 bits each and the
+spawned tiles (cell index * 2, +1 for a 4) plus the final board as tile exponents. Games are appended
+to one binary archive file:
+
+    header      '<4sB'   magic b'2048', format version
+    per game    '<QBI'   seed, board size, number of moves
+                         moves       ceil(moves / 4) bytes, 2 bits per move, first move in the low bits
+                         spawns      moves + 2 values, uint8 for boards up to 11x11, uint16 for bigger ones
+                         final board size * size bytes of tile exponents
+
+replay() re-executes a single game with its seeded random generator and checks every spawn and the
+final board. replay_many() advances whole batches of games at once with the vectorized engine of
+batch_2048.py, which replays archives far faster than real time.
+
+Usage: python replay_2048.py games.bin
+       python replay_2048.py --record 1000 games.bin     (fill an archive with random games)
+"""
+
+import struct
+import sys
+import time
+import numpy as np
+import batch_2048 as batch
+
+
+MAGIC = b'2048'
+VERSION = 1
+HEADER = struct.Struct('<4sB')
+GAME_HEADER = struct.Struct('<QBI')
+
+
+class ReplayError(Exception):
+    pass
+
+
+class GameRecord:
+    def __init__(self, seed, size, moves=None, spawns=None, final_board=None):
+        self.seed = seed
+        self.size = size
+        self.moves = [] if moves is None else moves             # direction codes, see batch.DIRECTIONS
+        self.spawns = [] if spawns is None else spawns          # cell * 2 + (tile == 4)
+        self.final_board = final_board                          # tile values
+
+
+class Recorder:
+    """Collect moves and spawns while a game is played."""
+    def __init__(self, seed, size):
+        self.record = GameRecord(seed, size)
+
+    def spawn(self, cell, value):
+        self.record.spawns.append(2 * int(cell) + (value == 4))
+
+    def move(self, direction):
+        if isinstance(direction, str):
+            direction = batch.DIRECTIONS.index(direction)
+        self.record.moves.append(direction)
+
+    def finish(self, board):
+        self.record.final_board = np.array(board)
+        return self.record
+
+
+def pack_moves(moves) -> bytes:
+    codes = np.zeros(-(-len(moves) // 4) * 4, dtype=np.uint8)
+    codes[:len(moves)] = moves
+    codes = codes.reshape(-1, 4) << np.array([0, 2, 4, 6], dtype=np.uint8)
+    return np.bitwise_or.reduce(codes, axis=1).astype(np.uint8).tobytes()
+
+
+def unpack_moves(data: bytes, count: int):
+    packed = np.frombuffer(data, dtype=np.uint8)
+    codes = (packed[:, np.newaxis] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+    return codes.ravel()[:count]
+
+
+def spawn_dtype(size):
+    return np.uint8 if 2 * size * size <= 256 else np.uint16
+
+
+def to_exponents(board):
+    board = np.asarray(board)
+    exponents = np.zeros(board.shape, dtype=np.uint8)
+    filled = board > 0
+    exponents[filled] = np.log2(board[filled]).astype(np.uint8)
+    return exponents
+
+
+def from_exponents(exponents):
+    exponents = np.asarray(exponents, dtype=np.int64)
+    return np.where(exponents > 0, 1 << exponents, 0)
+
+
+def encode_record(record: GameRecord) -> bytes:
+    if len(record.spawns) != len(record.moves) + 2:
+        raise ReplayError(f'{len(record.moves)} moves need {len(record.moves) + 2} spawns, got {len(record.spawns)}')
+
+    return b''.join([
+        GAME_HEADER.pack(record.seed, record.size, len(record.moves)),
+        pack_moves(record.moves),
+        np.asarray(record.spawns, dtype=spawn_dtype(record.size)).tobytes(),
+        to_exponents(record.final_board).tobytes(),
+    ])
+
+
+def write_records(path, records, append=True):
+    """Append records to the archive at path (create it with a header if needed)."""
+    try:
+        with open(path, 'rb') as f:
+            has_header = append and f.read(HEADER.size)[:4] == MAGIC
+    except FileNotFoundError:
+        has_header = False
+
+    with open(path, 'ab' if has_header else 'wb') as f:
+        if not has_header:
+            f.write(HEADER.pack(MAGIC, VERSION))
+        for record in records:
+            f.write(encode_record(record))
+
+
+def read_records(path):
+    """Yield all GameRecords stored in the archive at path."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f'{path} is not a 2048 replay archive (version {VERSION})')
+
+    offset = HEADER.size
+    while offset < len(data):
+        seed, size, count = GAME_HEADER.unpack_from(data, offset)
+        offset += GAME_HEADER.size
+
+        moves_len = -(-count // 4)
+        moves = unpack_moves(data[offset:offset + moves_len], count)
+        offset += moves_len
+
+        dtype = spawn_dtype(size)
+        spawns = np.frombuffer(data, dtype=dtype, count=count + 2, offset=offset)
+        offset += (count + 2) * np.dtype(dtype).itemsize
+
+        exponents = np.frombuffer(data, dtype=np.uint8, count=size * size, offset=offset)
+        offset += size * size
+
+        yield GameRecord(seed, size, moves, spawns, from_exponents(exponents.reshape(size, size)))
+
+
+def _spawn_code(board, cell):
+    return 2 * int(cell) + (board.flat[cell] == 4)
+
+
+def replay(record: GameRecord):
+    """Re-execute a game with its seeded random generator. Raise ReplayError on any mismatch."""
+    rng = np.random.default_rng(record.seed)
+    board = np.zeros((record.size, record.size), dtype=np.int64)
+    spawns = []
+
+    for _ in range(2):
+        cell = batch.add_new_tiles(board[np.newaxis], rng)[0]
+        spawns.append(_spawn_code(board, cell))
+
+    for nr, direction in enumerate(record.moves):
+        swiped, _, changed = batch.move(board[np.newaxis], int(direction))
+        if not changed[0]:
+            raise ReplayError(f'move {nr} ({batch.DIRECTIONS[direction]}) does not change the board')
+        board = swiped[0]
+        cell = batch.add_new_tiles(board[np.newaxis], rng)[0]
+        spawns.append(_spawn_code(board, cell))
+
+    if list(spawns) != [int(spawn) for spawn in record.spawns]:
+        raise ReplayError(f'spawns of game with seed {record.seed} differ from the log')
+    if not np.array_equal(board, record.final_board):
+        raise ReplayError(f'final board of game with seed {record.seed} differs from the log')
+    return board
+
+
+def replay_many(records):
+    """Replay games of one board size side by side from their logged spawns.
+    Return the final boards and a mask of games that match their log.
+    """
+    n = len(records)
+    size = records[0].size
+    if any(record.size != size for record in records):
+        raise ReplayError('replay_many needs games of one board size')
+
+    counts = np.array([len(record.moves) for record in records])
+    moves = np.full((n, counts.max(initial=0)), -1, dtype=np.int8)
+    spawns = np.zeros((n, moves.shape[1] + 2), dtype=np.int64)
+    for i, record in enumerate(records):
+        moves[i, :counts[i]] = record.moves
+        spawns[i, :counts[i] + 2] = record.spawns
+
+    boards = np.zeros((n, size, size), dtype=np.int64)
+    games = np.arange(n)
+    valid = np.ones(n, dtype=bool)
+
+    def place(step, active):
+        cells, fours = divmod(spawns[active, step], 2)
+        flat = boards.reshape(n, -1)
+        valid[active] &= flat[active, cells] == 0
+        flat[active, cells] = np.where(fours, 4, 2)
+
+    place(0, games)
+    place(1, games)
+    for step in range(moves.shape[1]):
+        active = games[counts > step]
+        boards[active], _, changed = batch.move_each(boards[active], moves[active, step])
+        valid[active] &= changed
+        place(step + 2, active)
+
+    final = np.array([record.final_board for record in records])
+    valid &= (boards == final).all(axis=(1, 2))
+    return boards, valid
+
+
+def record_random_game(seed, size=4, strategy_seed=None):
+    """Play a game with random swipes and return its GameRecord."""
+    rng = np.random.default_rng(seed)
+    strategy = np.random.default_rng(strategy_seed)
+    board = np.zeros((size, size), dtype=np.int64)
+    recorder = Recorder(seed, size)
+
+    for _ in range(2):
+        cell = batch.add_new_tiles(board[np.newaxis], rng)[0]
+        recorder.spawn(cell, board.flat[cell])
+
+    while batch.can_move(board[np.newaxis])[0]:
+        direction = int(strategy.integers(4))
+        swiped, _, changed = batch.move(board[np.newaxis], direction)
+        if changed[0]:
+            board = swiped[0]
+            recorder.move(direction)
+            cell = batch.add_new_tiles(board[np.newaxis], rng)[0]
+            recorder.spawn(cell, board.flat[cell])
+
+    return recorder.finish(board)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--record']:
+        count, path = int(sys.argv[2]), sys.argv[3]
+        write_records(path, (record_random_game(seed, strategy_seed=seed) for seed in range(count)))
+        print(f'Recorded {count} games to {path}')
+        sys.exit()
+
+    records = list(read_records(sys.argv[1]))
+    total_moves = sum(len(record.moves) for record in records)
+
+    start = time.perf_counter()
+    failed = 0
+    for size in sorted({record.size for record in records}):
+        _, valid = replay_many([record for record in records if record.size == size])
+        failed += int((~valid).sum())
+    elapsed = time.perf_counter() - start
+
+    print(f'Replayed {len(records)} games ({total_moves} moves) in {elapsed:.2f}s, '
+          f'{total_moves / elapsed:,.0f} moves/s. {failed} games differ from their log.')
+    sys.exit(1 if failed else 0)
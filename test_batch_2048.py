@@ -0,0 +1,71 @@
+import numpy as np
+import batch_2048 as batch
+import bitboard_2048 as bb
+
+
+def random_boards(n, seed=0, fill=0.7, size=4):
+    rng = np.random.default_rng(seed)
+    values = 1 << rng.integers(1, 12, size=(n, size, size))
+    return np.where(rng.random((n, size, size)) < fill, values, 0).astype(np.int64)
+
+
+def test_moves_match_the_bitboard_engine():
+    boards = random_boards(500)
+    for code, direction in enumerate(batch.DIRECTIONS):
+        moved, scores, changed = batch.move(boards, code)
+        for board, new_board, score, board_changed in zip(boards, moved, scores, changed):
+            bitboard = bb.encode(board)
+            expected, expected_score = bb.move(bitboard, direction)
+            assert bb.encode(new_board) == expected
+            assert score == expected_score
+            assert board_changed == (expected != bitboard)
+
+
+def test_can_move_matches_the_bitboard_engine():
+    boards = random_boards(500, seed=1, fill=0.95)
+    boards[0] = [[2, 4, 2, 4], [4, 2, 4, 2], [2, 4, 2, 4], [4, 2, 4, 2]]
+    expected = [not bb.no_more_moves(bb.encode(board)) for board in boards]
+    assert batch.can_move(boards).tolist() == expected
+
+
+def test_move_each_takes_a_direction_per_board():
+    boards = random_boards(100, seed=2)
+    directions = np.random.default_rng(3).integers(-1, 4, size=100)   # -1 leaves the board alone
+    moved, scores, changed = batch.move_each(boards, directions)
+    for i, direction in enumerate(directions):
+        if direction < 0:
+            assert np.array_equal(moved[i], boards[i]) and not changed[i]
+        else:
+            single, score, _ = batch.move(boards[i:i + 1], direction)
+            assert np.array_equal(moved[i], single[0]) and scores[i] == score[0]
+
+
+def test_new_tiles_go_to_empty_cells():
+    boards = random_boards(200, seed=4, fill=0.5)
+    before = boards.copy()
+    mask = np.arange(200) % 3 > 0
+    cells = batch.add_new_tiles(boards, np.random.default_rng(5), mask)
+    for i, cell in enumerate(cells):
+        if not mask[i] or not (before[i] == 0).any():
+            assert cell == -1 and np.array_equal(boards[i], before[i])
+        else:
+            assert before[i].flat[cell] == 0 and boards[i].flat[cell] in (2, 4)
+            assert (boards[i] != before[i]).sum() == 1
+
+
+def test_simulator_plays_until_every_game_is_over():
+    simulator = batch.BatchSimulator(50, seed=6)
+    scores = simulator.run()
+    assert not simulator.alive.any()
+    assert (scores > 0).all() and (simulator.moves > 0).all()
+    assert (simulator.max_tiles() >= 16).all()
+
+
+def test_bigger_boards():
+    boards = random_boards(50, seed=7, size=6)
+    moved, _, _ = batch.move(boards, 'left')
+    assert moved.shape == boards.shape
+    assert (moved.sum(axis=(1, 2)) == boards.sum(axis=(1, 2))).all()
+    for row in moved.reshape(-1, 6).tolist():
+        tiles = [tile for tile in row if tile]
+        assert row == tiles + [0] * (6 - len(tiles))
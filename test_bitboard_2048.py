@@ -0,0 +1,57 @@
+import random
+import bitboard_2048 as bb
+
+
+def random_board(rng, fill=0.7, max_exponent=11):
+    return bb.encode([[1 << rng.randint(1, max_exponent) if rng.random() < fill else 0 for _ in range(4)]
+                      for _ in range(4)])
+
+
+def test_encode_decode_round_trip():
+    grid = [[0, 2, 4, 8], [16, 0, 0, 32768], [2, 2, 2, 2], [0, 0, 0, 1024]]
+    assert bb.decode(bb.encode(grid)) == grid
+
+
+def test_row_moves():
+    board = bb.encode([[2, 2, 4, 4], [0, 2, 0, 2], [2, 2, 2, 0], [4, 0, 0, 4]])
+    left, score = bb.move(board, 'left')
+    assert bb.decode(left) == [[4, 8, 0, 0], [4, 0, 0, 0], [4, 2, 0, 0], [8, 0, 0, 0]]
+    assert score == 4 + 8 + 4 + 4 + 8
+    right, _ = bb.move(board, 'right')
+    assert bb.decode(right) == [[0, 0, 4, 8], [0, 0, 0, 4], [0, 0, 2, 4], [0, 0, 0, 8]]
+
+
+def test_column_moves_follow_the_scene_rows():
+    # row 0 is the bottom row: 'down' moves towards it, 'up' away from it
+    board = bb.encode([[2, 0, 0, 0], [2, 0, 0, 0], [0, 0, 0, 0], [4, 0, 0, 0]])
+    assert bb.decode(bb.move(board, 'down')[0])[0][0] == 4
+    assert bb.decode(bb.move(board, 'down')[0])[1][0] == 4
+    assert bb.decode(bb.move(board, 'up')[0])[3][0] == 4
+    assert bb.decode(bb.move(board, 'up')[0])[2][0] == 4
+
+
+def test_biggest_tiles_do_not_merge():
+    board = bb.encode([[32768, 32768, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+    assert bb.move(board, 'left') == (board, 0)
+
+
+def test_transpose():
+    rng = random.Random(1)
+    for _ in range(100):
+        board = random_board(rng)
+        grid = bb.decode(board)
+        assert bb.decode(bb.transpose(board)) == [list(col) for col in zip(*grid)]
+
+
+def test_empty_cells_and_game_over():
+    rng = random.Random(2)
+    for _ in range(200):
+        board = random_board(rng, fill=0.9)
+        grid = bb.decode(board)
+        empty = [4 * r + c for r in range(4) for c in range(4) if not grid[r][c]]
+        assert bb.empty_cells(board) == empty
+        assert bb.count_empty(board) == len(empty)
+        assert bb.no_more_moves(board) == (not any(bb.can_move(board, d) for d in bb.DIRECTIONS))
+
+    full = bb.encode([[2, 4, 2, 4], [4, 2, 4, 2], [2, 4, 2, 4], [4, 2, 4, 2]])
+    assert bb.no_more_moves(full)
@@ -0,0 +1,98 @@
+import itertools
+import os
+import random
+import sys
+from collections import Counter
+import numpy as np
+import pytest
+from code_cracker_advisor import (Advisor, build_matrix, entropies, feedback_patterns, letter_codes,
+                                  pattern_code)
+from code_cracker_words import WordCorpus, write_corpus
+
+# CodeCracker.py imports Pythonista's console, the benchmarks' stand-in does for the tests too
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'stubs'))
+from CodeCracker import check_guess
+
+
+def random_words(count, letters='AEILNRST', length=5, seed=0):
+    """Words from few letters, so repeated letters and yellows are common."""
+    rng = random.Random(seed)
+    return sorted({''.join(rng.choice(letters) for _ in range(length)) for _ in range(count)})
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    words = random_words(300) + ['EERIE', 'LEVEL', 'SLEET', 'STEEL', 'TREES']
+    path = tmp_path / 'test.words'
+    write_corpus(path, words, 5)
+    return WordCorpus(path)
+
+
+def test_patterns_match_check_guess():
+    words = random_words(150) + ['EERIE', 'LEVEL', 'SLEET', 'STEEL', 'TREES', 'ÄPFEL', 'APFEL']
+    codes = letter_codes(words, 5)
+    patterns = feedback_patterns(codes, codes)
+    for (g, guess), (a, answer) in itertools.product(enumerate(words), repeat=2):
+        assert patterns[g, a] == pattern_code(check_guess(answer, guess)), (guess, answer)
+
+
+def test_pattern_code():
+    assert pattern_code(['X'] * 5) == 0
+    assert pattern_code(['G'] * 5) == 3 ** 5 - 1
+    assert pattern_code(['Y', 'X', 'X', 'X', 'G']) == 1 + 2 * 3 ** 4
+
+
+def test_entropies():
+    patterns = np.array([[0, 0, 0, 0], [0, 1, 2, 3], [0, 0, 1, 1]], dtype=np.uint8)
+    assert entropies(patterns, 5).tolist() == [0.0, 2.0, 1.0]
+
+
+def test_matrix_and_opening(tmp_path, corpus):
+    path = tmp_path / 'test.feedback'
+    opening = build_matrix(corpus, path)
+    advisor = Advisor(corpus, path)
+
+    codes = letter_codes(corpus.words, 5)
+    assert np.array_equal(advisor.matrix, feedback_patterns(codes, codes))
+    best = max(range(len(corpus)), key=lambda i: entropies(advisor.matrix[i:i + 1], 5)[0])
+    assert opening == best and advisor.best_guess() == corpus[opening]
+
+
+def test_advisor_finds_every_answer(tmp_path, corpus):
+    path = tmp_path / 'test.feedback'
+    build_matrix(corpus, path)
+    advisor = Advisor(corpus, path)
+    turns = Counter()
+    for answer in corpus.words.tolist():
+        advisor.reset()
+        for turn in range(1, 11):
+            guess = advisor.best_guess()
+            feedback = check_guess(answer, guess)
+            if guess == answer:
+                break
+            advisor.update(guess, feedback)
+            assert answer in [corpus[i] for i in advisor.candidates]
+        turns[turn] += 1
+    assert max(turns) <= 6
+    assert sum(turn * n for turn, n in turns.items()) / len(corpus) < 4.5
+
+
+def test_guesses_outside_the_corpus(tmp_path, corpus):
+    path = tmp_path / 'test.feedback'
+    build_matrix(corpus, path)
+    advisor = Advisor(corpus, path)
+    answer = corpus[7]
+    assert advisor.index('SALTO') is None
+    advisor.update('ZZZZZ', check_guess(answer, 'ZZZZZ'))
+    assert len(advisor.candidates) == len(corpus)
+    advisor.update('SALTO', check_guess(answer, 'SALTO'))
+    expected = [word for word in corpus.words.tolist() if check_guess(word, 'SALTO') == check_guess(answer, 'SALTO')]
+    assert [corpus[i] for i in advisor.candidates] == expected
+
+
+def test_matrix_of_another_corpus_is_rejected(tmp_path, corpus):
+    path = tmp_path / 'test.feedback'
+    build_matrix(corpus, path)
+    write_corpus(tmp_path / 'other.words', random_words(300, seed=1), 5)
+    with pytest.raises(ValueError):
+        Advisor(WordCorpus(tmp_path / 'other.words'), path)
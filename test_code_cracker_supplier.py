@@ -0,0 +1,75 @@
+import time
+import pytest
+from code_cracker_supplier import WordSupplier, serve_stub
+
+
+WORDS = ['TASSE', 'KATZE', 'MÄUSE', 'ZEBRA', 'STRAẞE', 'HAUS', 'BLUME', 'TISCH']
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server = serve_stub(WORDS, **kwargs)
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_port}/word'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def wait_full(supplier, language, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not supplier.queues[language].full():
+        assert time.perf_counter() < deadline, 'queue never filled'
+        time.sleep(0.01)
+
+
+def test_miss_then_hit(stub):
+    supplier = WordSupplier(stub(delay=0.05), queue_size=4, batch=4, timeout=2, backoff=0.01)
+    try:
+        word = supplier.get_word('de', timeout=5)
+        assert supplier.waits['miss'] and not supplier.waits['hit']
+        assert word in WORDS and len(word) == 5
+
+        wait_full(supplier, 'de')
+        supplier.get_word('de', timeout=5)
+        assert len(supplier.waits['hit']) == 1
+        assert supplier.waits['hit'][0] < 0.05     # no network round trip
+    finally:
+        supplier.close()
+
+
+def test_words_are_normalized(stub):
+    supplier = WordSupplier(stub(delay=0), queue_size=20, batch=8, timeout=2, backoff=0.01)
+    try:
+        words = {supplier.get_word('de', timeout=5) for _ in range(20)}
+        assert words <= {'TASSE', 'KATZE', 'MÄUSE', 'ZEBRA', 'BLUME', 'TISCH'}
+    finally:
+        supplier.close()
+
+
+def test_failed_requests_are_retried_on_kept_alive_connections(stub):
+    supplier = WordSupplier(stub(delay=0, fail_every=2), queue_size=6, batch=2, timeout=2, backoff=0.01,
+                            connections=1)
+    try:
+        for _ in range(10):
+            supplier.get_word('de', timeout=5)
+        assert supplier.failures > 0
+        assert len(supplier.fetch_times) >= 5
+        assert supplier.pool.connections[0].opened == 1
+    finally:
+        supplier.close()
+
+
+def test_timeout_when_server_is_too_slow(stub):
+    import queue
+    supplier = WordSupplier(stub(delay=1), queue_size=2, batch=2, timeout=0.2, retries=1, backoff=0.01)
+    try:
+        with pytest.raises(queue.Empty):
+            supplier.get_word('de', timeout=0.3)
+        assert supplier.failures >= 1
+    finally:
+        supplier.close()
@@ -0,0 +1,34 @@
+import random
+import pytest
+from code_cracker_words import HEADER, MAGIC, WordCorpus, normalize, write_corpus
+
+
+WORDS = ['Apfel', 'apfel', 'Bäume', 'Ba\u0308ume', 'Straße', 'Hallo', 'Welt', 'Zwölf', 'Sonne\n', 'ab-cd', 'MUTIG']
+
+
+def test_normalize():
+    assert normalize(' Bäume\n', 5) == 'BÄUME'
+    assert normalize('Ba\u0308ume', 5) == 'BÄUME'  # a + combining diaeresis counts as one letter
+    assert normalize('Maße', 4) is None  # ß would become SS
+    assert normalize('Welt', 5) is None
+    assert normalize('ab-cd', 5) is None
+
+
+def test_corpus_round_trip(tmp_path):
+    path = tmp_path / 'de.words'
+    assert write_corpus(path, WORDS, 5) == 6
+    corpus = WordCorpus(path)
+    assert len(corpus) == 6
+    assert [corpus[i] for i in range(len(corpus))] == ['APFEL', 'BÄUME', 'HALLO', 'MUTIG', 'SONNE', 'ZWÖLF']
+    assert 'ZWÖLF' in corpus and 'WELT' not in corpus and 'ZZZZZ' not in corpus and 'AAAAA' not in corpus
+
+    rng = random.Random(0)
+    drawn = {corpus.random_word(rng) for _ in range(200)}
+    assert drawn == {corpus[i] for i in range(len(corpus))}
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'old.words'
+    path.write_bytes(HEADER.pack(MAGIC, 0, 5, 0))
+    with pytest.raises(ValueError):
+        WordCorpus(path)
@@ -0,0 +1,74 @@
+import math
+import random
+import numpy as np
+from color_catcher_sensors import ExponentialFilter, KalmanFilter, RingBuffer, SensorStream, wrap
+
+
+class ListSource:
+    def __init__(self, attitudes):
+        self.attitudes = attitudes
+        self.started = self.stopped = False
+
+    def start(self):
+        self.started = True
+        self.index = 0
+
+    def read(self):
+        attitude = self.attitudes[self.index]
+        self.index += 1
+        return attitude
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_ring_buffer_keeps_the_last_samples_in_order():
+    buffer = RingBuffer(capacity=4, width=2)
+    for t in range(3):
+        buffer.append(t, (t, -t))
+    assert len(buffer) == 3 and buffer.samples()[:, 0].tolist() == [0, 1, 2]
+    for t in range(3, 10):
+        buffer.append(t, (t, -t))
+    assert len(buffer) == 4 and buffer.count == 10
+    assert buffer.samples().tolist() == [[t, t, -t] for t in range(6, 10)]
+    assert buffer.latest().tolist() == [9, 9, -9]
+
+
+def test_filters_smooth_across_the_wrap_around():
+    # yaw jitters around pi, where the raw values jump between pi and -pi
+    rng = random.Random(0)
+    samples = [(0.0, 0.0, wrap(math.pi + rng.gauss(0, 0.02))) for _ in range(200)]
+    for smoothing in (ExponentialFilter(0.3), KalmanFilter()):
+        estimates = [smoothing(sample)[2] for sample in samples]
+        errors = [abs(wrap(estimate - math.pi)) for estimate in estimates[20:]]
+        raw = [abs(wrap(sample[2] - math.pi)) for sample in samples[20:]]
+        assert max(errors) < 0.03
+        assert np.mean(errors) < np.mean(raw) / 2
+
+
+def test_filters_follow_a_turn():
+    samples = [(0.0, 0.0, wrap(0.01 * i)) for i in range(600)]
+    for smoothing in (ExponentialFilter(0.3), KalmanFilter()):
+        estimates = [smoothing(sample) for sample in samples]
+        assert abs(wrap(estimates[-1][2] - samples[-1][2])) < 0.2
+        smoothing.reset()
+        assert smoothing(samples[0]) == samples[0]
+
+
+def test_sensor_stream():
+    attitudes = [(0.1 * i, 0.0, -0.1 * i) for i in range(10)]
+    source = ListSource(attitudes)
+    stream = SensorStream(source, None, capacity=4)
+    stream.start()
+    assert source.started
+    for i, attitude in enumerate(attitudes):
+        assert stream.sample(i / 30) == attitude
+    assert stream.buffer.samples()[:, 1:].tolist() == [list(attitude) for attitude in attitudes[-4:]]
+    stream.stop()
+    assert source.stopped
+
+    smoothed = SensorStream(ListSource(attitudes), ExponentialFilter(0.5))
+    smoothed.start()
+    values = [smoothed.sample(i / 30) for i in range(10)]
+    assert values[0] == attitudes[0] and values[-1] != attitudes[-1]
+    assert smoothed.buffer.samples()[:, 1:].tolist() == [list(attitude) for attitude in attitudes]
@@ -0,0 +1,93 @@
+import random
+import pytest
+from color_catcher_match import ColorMatch, random_hsv
+from color_catcher_sensors import KalmanFilter, SensorStream
+from color_catcher_trace import (CELEBRATION, HEADER, MAGIC, TraceRecorder, TraceSource, read_trace,
+                                 replay, synthetic_trace, write_trace)
+
+
+class SyntheticSource(TraceSource):
+    """Attitudes of synthetic_trace, read one per frame like the device's motion."""
+    def __init__(self, attitudes):
+        self.attitudes = [tuple(attitude) for attitude in attitudes.tolist()]
+        self.index = 0
+
+
+def play_session(path, seconds=120, decimal=1, seed=3, celebration=CELEBRATION):
+    """Play like ColorFinder with RECORD_TRACE set: no samples during the celebration of a catch and
+    targets of a generator replay() doesn't know. Return wins and locks as the player saw them."""
+    times, attitudes = synthetic_trace(seconds, seed=seed)
+    sensors = SensorStream(SyntheticSource(attitudes), KalmanFilter(), capacity=64)
+    sensors.start()
+    recorder = TraceRecorder(path, decimal)
+    rng = random.Random(42)
+    match = ColorMatch(random_hsv(decimal, rng), decimal)
+    recorder.target(sensors.buffer, match.target)
+    wins, locks, active_from = 0, [], 0.0
+
+    for t in times.tolist():
+        if t < active_from:
+            sensors.source.skip()
+            continue
+        hsv, locked = match.update(sensors.sample(t))
+        locks.extend((t, i) for i in locked)
+        recorder.record(sensors.buffer)
+        if match.caught:
+            wins += 1
+            active_from = t + celebration
+            match = ColorMatch(random_hsv(decimal, rng), decimal)
+            recorder.target(sensors.buffer, match.target)
+    recorder.close(sensors.buffer)
+    return wins, locks
+
+
+def test_replay_chases_the_recorded_targets(tmp_path):
+    path = tmp_path / 'session.trace'
+    wins, locks = play_session(path)
+    assert wins >= 2
+
+    trace = read_trace(path)
+    assert trace.decimal == 1
+    assert len(trace.targets) == wins + 1
+    for seed in (0, 1):
+        result = replay(trace, seed, KalmanFilter())
+        assert result.wins == wins
+        assert result.locks == locks
+
+
+def test_replay_follows_the_target_records(tmp_path):
+    # the replay doesn't rely on CELEBRATION when the game paused shorter or longer
+    for celebration in (0.3, 2.5):
+        path = tmp_path / f'{celebration}.trace'
+        wins, locks = play_session(path, celebration=celebration)
+        assert wins >= 2
+        result = replay(read_trace(path), 0, KalmanFilter())
+        assert (result.wins, result.locks) == (wins, locks)
+
+
+def test_trace_without_targets_uses_the_seed(tmp_path):
+    path = tmp_path / 'synthetic.trace'
+    times, attitudes = synthetic_trace(60, seed=1)
+    write_trace(path, times, attitudes, decimal=1)
+    trace = read_trace(path)
+    assert trace.targets == []
+    assert len(trace.samples) == len(times)
+
+    first, again, other = (replay(trace, seed, KalmanFilter()) for seed in (0, 0, 1))
+    assert (first.wins, first.locks) == (again.wins, again.locks)
+    assert first.locks != other.locks
+
+
+def test_cut_off_record_is_ignored(tmp_path):
+    path = tmp_path / 'killed.trace'
+    write_trace(path, *synthetic_trace(1))
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 7)
+    assert len(read_trace(path).samples) == 30
+
+
+def test_old_version_is_rejected(tmp_path):
+    path = tmp_path / 'old.trace'
+    path.write_bytes(HEADER.pack(MAGIC, 1, 2))
+    with pytest.raises(ValueError):
+        read_trace(path)
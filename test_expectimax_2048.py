@@ -0,0 +1,27 @@
+import random
+import bitboard_2048 as bb
+from expectimax_2048 import Expectimax
+
+
+def test_no_move_and_single_move():
+    full = bb.encode([[2, 4, 2, 4], [4, 2, 4, 2], [2, 4, 2, 4], [4, 2, 4, 2]])
+    assert Expectimax().best_move(full) is None
+    # only a swipe along the columns changes this board
+    column = bb.encode([[2, 4, 2, 4], [2, 8, 16, 32], [4, 2, 4, 2], [8, 16, 32, 64]])
+    assert Expectimax(time_budget=None).best_move(column) in ('up', 'down')
+
+
+def test_cache_stays_bounded():
+    searcher = Expectimax(depth=3, time_budget=None, cache_size=50)
+    searcher.best_move(bb.encode([[2, 0, 0, 2], [0, 4, 0, 0], [0, 0, 0, 0], [2, 0, 0, 0]]))
+    assert searcher.reached_depth == 3
+    assert 0 < len(searcher.cache) <= 50
+
+
+def test_plays_far_better_than_random():
+    rng = random.Random(1)
+    searcher = Expectimax(depth=2, time_budget=None)
+    board = bb.add_new_tile(bb.add_new_tile(0, rng), rng)
+    while not bb.no_more_moves(board) and bb.max_tile(board) < 512:
+        board = bb.add_new_tile(bb.move(board, searcher.best_move(board))[0], rng)
+    assert bb.max_tile(board) == 512
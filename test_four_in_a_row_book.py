@@ -0,0 +1,39 @@
+import pytest
+from four_in_a_row_book import HEADER, MAGIC, OpeningBook, opening_positions, write_book
+from four_in_a_row_engine import Position
+
+
+def play(moves, rows=5, cols=5, connect=4):
+    position = Position(rows, cols, connect)
+    for col in moves:
+        position.play(col)
+    return position
+
+
+def test_opening_positions_are_distinct():
+    openings = opening_positions(5, 5, 4, 2)
+    assert openings[0] == ()
+    assert len(openings) == 1 + 5 + 5 * 5
+    assert len({play(moves).hash for moves in openings}) == len(openings)
+
+
+def test_lookup_round_trip(tmp_path):
+    path = tmp_path / 'book'
+    openings = opening_positions(5, 5, 4, 2)
+    entries = [(play(moves).hash, len(moves) % 5) for moves in openings]
+    write_book(path, 5, 5, 4, entries)
+
+    book = OpeningBook(path)
+    assert len(book) == len(openings)
+    for moves in openings:
+        assert book.lookup(play(moves)) == len(moves) % 5
+    assert book.lookup(play([0, 0, 0])) is None
+    assert book.lookup(play([], 6, 7)) is None
+
+
+def test_old_version_is_rejected(tmp_path):
+    # version 1 books were hashed with other Zobrist keys, their lookups would silently miss
+    path = tmp_path / 'book'
+    path.write_bytes(HEADER.pack(MAGIC, 1, 5, 5, 4, 0))
+    with pytest.raises(ValueError):
+        OpeningBook(path)
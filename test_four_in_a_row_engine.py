@@ -0,0 +1,174 @@
+import random
+import numpy as np
+import pytest
+from four_in_a_row_engine import WIN_SCORE, ComputedKeys, Position, Searcher, find_lines
+
+
+def to_board(position):
+    """Array of 1, -1 and 0 like FourInARow.BOARD (row 0 is the top)."""
+    board = np.zeros((position.rows, position.cols), dtype=int)
+    for player in (1, -1):
+        for col in range(position.cols):
+            for height in range(position.rows):
+                if position.coins[player] >> (col * position.height + height) & 1:
+                    board[position.rows - 1 - height, col] = player
+    return board
+
+
+def has_line(board, player, connect=4):
+    """Scan every cell in every direction, the slow way."""
+    rows, cols = board.shape
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(r + i * dr, c + i * dc) for i in range(connect)]
+                if all(0 <= rr < rows and 0 <= cc < cols and board[rr, cc] == player for rr, cc in cells):
+                    return True
+    return False
+
+
+def random_games(count, rows=6, cols=7, connect=4, seed=0):
+    """Yield the position after every move of count random games, with the player who moved."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        position = Position(rows, cols, connect)
+        while not position.is_full():
+            player = position.player
+            position.play(rng.choice([col for col in range(cols) if position.can_play(col)]))
+            yield position, player
+            if position.is_winner(player):
+                break
+
+
+def test_is_winner_matches_a_full_scan():
+    for connect, rows, cols in ((4, 6, 7), (3, 4, 4), (5, 9, 8)):
+        wins = 0
+        for position, player in random_games(30, rows, cols, connect):
+            board = to_board(position)
+            assert position.is_winner(player) == has_line(board, player, connect)
+            wins += position.is_winner(player)
+        assert wins > 15
+
+
+def test_lines_in_every_direction():
+    for moves in ([0, 0, 1, 1, 2, 2, 3],              # row
+                  [0, 1, 0, 1, 0, 1, 0],              # column
+                  [0, 1, 1, 2, 2, 3, 2, 3, 3, 6, 3],  # diagonal /
+                  [3, 2, 2, 1, 1, 0, 1, 0, 0, 6, 0]): # diagonal \
+        position = Position(6, 7)
+        for col in moves[:-1]:
+            position.play(col)
+            assert not position.is_winner(1)
+        position.play(moves[-1])
+        assert position.is_winner(1) and not position.is_winner(-1)
+
+
+def empty_winning_cells(board, player, connect=4):
+    """Empty cells that complete a line of player, wherever they are (coins may have to go below first)."""
+    rows, cols = board.shape
+
+    def run(r, c, dr, dc):
+        length = 0
+        r, c = r + dr, c + dc
+        while 0 <= r < rows and 0 <= c < cols and board[r, c] == player:
+            length, r, c = length + 1, r + dr, c + dc
+        return length
+
+    return {(r, c) for r, c in zip(*np.nonzero(board == 0))
+            if any(1 + run(r, c, dr, dc) + run(r, c, -dr, -dc) >= connect
+                   for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)))}
+
+
+def test_hash_and_undo():
+    for position, _ in random_games(20, seed=1):
+        copy = Position(position.rows, position.cols)
+        copy.set_board(to_board(position))
+        assert (copy.hash, copy.coins, copy.player) == (position.hash, position.coins, position.player)
+
+    position = Position(6, 7)
+    start = (position.hash, dict(position.coins), list(position.heights))
+    for col in (3, 3, 2, 4, 4, 6):
+        position.play(col)
+    while position.history:
+        position.undo()
+    assert (position.hash, position.coins, position.heights) == start
+
+
+def test_threats_match_a_full_scan():
+    for position, player in random_games(20, seed=2):
+        if position.is_winner(player):
+            continue
+        board = to_board(position)
+        for who in (1, -1):
+            bits = position.threats(who)
+            cells = {(position.rows - 1 - index % position.height, index // position.height)
+                     for index in range(position.cols * position.height) if bits >> index & 1}
+            assert cells == empty_winning_cells(board, who)
+
+
+def test_searcher_wins_and_blocks():
+    position = Position(6, 7)
+    for col in (0, 6, 1, 6, 2):
+        position.play(col)
+    # -1 must block the row 0 1 2 at column 3
+    assert Searcher(time_budget=None, max_depth=4).best_move(position) == 3
+    position.play(5)
+    # 1 wins at once
+    assert Searcher(time_budget=None, max_depth=4).best_move(position) == 3
+
+
+def test_searcher_sees_a_forced_win():
+    # 1 can play column 2 or 5 to get an open three that can't be blocked twice
+    position = Position(6, 7)
+    for col in (3, 3, 4, 4):
+        position.play(col)
+    searcher = Searcher(time_budget=None, max_depth=5)
+    assert searcher.best_move(position) in (2, 5)
+    score, _ = searcher.search_root(position.copy(), [2, 5], 5)
+    assert score >= WIN_SCORE - position.rows * position.cols
+
+
+def test_table_keeps_the_distance_to_a_win():
+    position = Position(6, 7)
+    for col in (3, 3, 4, 4):
+        position.play(col)
+    searcher = Searcher(time_budget=None)
+    window = -WIN_SCORE - 1, WIN_SCORE + 1
+    # 1 wins 3 plies from here, at whatever ply the position turns up
+    assert searcher.negamax(position, 5, *window, ply=1) == WIN_SCORE - 4
+    assert searcher.table.get(position.hash)
+    assert searcher.negamax(position, 5, *window, ply=3) == WIN_SCORE - 6
+
+
+def test_find_lines_matches_a_full_scan():
+    rng = np.random.default_rng(3)
+    for connect, shape in ((4, (6, 7)), (5, (9, 12)), (3, (4, 3)), (4, (3, 7))):
+        boards = rng.choice(np.array([0, 1, -1], dtype=np.int8), size=(200, *shape), p=(0.5, 0.25, 0.25))
+        wins = find_lines(boards, connect)
+        for player in (1, -1):
+            assert wins[player].shape == (200,)
+            assert wins[player].tolist() == [has_line(board, player, connect) for board in boards]
+        single = find_lines(boards[0], connect)
+        assert (bool(single[1]), bool(single[-1])) == (wins[1][0], wins[-1][0])
+
+
+def test_huge_boards_compute_their_keys():
+    position = Position(300, 300, 6)
+    assert isinstance(position.keys[1], ComputedKeys)
+    small = Position(6, 7)
+    assert [position.keys[player][i] for player in (1, -1) for i in range(40)] == \
+           [small.keys[player][i] for player in (1, -1) for i in range(40)]
+
+    for col in (150, 0, 151, 0, 152, 0, 153, 0, 154):
+        position.play(col)
+        assert not position.is_winner(-position.player)
+    position.play(1)
+    position.play(155)
+    assert position.is_winner(1)
+    assert find_lines(to_board(position), 6)[1]
+
+
+def test_set_board_rejects_impossible_boards():
+    for board in ([[1, 0], [0, 0]], [[0, 0], [1, 1]]):
+        with pytest.raises(ValueError):
+            Position(2, 2).set_board(np.array(board))
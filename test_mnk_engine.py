@@ -0,0 +1,66 @@
+import random
+from mnk_engine import WIN_SCORE, Board, Searcher
+
+
+def setup_board(mine, theirs, rows=15, cols=15, connect=5):
+    """Board with player 1 to move, marks given as (row, col)."""
+    assert len(mine) == len(theirs)
+    board = Board(rows, cols, connect)
+    for a, b in zip(mine, theirs):
+        board.play(a[0] * cols + a[1])
+        board.play(b[0] * cols + b[1])
+    return board
+
+
+def block_position():
+    # the opponent has four at (0,0)-(0,3), player 1 has threes through (7,7)
+    mine = [(7, 4), (7, 5), (7, 6), (4, 7), (5, 7), (6, 7),
+            (4, 4), (5, 5), (6, 6), (4, 10), (5, 9), (6, 8)]
+    theirs = [(0, 0), (0, 1), (0, 2), (0, 3)] + [(14, col) for col in range(0, 16, 2)]
+    return setup_board(mine, theirs)
+
+
+def test_threat_cells():
+    board = block_position()
+    assert board.threat_cells(-1) == [4]
+    assert board.threat_cells(1) == []
+
+
+def test_block_ranks_below_own_threes():
+    board = block_position()
+    assert board.move_value(7 * 15 + 7) > board.move_value(4)
+
+
+def test_best_move_blocks_four():
+    board = block_position()
+    assert Searcher(time_budget=None, max_depth=2).best_move(board) == 4
+
+
+def test_best_move_wins_before_blocking():
+    board = block_position()
+    board.play(7 * 15 + 3)      # player 1 now has four at (7,3)-(7,6)
+    board.play(12 * 15 + 0)
+    assert Searcher(time_budget=None, max_depth=2).best_move(board) in (7 * 15 + 2, 7 * 15 + 7)
+
+
+def test_search_blocks_forced_threat():
+    # below the root the forced block must be searched, not the best ranked move
+    board = block_position()
+    value = Searcher(time_budget=None).negamax(board, 1, -WIN_SCORE - 1, WIN_SCORE + 1, 1)
+    assert value > -WIN_SCORE // 2
+
+
+def test_undo_restores_counters():
+    rng = random.Random(3)
+    board = Board(7, 7, 4)
+    cells = list(range(49))
+    rng.shuffle(cells)
+    for cell in cells:
+        if board.winner:
+            break
+        board.play(cell)
+    while board.history:
+        board.undo()
+    fresh = Board(7, 7, 4)
+    assert board.counts == fresh.counts and board.fours == fresh.fours
+    assert board.score == 0 and not board.candidates
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import batch_2048 as batch
+import replay_2048 as replay
+
+
+def short_game(seed, size, moves=20):
+    """First moves of a game with random swipes (random games on big boards take very long)."""
+    rng, strategy = np.random.default_rng(seed), np.random.default_rng(seed + 1)
+    board = np.zeros((size, size), dtype=np.int64)
+    recorder = replay.Recorder(seed, size)
+    for _ in range(2):
+        cell = batch.add_new_tiles(board[np.newaxis], rng)[0]
+        recorder.spawn(cell, board.flat[cell])
+    while len(recorder.record.moves) < moves:
+        direction = int(strategy.integers(4))
+        swiped, _, changed = batch.move(board[np.newaxis], direction)
+        if changed[0]:
+            board = swiped[0]
+            recorder.move(direction)
+            cell = batch.add_new_tiles(board[np.newaxis], rng)[0]
+            recorder.spawn(cell, board.flat[cell])
+    return recorder.finish(board)
+
+
+def test_pack_moves_round_trip():
+    moves = np.random.default_rng(0).integers(0, 4, size=37)
+    packed = replay.pack_moves(moves)
+    assert len(packed) == 10
+    assert replay.unpack_moves(packed, 37).tolist() == moves.tolist()
+
+
+def test_archive_round_trip(tmp_path):
+    path = tmp_path / 'games.bin'
+    # spawns of boards up to 11x11 are stored as uint8, of bigger ones as uint16
+    records = [replay.record_random_game(1), replay.record_random_game(2, 5), short_game(3, 11), short_game(4, 12)]
+    replay.write_records(path, records[:2])
+    replay.write_records(path, records[2:])
+
+    read = list(replay.read_records(path))
+    assert [record.seed for record in read] == [1, 2, 3, 4]
+    for original, record in zip(records, read):
+        assert list(record.moves) == original.moves
+        assert list(record.spawns) == original.spawns
+        assert np.array_equal(record.final_board, original.final_board)
+        assert np.array_equal(replay.replay(record), original.final_board)
+
+
+def test_replay_many_matches_single_replays():
+    records = [replay.record_random_game(seed) for seed in range(20)]
+    boards, valid = replay.replay_many(records)
+    assert valid.all()
+    for record, board in zip(records, boards):
+        assert np.array_equal(board, replay.replay(record))
+
+
+def test_tampered_games_are_detected():
+    records = [replay.record_random_game(seed) for seed in range(5)]
+    records[2].spawns[-1] ^= 1          # a 4 instead of a 2 or the other way round
+    with pytest.raises(replay.ReplayError):
+        replay.replay(records[2])
+    _, valid = replay.replay_many(records)
+    assert valid.tolist() == [True, True, False, True, True]
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'games.bin'
+    path.write_bytes(b'2048\x02')
+    with pytest.raises(replay.ReplayError):
+        list(replay.read_records(path))
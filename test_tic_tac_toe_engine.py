@@ -0,0 +1,63 @@
+import random
+from functools import lru_cache
+import pytest
+import tic_tac_toe_engine as ttt
+
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def wins(mask):
+    return any(all(mask >> cell & 1 for cell in line) for line in LINES)
+
+
+@lru_cache(maxsize=None)
+def outcome(mine, theirs):
+    """1, 0 or -1 for the player to move, plain minimax over all moves."""
+    free = [cell for cell in range(9) if not (mine | theirs) >> cell & 1]
+    if not free:
+        return 0
+    best = -1
+    for cell in free:
+        played = mine | 1 << cell
+        best = max(best, 1 if wins(played) else -outcome(theirs, played))
+    return best
+
+
+@pytest.fixture(scope='module')
+def perfect(tmp_path_factory):
+    return ttt.PerfectPlayer(tmp_path_factory.mktemp('table') / 'tic_tac_toe.table')
+
+
+def test_winning_table():
+    assert list(ttt.WINNING) == [wins(mask) for mask in range(ttt.FULL + 1)]
+
+
+def test_values_and_moves_are_perfect(perfect):
+    assert perfect.value(0, 0) == 0
+    rng = random.Random(0)
+    for _ in range(300):
+        mine, theirs = 0, 0
+        while not ttt.WINNING[theirs] and mine | theirs != ttt.FULL:
+            value, cell = perfect.value(mine, theirs), perfect.best_move(mine, theirs)
+            assert (value > 0) - (value < 0) == outcome(mine, theirs)
+            played = mine | 1 << cell
+            assert (1 if wins(played) else -outcome(theirs, played)) == outcome(mine, theirs)
+            mine, theirs = theirs, mine | 1 << ttt.random_move(mine, theirs, rng)
+
+
+def test_perfect_player_never_loses(perfect):
+    assert ttt.self_play(500, perfect.best_move, ttt.random_move)[-1] == 0
+    assert ttt.self_play(500, ttt.random_move, perfect.best_move)[1] == 0
+    assert ttt.self_play(10, perfect.best_move, perfect.best_move) == {1: 0, 0: 10, -1: 0}
+
+
+def test_table_file(tmp_path, perfect):
+    path = tmp_path / 'tic_tac_toe.table'
+    values, moves = ttt.load_table(path)     # solved and written on first use
+    assert path.exists()
+    assert ttt.load_table(path) == (values, moves) == (perfect.values, perfect.moves)
+
+    path.write_bytes(ttt.HEADER.pack(b'TTT3', ttt.VERSION + 1) + path.read_bytes()[ttt.HEADER.size:])
+    with pytest.raises(ValueError):
+        ttt.load_table(path)
@@ -0,0 +1,158 @@
+""" TIC TAC TOE - bitmask engine and perfect-play table
+
+Each player's marks are one 9-bit mask, cell i = 3 * row + column. Winning is a lookup in WINNING, a
+table of all 512 masks, so no line is scanned while playing.
+
+Every position that can come up in a game is solved once and stored in a small table file next to
+the game, indexed by the base-3 number of the board seen from the player to move:
+
+    header      '<4sB'   magic b'TTT3', version
+    values      int8 * 3**9   score for the player to move: > 0 wins, < 0 loses, 0 draw
+                              (the faster the win or the slower the loss, the bigger the score)
+    moves       int8 * 3**9   best cell, -1 for finished or unreachable positions
+
+load_table() reads the file (and builds it on first use), after that the computer player answers
+with two list lookups.
+
+Usage: python tic_tac_toe_engine.py            (rebuild the table and play 100000 games)
+"""
+
+import os
+import random
+import struct
+import sys
+import time
+import numpy as np
+
+
+FULL = 0x1FF
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,      # rows
+    0b001001001, 0b010010010, 0b100100100,      # columns
+    0b100010001, 0b001010100,                   # diagonals
+)
+WINNING = tuple(any(mask & win == win for win in WIN_MASKS) for mask in range(FULL + 1))
+BASE3 = tuple(sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(FULL + 1))
+FREE_CELLS = tuple(tuple(i for i in range(9) if not mask >> i & 1) for mask in range(FULL + 1))
+
+MAGIC = b'TTT3'
+VERSION = 1
+HEADER = struct.Struct('<4sB')
+TABLE_SIZE = 3 ** 9
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tic_tac_toe.table')
+
+
+def index(mine, theirs) -> int:
+    """Table index of a position seen from the player to move."""
+    return BASE3[mine] + 2 * BASE3[theirs]
+
+
+def solve():
+    """Solve all positions reachable from the empty board. Return the values and moves tables."""
+    values = np.zeros(TABLE_SIZE, dtype=np.int8)
+    moves = np.full(TABLE_SIZE, -1, dtype=np.int8)
+    solved = set()
+
+    def negamax(mine, theirs):
+        i = index(mine, theirs)
+        if i in solved:
+            return int(values[i])
+
+        best_score, best_cell = -100, -1
+        for cell in FREE_CELLS[mine | theirs]:
+            played = mine | 1 << cell
+            if WINNING[played]:
+                score = len(FREE_CELLS[played | theirs]) + 1
+            elif played | theirs == FULL:
+                score = 0
+            else:
+                score = -negamax(theirs, played)
+            if score > best_score:
+                best_score, best_cell = score, cell
+
+        values[i], moves[i] = best_score, best_cell
+        solved.add(i)
+        return best_score
+
+    negamax(0, 0)
+    return values, moves
+
+
+def write_table(path, values, moves):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION))
+        f.write(values.tobytes())
+        f.write(moves.tobytes())
+
+
+def load_table(path=TABLE_FILE):
+    """Return the values and moves tables as lists. Solve and save them if the file is missing."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a Tic Tac Toe table (version {VERSION})')
+        table = np.frombuffer(data, dtype=np.int8, offset=HEADER.size).reshape(2, TABLE_SIZE)
+        values, moves = table
+    except FileNotFoundError:
+        values, moves = solve()
+        write_table(path, values, moves)
+    return values.tolist(), moves.tolist()
+
+
+class PerfectPlayer:
+    """Looks up the solved value and best cell of a position in O(1)."""
+    def __init__(self, path=TABLE_FILE):
+        self.values, self.moves = load_table(path)
+
+    def value(self, mine, theirs) -> int:
+        return self.values[index(mine, theirs)]
+
+    def best_move(self, mine, theirs) -> int:
+        return self.moves[index(mine, theirs)]
+
+
+def random_move(mine, theirs, rng=random):
+    return rng.choice(FREE_CELLS[mine | theirs])
+
+
+def play_game(first, second):
+    """Play one game between two strategies(mine, theirs) -> cell.
+    Return 1 if first wins, -1 if second wins and 0 for a draw.
+    """
+    masks = [0, 0]
+    strategies = (first, second)
+    for turn in range(9):
+        mover = turn & 1
+        mine = masks[mover] | 1 << strategies[mover](masks[mover], masks[1 - mover])
+        masks[mover] = mine
+        if WINNING[mine]:
+            return 1 - 2 * mover
+    return 0
+
+
+def self_play(games, first, second):
+    """Return how often first wins, draws and loses against second as {1: n, 0: n, -1: n}."""
+    results = {1: 0, 0: 0, -1: 0}
+    for _ in range(games):
+        results[play_game(first, second)] += 1
+    return results
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    values, moves = solve()
+    write_table(TABLE_FILE, values, moves)
+    print(f'Solved {int((moves >= 0).sum())} positions in {time.perf_counter() - start:.2f}s, '
+          f'wrote {TABLE_FILE}')
+
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    perfect = PerfectPlayer().best_move
+    for name, first, second in (('perfect vs random', perfect, random_move),
+                                ('random vs perfect', random_move, perfect),
+                                ('random vs random', random_move, random_move)):
+        start = time.perf_counter()
+        results = self_play(games, first, second)
+        print(f'{name:<20} wins {results[1]:>7}  draws {results[0]:>7}  losses {results[-1]:>7}  '
+              f'({games / (time.perf_counter() - start):,.0f} games/s)')